@@ -0,0 +1,134 @@
+"""Relatório de memória: layout antigo do painel (DataFrame de texto copiado por sessão) x cubo compacto.
+
+Uso: python benchmarks/bench_memoria.py --anos 10 --locais 200 --sessoes 20 [--saida memoria.json]
+"""
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from acumulados import SomasAcumuladas
+from armazenamento import caminho_parquet, carregar_longo, salvar_parquet
+from cubo import montar_cubo
+from filtros import IndiceFiltros
+from gerar_dados import gerar_planilha
+from rotulos import MESES_PT, formata_mes_abrev_ano, formata_mes_grafico, rotulos_mes
+from transformacao import transformar
+
+
+def mb(n_bytes):
+    return n_bytes / 2**20
+
+
+def memoria(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def layout_antigo(caminho_csv):
+    # Reproduz o carregar_dados_v2 original: CSV inteiro, textos como objeto e rótulos guardados por linha
+    df = pd.read_csv(caminho_csv)
+    df["data"] = pd.to_datetime(df["data"])
+    df["ano"] = df["data"].dt.year
+    df["mes_nome"] = df["data"].dt.month.map(MESES_PT)
+    df["mes_ano_ref"] = df["data"].apply(formata_mes_abrev_ano)
+    df["local"] = df["local"].astype(str).str.strip().str.upper().astype(object)
+    df["grupo"] = df["grupo"].astype(str).str.strip().str.upper().astype(object)
+    df["mes_grafico"] = df["data"].apply(formata_mes_grafico)
+    return df
+
+
+def rotulos(mensal):
+    # Colunas derivadas do mês (ano, mes, mes_ano_ref, mes_nome) que o cubo antigo guardava por linha
+    derivados = rotulos_mes(mensal["periodo"])
+    return pd.DataFrame({
+        "ano": mensal["periodo"].dt.year,
+        "mes": mensal["periodo"].dt.month,
+        "mes_ano_ref": derivados["mes_ano_ref"],
+        "mes_nome": derivados["mes_nome"],
+    }, index=mensal.index)
+
+
+def cubo_sem_compactar(cubo):
+    # Como o cubo era guardado antes: int64/float64, periodo no diário e rótulos de mês materializados
+    diario = cubo["diario"].astype({"bombonas": "int64", "peso": "float64"})
+    diario["periodo"] = diario["data"] + pd.offsets.MonthEnd(0)
+    mensal = cubo["mensal"].astype({"bombonas": "int64", "peso": "float64", "dias_mask": "int64"})
+    mensal = pd.concat([mensal, rotulos(mensal)], axis=1)
+    return {"diario": diario, "mensal": mensal}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--anos", type=int, default=10)
+    parser.add_argument("--locais", type=int, default=200)
+    parser.add_argument("--grupos", type=int, default=5)
+    parser.add_argument("--sessoes", type=int, default=20, help="Sessões simultâneas na projeção")
+    parser.add_argument("--saida", help="Grava o relatório em JSON")
+    args = parser.parse_args(argv)
+
+    print(f"🔄 Gerando {args.anos} anos x {args.locais} locais x {args.grupos} grupos...")
+    df_longo = transformar(gerar_planilha(args.anos, args.locais, args.grupos))
+
+    with tempfile.TemporaryDirectory() as pasta:
+        csv = Path(pasta) / "bombonas.csv"
+        df_longo.to_csv(csv, index=False)
+        antigo = layout_antigo(csv)
+        salvar_parquet(df_longo, caminho_parquet(csv))
+        cubo = montar_cubo(carregar_longo(csv, colunas=["data", "local", "grupo", "bombonas", "peso"]))
+
+    indice = IndiceFiltros(cubo["mensal"], ["periodo", "local", "grupo"])
+    somas = SomasAcumuladas(cubo["diario"])
+    expandido = cubo_sem_compactar(cubo)
+
+    relatorio = {
+        "escala": {"anos": args.anos, "locais": args.locais, "grupos": args.grupos, "linhas_longo": len(df_longo)},
+        "antigo": {
+            "dataframe": memoria(antigo),
+            # Cada sessão copiava o frame na barra lateral (df_temp) e de novo no filtro (df_filtrado)
+            "por_sessao": 2 * memoria(antigo),
+        },
+        "atual": {
+            "cubo_diario": memoria(cubo["diario"]),
+            "cubo_mensal": memoria(cubo["mensal"]),
+            "cubo_sem_compactar": memoria(expandido["diario"]) + memoria(expandido["mensal"]),
+            "indice_filtros": indice.nbytes,
+            "somas_acumuladas": somas.nbytes,
+            # Sem filtro a sessão segura só a seleção do cubo mensal (pior caso: o cubo inteiro)
+            "por_sessao": memoria(indice.selecionar()),
+        },
+    }
+    a, n = relatorio["antigo"], relatorio["atual"]
+    # O painel descarta o cubo diário depois de montar as somas acumuladas
+    compartilhado = n["cubo_mensal"] + n["indice_filtros"] + n["somas_acumuladas"]
+    relatorio["projecao"] = {
+        "sessoes": args.sessoes,
+        "antigo": a["dataframe"] + args.sessoes * a["por_sessao"],
+        "atual": compartilhado + args.sessoes * n["por_sessao"],
+    }
+
+    print(f"\n💾 Layout antigo ({len(antigo):,} linhas com rótulos em texto)")
+    print(f"   DataFrame carregado        {mb(a['dataframe']):10.1f} MB")
+    print(f"   cópias por sessão          {mb(a['por_sessao']):10.1f} MB")
+    print(f"\n💾 Cubo compacto ({len(cubo['diario']):,} linhas diárias, {len(cubo['mensal']):,} mensais)")
+    print(f"   cubo diário                {mb(n['cubo_diario']):10.1f} MB  (só na montagem do snapshot)")
+    print(f"   cubo mensal                {mb(n['cubo_mensal']):10.1f} MB  "
+          f"(sem compactar: {mb(n['cubo_sem_compactar']):.1f} MB os dois cubos)")
+    print(f"   índice de filtros          {mb(n['indice_filtros']):10.1f} MB")
+    print(f"   somas acumuladas           {mb(n['somas_acumuladas']):10.1f} MB")
+    print(f"   seleção por sessão         {mb(n['por_sessao']):10.1f} MB")
+    p = relatorio["projecao"]
+    print(f"\n📈 {p['sessoes']} sessões: {mb(p['antigo']):,.0f} MB -> {mb(p['atual']):,.0f} MB "
+          f"({p['antigo'] / p['atual']:.1f}x menos)")
+
+    if args.saida:
+        Path(args.saida).write_text(json.dumps(relatorio, indent=1), encoding="utf-8")
+        print(f"📂 Relatório em {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
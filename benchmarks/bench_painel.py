@@ -0,0 +1,193 @@
+"""Benchmark dos caminhos quentes do ETL e do painel sobre dados sintéticos (tempo e pico de memória).
+
+Uso: python benchmarks/bench_painel.py --anos 10 --locais 200 [--comparar benchmarks/resultados/anterior.json]
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from acumulados import SomasAcumuladas
+from armazenamento import caminho_parquet, carregar_longo, salvar_parquet
+from cubo import montar_cubo
+from filtros import IndiceFiltros
+from gerar_dados import gerar_planilha
+from kpis import (Parametros, bombonas_mensal, custo_mensal, media_diaria_por_local, peso_mensal, resumo,
+                  totais_por)
+from transformacao import transformar
+
+PASTA_RESULTADOS = Path(__file__).resolve().parent / "resultados"
+COLUNAS_PAINEL = ["data", "local", "grupo", "bombonas", "peso"]  # as mesmas do unidades.COLUNAS_PAINEL (carga do painel)
+
+
+def medir(funcao, repeticoes):
+    """Tempo mínimo e mediano em `repeticoes` execuções e pico de memória (tracemalloc) numa execução à parte."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"min_s": min(tempos), "mediana_s": statistics.median(tempos), "pico_mb": pico / 2**20}
+
+
+def commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ==================================================
+# ETAPAS (espelham o que o painel faz a cada rerun)
+# ==================================================
+def filtros_barra_lateral(indice, periodos):
+    # Ano -> opções de mês/local/grupo em cascata -> seleção final, como na barra lateral
+    ano = periodos[-1].year
+    periodos_sel = [p for p in periodos if p.year == ano]
+    indice.opcoes("periodo", periodo=periodos_sel)
+    locais = indice.opcoes("local", periodo=periodos_sel)
+    indice.opcoes("grupo", periodo=periodos_sel)
+    return indice.selecionar(periodo=periodos_sel, local=locais[: max(1, len(locais) // 2)], grupo=None)
+
+
+def pagina_home(mensal, parametros):
+    resumo(mensal, parametros)
+    bombonas_mensal(mensal)
+
+
+def pagina_peso(mensal, parametros):
+    resumo(mensal, parametros)
+    peso_mensal(mensal, parametros)
+    totais_por(mensal, "grupo", parametros)
+    totais_por(mensal, "local", parametros)
+
+
+def pagina_bombonas(mensal, parametros):
+    resumo(mensal, parametros)
+    bombonas_mensal(mensal)
+    totais_por(mensal, "grupo", parametros)
+    totais_por(mensal, "local", parametros)
+    media_diaria_por_local(mensal)
+
+
+def pagina_financeiro(mensal, parametros):
+    resumo(mensal, parametros)
+    custo_mensal(mensal, parametros)
+    totais_por(mensal, "grupo", parametros)
+    totais_por(mensal, "local", parametros)
+
+
+def comparativo_travado(somas, selecao):
+    # Última semana contra a anterior, para as três medidas do painel (custo = bombonas x preço)
+    fim = somas.ultimo_dia(**selecao)
+    for medida in ["peso", "bombonas", "bombonas"]:
+        somas.soma(medida, fim - pd.Timedelta(days=13), fim - pd.Timedelta(days=7), **selecao)
+        somas.soma(medida, fim - pd.Timedelta(days=6), fim, **selecao)
+
+
+def executar(args):
+    planilha = gerar_planilha(args.anos, args.locais, args.grupos, semente=args.semente)
+    parametros = Parametros()
+    resultados = {}
+
+    def etapa(nome, funcao):
+        resultados[nome] = medir(funcao, args.repeticoes)
+        r = resultados[nome]
+        print(f"   {nome:<28} {r['min_s'] * 1000:10.1f} ms  (mediana {r['mediana_s'] * 1000:9.1f} ms)  "
+              f"pico {r['pico_mb']:8.1f} MB")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        etapa("transformacao.transformar", lambda: transformar(planilha))
+        df_longo = transformar(planilha)
+        csv = Path(pasta) / "bombonas.csv"
+        salvar_parquet(df_longo, caminho_parquet(csv))
+        etapa("carregar_longo", lambda: carregar_longo(csv, colunas=COLUNAS_PAINEL))
+        df_base = carregar_longo(csv, colunas=COLUNAS_PAINEL)
+
+    etapa("montar_cubo", lambda: montar_cubo(df_base))
+    cubo = montar_cubo(df_base)
+    mensal = cubo["mensal"]
+    etapa("indices_snapshot", lambda: (IndiceFiltros(mensal, ["periodo", "local", "grupo"]),
+                                       SomasAcumuladas(cubo["diario"])))
+
+    # Índice sem cache de seleções: mede o caminho frio de cada mudança de filtro
+    indice = IndiceFiltros(mensal, ["periodo", "local", "grupo"], tamanho_cache=0)
+    periodos = indice.opcoes("periodo")
+    etapa("filtros_barra_lateral", lambda: filtros_barra_lateral(indice, periodos))
+
+    for nome, pagina in [("pagina_home", pagina_home), ("pagina_peso", pagina_peso),
+                         ("pagina_bombonas", pagina_bombonas), ("pagina_financeiro", pagina_financeiro)]:
+        etapa(nome, lambda pagina=pagina: pagina(mensal, parametros))
+
+    somas = SomasAcumuladas(cubo["diario"])
+    selecao = dict(periodo=None, local=None, grupo=None)
+    etapa("comparativo_travado", lambda: comparativo_travado(somas, selecao))
+
+    return {
+        "commit": commit_atual(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "escala": {"anos": args.anos, "locais": args.locais, "grupos": args.grupos, "semente": args.semente,
+                   "linhas_planilha": len(planilha), "linhas_longo": len(df_longo)},
+        "ambiente": {"python": platform.python_version(), "pandas": pd.__version__, "maquina": platform.machine()},
+        "repeticoes": args.repeticoes,
+        "resultados": resultados,
+    }
+
+
+def comparar(atual, anterior):
+    print(f"\n📊 Comparação com {anterior.get('commit')} ({anterior.get('data')})")
+    if anterior.get("escala") != atual["escala"]:
+        print("⚠️ Escalas diferentes: a comparação é só indicativa")
+    for nome, r in atual["resultados"].items():
+        antes = anterior.get("resultados", {}).get(nome)
+        if not antes:
+            print(f"   {nome:<28} (nova etapa)")
+            continue
+        razao = r["min_s"] / antes["min_s"] if antes["min_s"] else float("inf")
+        marca = "🔺" if razao > 1.2 else ("🔻" if razao < 0.8 else "  ")
+        print(f"   {marca} {nome:<26} {antes['min_s'] * 1000:9.1f} -> {r['min_s'] * 1000:9.1f} ms ({razao:5.2f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--anos", type=int, default=10)
+    parser.add_argument("--locais", type=int, default=200)
+    parser.add_argument("--grupos", type=int, default=5)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", help="JSON de resultados (padrão: benchmarks/resultados/painel-<commit>-<data>.json)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args(argv)
+
+    print(f"🔄 Gerando {args.anos} anos x {args.locais} locais x {args.grupos} grupos...")
+    atual = executar(args)
+
+    saida = Path(args.saida) if args.saida else (
+        PASTA_RESULTADOS / f"painel-{atual['commit'] or 'semcommit'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(atual, indent=1), encoding="utf-8")
+    print(f"📂 Resultados em {saida}")
+
+    if args.comparar:
+        comparar(atual, json.loads(Path(args.comparar).read_text(encoding="utf-8")))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,63 @@
+"""Micro-benchmark: rótulos de mês via .apply(formata_*) x tabela de consulta vetorizada.
+
+Uso: python benchmarks/bench_rotulos.py --anos 10 --locais 50 --grupos 5
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from rotulos import MESES_PT, formata_mes_abrev_ano, formata_mes_grafico, rotulos_mes
+
+
+def datas_sinteticas(anos, locais, grupos):
+    dias = pd.date_range("2015-01-01", periods=365 * anos, freq="D")
+    return pd.Series(np.repeat(dias.to_numpy(), locais * grupos), name="data")
+
+
+def cronometrar(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def caminho_apply(datas):
+    return pd.DataFrame({
+        "mes_ano_ref": datas.apply(formata_mes_abrev_ano),
+        "mes_grafico": datas.apply(formata_mes_grafico),
+        "mes_nome": datas.dt.month.map(MESES_PT),
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--anos", type=int, default=10)
+    parser.add_argument("--locais", type=int, default=20)
+    parser.add_argument("--grupos", type=int, default=5)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    datas = datas_sinteticas(args.anos, args.locais, args.grupos)
+    print(f"📋 {len(datas):,} linhas sintéticas ({args.anos} anos x {args.locais} locais x {args.grupos} grupos)")
+
+    t_apply, antigo = cronometrar(lambda: caminho_apply(datas), 1)
+    t_vetor, novo = cronometrar(lambda: rotulos_mes(datas), args.repeticoes)
+
+    iguais = all((novo[c].astype(str) == antigo[c]).all() for c in antigo.columns)
+    print(f"⏱️ apply:      {t_apply:8.3f} s")
+    print(f"⚡ vetorizado: {t_vetor:8.3f} s  ({t_apply / t_vetor:,.0f}x)")
+    print(f"💾 memória: {antigo.memory_usage(deep=True).sum() / 2**20:,.1f} MB (texto) -> "
+          f"{novo.memory_usage(deep=True).sum() / 2**20:,.1f} MB (categorias)")
+    print("✅ Rótulos idênticos" if iguais else "❌ Rótulos diferentes!")
+    return 0 if iguais else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,86 @@
+"""Gera planilhas no formato do BD_Bombonas.xlsx (e o formato longo) em escala configurável.
+
+Uso: python benchmarks/gerar_dados.py --anos 10 --locais 200 --excel /tmp/BD_grande.xlsx --longo /tmp/bombonas.csv
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from armazenamento import caminho_parquet, salvar_parquet
+from transformacao import grupos, transformar
+
+# Bombonas por dia de coleta em cada grupo: o A domina, os demais são esporádicos (como na base real)
+MEDIA_POR_GRUPO = {"COLCHOES": 0.05, "A": 12.0, "A3": 0.1, "B": 0.4, "E": 2.0}
+
+
+def gerar_planilha(anos=10, locais=200, n_grupos=5, inicio="2015-01-01", semente=42):
+    """Planilha larga: uma linha por dia de coleta de cada local, colunas de quantidade e peso por grupo."""
+    rng = np.random.default_rng(semente)
+    dias = pd.date_range(inicio, periods=365 * anos, freq="D")
+    nomes_locais = np.array([f"UNIDADE {i:03d}" for i in range(1, locais + 1)], dtype=object)
+
+    # Cada local coleta em parte dos dias úteis e raramente no fim de semana
+    frequencia = rng.uniform(0.3, 0.9, locais)
+    fator_dia = np.where(dias.dayofweek < 5, 1.0, 0.3)
+    coleta = rng.random((len(dias), locais)) < fator_dia[:, None] * frequencia[None, :]
+    pos_dia, pos_local = np.nonzero(coleta)
+
+    df = pd.DataFrame({"DATA": dias.to_numpy()[pos_dia], "LOCAL": nomes_locais[pos_local]})
+    porte = rng.lognormal(0, 0.5, locais)
+    for nome, (col_qtd, col_peso) in list(grupos.items())[:n_grupos]:
+        qtd = rng.poisson(MEDIA_POR_GRUPO.get(nome, 1.0) * porte[pos_local])
+        peso = np.rint(qtd * rng.normal(25, 4, len(qtd)).clip(5)).astype("int64")
+        df[col_qtd] = qtd
+        df[col_peso] = peso
+    return df
+
+
+def salvar_excel(df, caminho):
+    """Grava em modo write_only do openpyxl (linha a linha), viável para centenas de milhares de linhas."""
+    from openpyxl import Workbook
+
+    livro = Workbook(write_only=True)
+    aba = livro.create_sheet("BASE BOMBONAS")
+    aba.append(list(df.columns))
+    colunas = [df[c].dt.to_pydatetime() if c == "DATA" else df[c].tolist() for c in df.columns]
+    for linha in zip(*colunas):
+        aba.append(linha)
+    livro.save(caminho)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--anos", type=int, default=10)
+    parser.add_argument("--locais", type=int, default=200)
+    parser.add_argument("--grupos", type=int, default=5)
+    parser.add_argument("--inicio", default="2015-01-01")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--excel", help="Grava a planilha larga (.xlsx)")
+    parser.add_argument("--longo", help="Grava o formato longo (CSV + Parquet ao lado, como o ETL)")
+    args = parser.parse_args(argv)
+    if not args.excel and not args.longo:
+        parser.error("informe --excel e/ou --longo")
+
+    inicio = time.perf_counter()
+    df = gerar_planilha(args.anos, args.locais, args.grupos, args.inicio, args.semente)
+    print(f"📋 {len(df):,} linhas de planilha ({args.anos} anos x {args.locais} locais x {args.grupos} grupos)")
+
+    if args.longo:
+        df_longo = transformar(df)
+        df_longo.to_csv(args.longo, index=False)
+        salvar_parquet(df_longo, caminho_parquet(args.longo))
+        print(f"📂 Formato longo: {args.longo} ({len(df_longo):,} registros) + {caminho_parquet(args.longo)}")
+    if args.excel:
+        salvar_excel(df, args.excel)
+        print(f"📂 Planilha: {args.excel}")
+    print(f"⏱️ {time.perf_counter() - inicio:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
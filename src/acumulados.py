@@ -0,0 +1,129 @@
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+import pandas as pd
+
+from cubo import MEDIDAS
+
+
+def _tipo_acumulado(valores):
+    # Valores inteiros cuja soma absoluta cabe em int32 acumulam exatamente em int32 (metade da memória)
+    if np.all(np.mod(valores, 1) == 0) and np.abs(valores).sum() < 2**31:
+        return "int32"
+    return "float64"
+
+
+class SomasAcumuladas:
+    """Somas acumuladas do cubo diário: uma linha por dia, uma coluna por célula local x grupo.
+
+    O total de qualquer intervalo [inicio, fim] é a diferença entre duas linhas achadas
+    por busca binária; recortes de local/grupo escolhem colunas e recortes de mês viram
+    um intervalo por mês selecionado.
+    """
+
+    def __init__(self, diario, medidas=MEDIDAS):
+        pos_dia, dias = pd.factorize(diario["data"], sort=True)
+        pos_celula, celulas = pd.factorize(pd.MultiIndex.from_arrays([diario["local"], diario["grupo"]]), sort=True)
+        self.dias = dias.to_numpy().astype("datetime64[D]")
+        self.locais = celulas.get_level_values(0).to_numpy()
+        self.grupos = celulas.get_level_values(1).to_numpy()
+
+        # Linha 0 zerada: a soma de [i, j) é acumulado[j] - acumulado[i]
+        self._acumulado = {}
+        for medida in list(medidas) + ["registros"]:
+            valores = np.ones(len(diario)) if medida == "registros" else diario[medida].to_numpy(dtype="float64")
+            tipo = _tipo_acumulado(valores)
+            matriz = np.zeros((len(dias) + 1, len(celulas)), dtype=tipo)
+            np.add.at(matriz, (pos_dia + 1, pos_celula), valores.astype(tipo))
+            self._acumulado[medida] = np.cumsum(matriz, axis=0, dtype=tipo)
+
+    @classmethod
+    def de_partes(cls, dias, locais, grupos, acumulado):
+        """Remonta a partir de `partes()` sem recalcular (as matrizes podem ser visões de um arquivo mapeado)."""
+        somas = cls.__new__(cls)
+        somas.dias, somas.locais, somas.grupos = dias, locais, grupos
+        somas._acumulado = dict(acumulado)
+        return somas
+
+    def partes(self):
+        return self.dias, self.locais, self.grupos, self._acumulado
+
+    @property
+    def medidas(self):
+        return list(self._acumulado)
+
+    @property
+    def nbytes(self):
+        return sum(matriz.nbytes for matriz in self._acumulado.values()) + self.dias.nbytes
+
+    def _colunas(self, local=None, grupo=None):
+        colunas = np.ones(len(self.locais), dtype=bool)
+        if local is not None:
+            colunas &= np.isin(self.locais, list(local))
+        if grupo is not None:
+            colunas &= np.isin(self.grupos, list(grupo))
+        return colunas
+
+    def _intervalos(self, inicio, fim, periodo=None):
+        """Posições [i, j) de cada trecho de [inicio, fim] dentro dos meses selecionados."""
+        inicio, fim = np.datetime64(inicio, "D"), np.datetime64(fim, "D")
+        if periodo is None:
+            inis, fins = np.array([inicio]), np.array([fim])
+        else:
+            fins_mes = np.array(list(periodo), dtype="datetime64[D]")
+            inis = np.maximum(fins_mes.astype("datetime64[M]").astype("datetime64[D]"), inicio)
+            fins = np.minimum(fins_mes, fim)
+        validos = inis <= fins
+        return (np.searchsorted(self.dias, inis[validos], side="left"),
+                np.searchsorted(self.dias, fins[validos], side="right"))
+
+    def soma(self, medida, inicio, fim, local=None, grupo=None, periodo=None):
+        """Total de `medida` entre `inicio` e `fim` (inclusive) no recorte; filtro `None` não restringe."""
+        i, j = self._intervalos(inicio, fim, periodo)
+        acumulado, colunas = self._acumulado[medida], self._colunas(local, grupo)
+        # Escolhe as linhas antes das colunas: só 2 linhas por trecho saem da matriz
+        return float((acumulado[j][:, colunas] - acumulado[i][:, colunas]).sum())
+
+    def _contagem(self, local, grupo, periodo):
+        i, j = self._intervalos(self.dias[0], self.dias[-1], periodo)
+        acumulado, colunas = self._acumulado["registros"], self._colunas(local, grupo)
+
+        # Contagem acumulada até a linha k, restrita aos trechos: cresce com k, então cabe busca binária
+        def ate(k):
+            return acumulado[np.clip(k, i, j)][:, colunas].sum()
+        return ate
+
+    def ultimo_dia(self, local=None, grupo=None, periodo=None):
+        """Último dia com registro no recorte (None se não houver)."""
+        if len(self.dias) == 0:
+            return None
+        ate = self._contagem(local, grupo, periodo)
+        total = ate(len(self.dias))
+        if total == ate(0):
+            return None
+        k = bisect_left(range(len(self.dias) + 1), total, key=ate)
+        return pd.Timestamp(self.dias[k - 1])
+
+    def primeiro_dia(self, local=None, grupo=None, periodo=None):
+        """Primeiro dia com registro no recorte (None se não houver)."""
+        if len(self.dias) == 0:
+            return None
+        ate = self._contagem(local, grupo, periodo)
+        inicial = ate(0)
+        if ate(len(self.dias)) == inicial:
+            return None
+        k = bisect_right(range(len(self.dias) + 1), inicial, key=ate)
+        return pd.Timestamp(self.dias[k - 1])
+
+    def somas_por_intervalo(self, medida, inicios, fins, local=None, grupo=None, periodo=None):
+        """Totais de `medida` em vários intervalos [inicio, fim] de uma vez (para séries temporais)."""
+        acumulado = self._acumulado[medida][:, self._colunas(local, grupo)].sum(axis=1, dtype="float64")
+        if periodo is not None:
+            # Dias fora dos meses selecionados não contam: zera e reacumula a série do recorte
+            por_dia = np.diff(acumulado)
+            meses = np.array(list(periodo), dtype="datetime64[D]").astype("datetime64[M]")
+            por_dia[~np.isin(self.dias.astype("datetime64[M]"), meses)] = 0
+            acumulado = np.concatenate([[0.0], np.cumsum(por_dia)])
+        i = np.searchsorted(self.dias, np.asarray(inicios, dtype="datetime64[D]"), side="left")
+        j = np.searchsorted(self.dias, np.asarray(fins, dtype="datetime64[D]"), side="right")
+        return acumulado[j] - acumulado[i]
@@ -0,0 +1,261 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from grafo import Avaliacao, MemoIndicadores
+from indicadores import carregar_indicadores, prontos_kpis
+from kpis import GRAFO, Parametros
+from precos import pesos_custo
+from unidades import CacheUnidades, caminho_unidade, escolher_unidade, listar_unidades, novo_snapshot
+
+# API HTTP/JSON (só leitura) com os indicadores das páginas do painel, para o BI e as compras.
+# Os números saem do mesmo snapshot (cubo mensal + somas acumuladas) e do mesmo kpis.GRAFO do
+# painel. Cada resposta tem ETag derivada da versão dos dados + consulta: com If-None-Match igual
+# a resposta é 304 sem calcular nada; as respostas prontas ficam num LRU em memória.
+#
+#   GET /api/versao                                   unidade, versão dos dados e unidades disponíveis
+#   GET /api/resumo | mensal | peso | custo | grupos | locais | media_local
+#   GET /api/comparativo?medida=peso&p1=2025-01-01,2025-01-07&p2=2025-01-08,2025-01-14
+#
+# Filtros (os da barra lateral; repetir o parâmetro ou separar por vírgula):
+#   periodo=2025-01  ano=2025  mes=1  local=ANEXO  grupo=A  unidade=<unidade>
+#   meta_peso=25  preco_base=95  preco_estimado=101  (simulador)
+BASE_DIR = Path(__file__).resolve().parent.parent
+PASTA_DADOS = BASE_DIR / "dados"
+HOST_PADRAO = "127.0.0.1"  # só clientes locais; expor para a rede é decisão de quem sobe o serviço
+PORTA_PADRAO = 8502
+ROTAS = {
+    "resumo": "resumo",
+    "mensal": "bombonas_mes",
+    "peso": "peso_mes",       # real vs meta por mês
+    "custo": "custo_mes",
+    "grupos": "totais_grupo",
+    "locais": "totais_local",
+    "media_local": "media_local",
+}
+MEDIDAS_COMPARATIVO = ("peso", "bombonas", "custo")
+
+
+class ErroConsulta(ValueError):
+    """Parâmetro inválido na consulta (vira HTTP 400)."""
+
+
+def _valores(consulta, nome):
+    return [v.strip() for bruto in consulta.get(nome, []) for v in bruto.split(",") if v.strip()]
+
+
+def _numero(consulta, nome, padrao):
+    valores = _valores(consulta, nome)
+    if not valores:
+        return padrao
+    try:
+        return float(valores[-1])
+    except ValueError:
+        raise ErroConsulta(f"{nome} deve ser numérico: {valores[-1]!r}") from None
+
+
+def _inteiros(consulta, nome):
+    try:
+        return {int(v) for v in _valores(consulta, nome)}
+    except ValueError:
+        raise ErroConsulta(f"{nome} deve ser inteiro") from None
+
+
+def parametros_da_consulta(consulta):
+    padrao = Parametros()
+    return Parametros(*(_numero(consulta, campo, getattr(padrao, campo)) for campo in Parametros._fields))
+
+
+def selecao_da_consulta(consulta, periodos):
+    """Recorte como o da barra lateral: períodos (ano-mês), anos e meses se combinam; local e grupo à parte."""
+    pedidos, anos, meses = set(_valores(consulta, "periodo")), _inteiros(consulta, "ano"), _inteiros(consulta, "mes")
+    periodos_sel = None
+    if pedidos or anos or meses:
+        periodos_sel = [
+            p for p in periodos
+            if (not pedidos or f"{p:%Y-%m}" in pedidos) and (not anos or p.year in anos)
+            and (not meses or p.month in meses)
+        ]
+    return dict(periodo=periodos_sel, local=_valores(consulta, "local") or None, grupo=_valores(consulta, "grupo") or None)
+
+
+def _intervalo(consulta, nome, padrao):
+    valores = _valores(consulta, nome)
+    if not valores:
+        return padrao
+    try:
+        inicio, fim = (pd.Timestamp(v) for v in valores)
+    except ValueError:
+        raise ErroConsulta(f"{nome} deve ser inicio,fim (AAAA-MM-DD)") from None
+    return inicio, fim
+
+
+def comparativo(somas, selecao, pesos, consulta):
+    """Os dois períodos do comparativo do painel; sem p1/p2, as duas últimas semanas do recorte."""
+    max_d = somas.ultimo_dia(**selecao)
+    if max_d is None:
+        return None
+    ini2, fim2 = max_d - timedelta(days=6), max_d
+    ini1, fim1 = ini2 - timedelta(days=7), ini2 - timedelta(days=1)
+    p1 = _intervalo(consulta, "p1", (ini1, fim1))
+    p2 = _intervalo(consulta, "p2", (ini2, fim2))
+    v1, v2 = (float(sum(somas.soma(medida, ini, fim, **selecao) * fator for medida, fator in pesos.items()))
+              for ini, fim in (p1, p2))
+    diff = v2 - v1
+    return {
+        "p1": {"inicio": f"{p1[0]:%Y-%m-%d}", "fim": f"{p1[1]:%Y-%m-%d}", "valor": v1},
+        "p2": {"inicio": f"{p2[0]:%Y-%m-%d}", "fim": f"{p2[1]:%Y-%m-%d}", "valor": v2},
+        "diferenca": diff,
+        "percentual": (diff / v1 * 100) if v1 != 0 else 0,
+    }
+
+
+def _json(valor):
+    """DataFrames com to_json (vetorizado); o resto com json.dumps."""
+    if isinstance(valor, pd.DataFrame):
+        return valor.to_json(orient="records", date_format="iso", date_unit="s", force_ascii=False)
+    return json.dumps(valor, ensure_ascii=False, default=float)
+
+
+class Api:
+    """Responde às rotas da API sem depender do servidor HTTP (fácil de testar com um cliente local)."""
+
+    def __init__(self, pasta_dados=PASTA_DADOS, orcamento=None, tamanho_cache=512):
+        self.pasta_dados = Path(pasta_dados)
+        orcamento = orcamento or float(os.environ.get("BOMBONAS_ORCAMENTO_MB", "2048")) * 2**20
+        self.unidades = CacheUnidades(orcamento)
+        self.memo = MemoIndicadores()
+        self._respostas = OrderedDict()
+        self._tamanho_cache = tamanho_cache
+        self._trava = threading.Lock()
+
+    def _dados(self, unidade):
+        snapshot = self.unidades.obter(unidade, lambda: novo_snapshot(caminho_unidade(self.pasta_dados, unidade)))
+        versao, dados = snapshot.obter()
+        self.unidades.registrar(unidade, 0 if dados is None else dados["nbytes"])
+        return versao, dados
+
+    def responder(self, caminho, consulta, etag_cliente=None):
+        """(status, ETag, corpo em bytes) de um GET; corpo vazio no 304."""
+        rota = caminho.rstrip("/").removeprefix("/api/")
+        if rota not in ROTAS and rota not in ("versao", "comparativo"):
+            return 404, None, _json({"erro": f"rota desconhecida: {caminho}"}).encode("utf-8")
+        try:
+            pedida = (_valores(consulta, "unidade") or [None])[-1]
+            unidade, _ = escolher_unidade(self.pasta_dados, pedida)
+            # O painel cai na unidade padrão; a API não: um sistema externo não pode somar a unidade errada
+            if pedida is not None and pedida.lower() != unidade:
+                return 404, None, _json({"erro": f"unidade desconhecida: {pedida}"}).encode("utf-8")
+            versao, dados = self._dados(unidade)
+        except Exception as e:
+            return 500, None, _json({"erro": str(e)}).encode("utf-8")
+        if dados is None:
+            return 404, None, _json({"erro": f"sem dados para a unidade {unidade}"}).encode("utf-8")
+
+        # A ETag só depende da versão e da consulta normalizada: dá para responder 304 antes de calcular
+        normalizada = sorted((k, tuple(_valores(consulta, k))) for k in consulta)
+        etag = '"' + hashlib.sha1(repr((rota, unidade, versao, normalizada)).encode("utf-8")).hexdigest()[:20] + '"'
+        if etag_cliente and etag in [e.strip() for e in etag_cliente.split(",")]:
+            return 304, etag, b""
+        with self._trava:
+            if etag in self._respostas:
+                self._respostas.move_to_end(etag)
+                return 200, etag, self._respostas[etag]
+
+        try:
+            resultado = self._calcular(rota, consulta, unidade, versao, dados)
+        except ErroConsulta as e:
+            return 400, None, _json({"erro": str(e)}).encode("utf-8")
+        corpo = f'{{"unidade": {_json(unidade)}, "versao": {_json(versao)}, "dados": {_json(resultado)}}}'.encode("utf-8")
+        with self._trava:
+            self._respostas[etag] = corpo
+            if len(self._respostas) > self._tamanho_cache:
+                self._respostas.popitem(last=False)
+        return 200, etag, corpo
+
+    def _calcular(self, rota, consulta, unidade, versao, dados):
+        if rota == "versao":
+            return {"unidades": listar_unidades(self.pasta_dados)}
+        indice, somas = dados["indices"]["mensal"], dados["somas"]
+        parametros = parametros_da_consulta(consulta)
+        selecao = selecao_da_consulta(consulta, indice.opcoes("periodo"))
+
+        if rota == "comparativo":
+            medida = (_valores(consulta, "medida") or ["peso"])[-1]
+            if medida not in MEDIDAS_COMPARATIVO:
+                raise ErroConsulta(f"medida deve ser uma de {list(MEDIDAS_COMPARATIVO)}")
+            pesos = pesos_custo(somas.medidas, parametros.preco_estimado) if medida == "custo" else {medida: 1}
+            return comparativo(somas, selecao, pesos, consulta)
+
+        # Sem filtros, resumo e totais mensais vêm das tabelas materializadas (indicadores.py), se houver,
+        # cortadas nas colunas do kpis: o JSON tem o mesmo formato com ou sem filtro
+        mensal = indice.selecionar(**selecao)
+        prontos = {}
+        if all(v is None for v in selecao.values()):
+            materializado = carregar_indicadores(caminho_unidade(self.pasta_dados, unidade), versao, parametros)
+            if materializado:
+                prontos = prontos_kpis(materializado, mensal)
+        estado = tuple((dim, None if vals is None else tuple(vals)) for dim, vals in selecao.items())
+        calc = Avaliacao(
+            GRAFO,
+            entradas={"mensal": mensal, "parametros": parametros},
+            chaves={"mensal": (estado, unidade, versao), "parametros": parametros},
+            memo=self.memo,
+            prontos=prontos,
+        )
+        return calc[ROTAS[rota]]
+
+
+def criar_servidor(api, host=HOST_PADRAO, porta=PORTA_PADRAO):
+    class Manipulador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            partes = urlsplit(self.path)
+            inicio = time.perf_counter()
+            status, etag, corpo = api.responder(partes.path, parse_qs(partes.query), self.headers.get("If-None-Match"))
+            self.send_response(status)
+            if etag:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "no-cache")  # o cliente sempre revalida com If-None-Match
+            if status != 304:
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(corpo)))
+            self.send_header("Server-Timing", f"api;dur={(time.perf_counter() - inicio) * 1000:.1f}")
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, formato, *args):
+            print(f"[{datetime.now():%H:%M:%S}] {self.address_string()} {formato % args}", flush=True)
+
+    return ThreadingHTTPServer((host, porta), Manipulador)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP/JSON (só leitura) com os indicadores do painel.")
+    parser.add_argument("--host", default=HOST_PADRAO)
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--dados", default=PASTA_DADOS, help="Pasta dados/ (com as unidades em dados/unidades/)")
+    args = parser.parse_args(argv)
+
+    servidor = criar_servidor(Api(args.dados), args.host, args.porta)
+    print(f"🌐 API em http://{args.host}:{args.porta}/api/resumo", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("⏹️ Encerrando", flush=True)
+    finally:
+        servidor.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,9 +1,25 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go 
+import json
+import os
 from pathlib import Path
 from datetime import timedelta
+from collections import OrderedDict
+import threading
+
+from armazenamento import caminho_parquet
+from consultas import CONSULTA_EXEMPLO, LIMITE_LINHAS, BaseConsultas
+from indicadores import carregar_indicadores, prontos_kpis
+from grafo import Avaliacao, MemoIndicadores
+from kpis import GRAFO, Parametros
+from perfil import Perfilador, chrome_trace, perfil_ligado
+from precos import caminho_precos, pesos_custo
+from resolucao import MAX_ROTULOS, NOMES_FREQUENCIA, serie_adaptativa, tipar_arrays
+from rotulos import MESES_PT, mes_grafico, rotulo_periodo
+from unidades import UNIDADE_PADRAO, CacheUnidades, caminho_unidade, escolher_unidade, listar_unidades, novo_snapshot
 
 # ==================================================
 # 1. CONFIGURAÇÃO E CSS
@@ -60,21 +76,12 @@ if 'pagina_atual' not in st.session_state:
 def ir_para(pagina):
     st.session_state.pagina_atual = pagina
 
+# Perfil de tempo por etapa (BOMBONAS_PERFIL=1 ou ?perfil=1); desligado não mede nada
+perfil = Perfilador(perfil_ligado(st.query_params), pagina=st.session_state.pagina_atual)
+
 # ==================================================
 # 3. CARREGAMENTO E AUXILIARES (AJUSTADOS PARA INTEIROS)
 # ==================================================
-MESES_PT = {
-    1: 'Janeiro', 2: 'Fevereiro', 3: 'Março', 4: 'Abril', 
-    5: 'Maio', 6: 'Junho', 7: 'Julho', 8: 'Agosto', 
-    9: 'Setembro', 10: 'Outubro', 11: 'Novembro', 12: 'Dezembro'
-}
-
-MESES_ABREV = {
-    1: 'Jan', 2: 'Fev', 3: 'Mar', 4: 'Abr',
-    5: 'Mai', 6: 'Jun', 7: 'Jul', 8: 'Ago',
-    9: 'Set', 10: 'Out', 11: 'Nov', 12: 'Dez'
-}
-
 def formata_numero_br(valor, prefixo=""):
     """Formata números para o padrão brasileiro sem casas decimais: 1.250"""
     if pd.isna(valor) or valor is None: 
@@ -82,34 +89,29 @@ def formata_numero_br(valor, prefixo=""):
     valor_inteiro = int(round(valor))
     return f"{prefixo}{valor_inteiro:,}".replace(",", ".")
 
-def formata_mes_grafico(x):
-    try:
-        if pd.isna(x): return "Data Inválida"
-        mes_abrev = MESES_ABREV[x.month]
-        ano_curto = str(x.year)[-2:]
-        return f"{mes_abrev}.{ano_curto}"
-    except:
-        return f"{x.month}/{x.year}"
-
-def formata_mes_abrev_ano(x):
-    try:
-        if pd.isna(x): return ""
-        ano_curto = str(x.year)[-2:]
-        return f"{MESES_ABREV[x.month]}.{ano_curto}"
-    except:
-        return ""
+def formata_numeros_br(valores, prefixo=""):
+    """Mesmo resultado de formata_numero_br, aplicado ao array inteiro de uma vez."""
+    inteiros = np.rint(np.nan_to_num(np.asarray(valores, dtype=float), nan=0.0)).astype(np.int64)
+    if inteiros.size == 0:
+        return []
+    # Completa os dígitos até múltiplo de 3, quebra em blocos de 3 e intercala os pontos
+    digitos = np.abs(inteiros).astype(str)
+    largura = -(-int(np.char.str_len(digitos).max()) // 3) * 3
+    blocos = np.char.zfill(digitos, largura).view("U1").reshape(len(digitos), largura // 3, 3)
+    pontos = np.full(blocos.shape[:2] + (1,), ".")
+    chars = np.concatenate([blocos, pontos], axis=2).reshape(len(digitos), -1)[:, :-1]
+    texto = np.char.lstrip(np.ascontiguousarray(chars).view(f"U{chars.shape[1]}").ravel(), "0.")
+    texto = np.where(texto == "", "0", texto)
+    sinal = np.where(inteiros < 0, "-", "")
+    return np.char.add(np.char.add(prefixo, sinal), texto).tolist()
 
 def aplicar_estilo_grafico(fig, is_financeiro=False):
     prefixo = "R$ " if is_financeiro else ""
     try:
-        valores = []
-        for trace in fig.data:
-            if 'y' in trace and trace.y is not None:
-                y_vals = [v for v in trace.y if v is not None and not pd.isna(v)]
-                valores.extend(y_vals)
-        if valores:
-            max_y = max(valores)
-            fig.update_yaxes(range=[0, max_y * 1.35])
+        series_y = [np.asarray(trace.y, dtype=float) for trace in fig.data if 'y' in trace and trace.y is not None]
+        valores = np.concatenate(series_y) if series_y else np.array([])
+        if not np.isnan(valores).all():
+            fig.update_yaxes(range=[0, np.nanmax(valores) * 1.35])
     except:
         pass
 
@@ -124,10 +126,15 @@ def aplicar_estilo_grafico(fig, is_financeiro=False):
         autosize=True
     )
     
+    # Com muitos pontos os valores escritos não se leem e dominam o tamanho do JSON: ficam só no hover
+    escrever_valores = sum(len(trace.y) for trace in fig.data if getattr(trace, 'y', None) is not None) <= MAX_ROTULOS
     for trace in fig.data:
-        if hasattr(trace, 'y') and trace.y is not None:
-            textos_formatados = [formata_numero_br(v, prefixo) for v in trace.y]
-            trace.update(text=textos_formatados, texttemplate='<b>%{text}</b>')
+        if escrever_valores and hasattr(trace, 'y') and trace.y is not None:
+            trace.update(text=formata_numeros_br(trace.y, prefixo), texttemplate='<b>%{text}</b>')
+        elif not escrever_valores:
+            trace.update(text=None, texttemplate=None)
+            if trace.type == 'scatter':
+                trace.update(mode='lines')
             
         if trace.type == 'bar':
             trace.update(textposition='outside', cliponaxis=False)
@@ -136,132 +143,254 @@ def aplicar_estilo_grafico(fig, is_financeiro=False):
             
     return fig
 
-def exibir_comparativo_travado(df_raw, col_valor, titulo, prefixo=""):
+def exibir_comparativo_travado(somas, selecao, pesos, titulo, prefixo=""):
+    """Compara dois intervalos de datas no recorte `selecao`; os totais saem das somas acumuladas.
+
+    `pesos` ({medida: fator}) combina medidas: o custo é custo da tabela + bombonas sem preço x preço.
+    """
     st.markdown(f"###  {titulo}")
     
-    max_d = df_raw['data'].max()
+    with perfil.etapa("comparativo"):
+        max_d = somas.ultimo_dia(**selecao)
     ini2, fim2 = max_d - timedelta(days=6), max_d
     ini1, fim1 = ini2 - timedelta(days=7), ini2 - timedelta(days=1)
 
     c1, c2, c3 = st.columns([2, 2, 3])
     with c1:
-        d1 = st.date_input(f"Período 1 (Base) - {titulo[:3]}", [ini1.date(), fim1.date()], key=f"date1_{col_valor}")
+        d1 = st.date_input(f"Período 1 (Base) - {titulo[:3]}", [ini1.date(), fim1.date()], key=f"date1_{titulo}")
     with c2:
-        d2 = st.date_input(f"Período 2 (Atual) - {titulo[:3]}", [ini2.date(), fim2.date()], key=f"date2_{col_valor}")
+        d2 = st.date_input(f"Período 2 (Atual) - {titulo[:3]}", [ini2.date(), fim2.date()], key=f"date2_{titulo}")
 
     if len(d1) == 2 and len(d2) == 2:
-        v1 = df_raw[(df_raw['data'].dt.date >= d1[0]) & (df_raw['data'].dt.date <= d1[1])][col_valor].sum()
-        v2 = df_raw[(df_raw['data'].dt.date >= d2[0]) & (df_raw['data'].dt.date <= d2[1])][col_valor].sum()
-        
-        v1 = 0 if pd.isna(v1) else float(v1)
-        v2 = 0 if pd.isna(v2) else float(v2)
+        # Medidas derivadas (custo) são lineares nas medidas acumuladas: basta combinar as somas
+        with perfil.etapa("comparativo"):
+            v1 = sum(somas.soma(medida, d1[0], d1[1], **selecao) * fator for medida, fator in pesos.items())
+            v2 = sum(somas.soma(medida, d2[0], d2[1], **selecao) * fator for medida, fator in pesos.items())
         
         diff = v2 - v1
         perc = (diff / v1 * 100) if v1 != 0 else 0
 
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            x=["P1 (Anterior)", "P2 (Atual)"],
-            y=[v1, v2],
-            text=[formata_numero_br(v1, prefixo), formata_numero_br(v2, prefixo)],
-            marker_color=['#FFD700', '#1f618d'], 
-            width=0.4
-        ))
-        
-        fig.update_layout(
-            height=320,
-            title=f"Diferença: {formata_numero_br(diff, prefixo)} ({int(perc):+d}%)",
-            margin=dict(t=40, b=10)
-        )
-        st.plotly_chart(aplicar_estilo_grafico(fig, prefixo != ""), use_container_width=True)
+        def _figura():
+            fig = go.Figure()
+            fig.add_trace(go.Bar(
+                x=["P1 (Anterior)", "P2 (Atual)"],
+                y=[v1, v2],
+                text=[formata_numero_br(v1, prefixo), formata_numero_br(v2, prefixo)],
+                marker_color=['#FFD700', '#1f618d'], 
+                width=0.4
+            ))
+            
+            fig.update_layout(
+                height=320,
+                title=f"Diferença: {formata_numero_br(diff, prefixo)} ({int(perc):+d}%)",
+                margin=dict(t=40, b=10)
+            )
+            return fig
+        exibir_grafico(("comparativo", titulo, tuple(d1), tuple(d2)), _figura, prefixo != "")
+
+# --- CACHE DE FIGURAS ---
+class CacheFiguras:
+    """LRU de figuras já estilizadas, compartilhado entre sessões.
+
+    Uma figura pronta nunca é alterada depois (o st.plotly_chart só a serializa),
+    então a mesma instância pode ser reaproveitada por qualquer sessão.
+    """
+
+    def __init__(self, tamanho=256):
+        self._figuras = OrderedDict()
+        self._tamanho = tamanho
+        self._trava = threading.Lock()
+
+    def obter(self, chave, construir):
+        with self._trava:
+            if chave in self._figuras:
+                self._figuras.move_to_end(chave)
+                return self._figuras[chave]
+        fig = construir()
+        with self._trava:
+            self._figuras[chave] = fig
+            if len(self._figuras) > self._tamanho:
+                self._figuras.popitem(last=False)
+        return fig
+
+@st.cache_resource
+def obter_cache_figuras():
+    return CacheFiguras()
+
+@st.cache_resource
+def obter_memo_indicadores():
+    return MemoIndicadores()
+
+def exibir_grafico(id_grafico, construir, is_financeiro=False):
+    """Mostra a figura de `construir()` estilizada, memoizada por (gráfico, filtros, simulador, unidade/versão dos dados)."""
+    chave = (id_grafico, estado_filtros, parametros_simulador, unidade, versao_atual)
+    with perfil.etapa("figura", grafico=str(id_grafico)):
+        fig = obter_cache_figuras().obter(chave, lambda: tipar_arrays(aplicar_estilo_grafico(construir(), is_financeiro)))
+    with perfil.etapa("plotly_chart", grafico=str(id_grafico)):
+        st.plotly_chart(fig, use_container_width=True)
 
 # --- CARREGAMENTO ---
 BASE_DIR = Path(__file__).resolve().parent.parent
 ARQUIVO_DADOS = BASE_DIR / "dados" / "bombonas_v2.csv"
-
-@st.cache_data
-def carregar_dados_v2():
-    caminho = ARQUIVO_DADOS
-    if not caminho.exists(): caminho = Path("dados/bombonas_v2.csv")
-    if not caminho.exists(): return None
-
+ARQUIVO_PERFIL = Path(os.environ.get("BOMBONAS_PERFIL_ARQUIVO", BASE_DIR / "perfil" / "perfil.jsonl"))
+PASTA_DADOS = caminho_parquet(ARQUIVO_DADOS)
+INTERVALO_VERSAO = os.environ.get("BOMBONAS_INTERVALO_VERSAO", "30s")
+# Memória máxima dos dados carregados somando todas as unidades; as menos acessadas saem primeiro
+ORCAMENTO_MEMORIA = float(os.environ.get("BOMBONAS_ORCAMENTO_MB", "2048")) * 2**20
+
+def _caminho_dados(unidade=UNIDADE_PADRAO):
+    if unidade != UNIDADE_PADRAO: return caminho_unidade(BASE_DIR / "dados", unidade)
+    if ARQUIVO_DADOS.exists() or PASTA_DADOS.exists(): return ARQUIVO_DADOS
+    return Path("dados/bombonas_v2.csv")
+
+def _email_logado():
+    """E-mail do usuário logado (st.login), se a autenticação estiver configurada."""
     try:
-        df_base = pd.read_csv(caminho)
-        df_base.columns = df_base.columns.str.strip().str.lower()
-        df_base["data"] = pd.to_datetime(df_base["data"])
-        df_base["ano"] = df_base["data"].dt.year
-        df_base["mes_nome"] = df_base["data"].dt.month.map(MESES_PT)
-        df_base["mes_ano_ref"] = df_base["data"].apply(formata_mes_abrev_ano)
-
-        if "local" in df_base.columns: df_base["local"] = df_base["local"].astype(str).str.strip().str.upper()
-        if "grupo" in df_base.columns: 
-            df_base["grupo"] = df_base["grupo"].astype(str).str.strip().str.upper()
-            df_base = df_base[~df_base["grupo"].isin(["UM", "NAN", "NONE"])]
+        return st.user.email if st.user.is_logged_in else None
+    except Exception:
+        return None
+
+
+@st.cache_resource
+def obter_cache_unidades():
+    """Um snapshot por unidade, num LRU global por processo limitado por BOMBONAS_ORCAMENTO_MB."""
+    return CacheUnidades(ORCAMENTO_MEMORIA)
+
+@st.cache_resource(max_entries=4)
+def obter_indicadores(unidade, versao, parametros):
+    """Tabelas do indicadores.py para a unidade/versão/simulador atuais (None se não foram materializadas)."""
+    return carregar_indicadores(_caminho_dados(unidade), versao, parametros)
+
+@st.cache_resource(max_entries=4)
+def obter_base_consultas(unidade, versao, particoes):
+    """Banco da página de consultas SQL só com as partições (ano, mes) do filtro de período (None = todas)."""
+    return BaseConsultas(_caminho_dados(unidade), None if particoes is None else list(particoes), versao)
+
+# Unidade da sessão: a do login (dados/unidades.json), senão ?unidade= na URL, senão a padrão
+try:
+    unidade, unidade_travada = escolher_unidade(BASE_DIR / "dados", st.query_params.get("unidade"), _email_logado())
+    cache_unidades = obter_cache_unidades()
+    snapshot = cache_unidades.obter(unidade, lambda: novo_snapshot(_caminho_dados(unidade)))
+    with perfil.etapa("carregar_dados", unidade=unidade):
+        versao_atual, dados_atuais = snapshot.obter()
+    cache_unidades.registrar(unidade, 0 if dados_atuais is None else dados_atuais["nbytes"])
+except Exception as e:
+    st.error(f"Erro: {e}"); st.stop()
+
+if dados_atuais is None:
+    st.warning("⚠️ Dados não encontrados.")
+    st.stop()
 
-        df_base['mes_grafico'] = df_base['data'].apply(formata_mes_grafico)
-        return df_base
-    except Exception as e: st.error(f"Erro: {e}"); return None
+cubo, indices, somas = dados_atuais["cubo"], dados_atuais["indices"], dados_atuais["somas"]
+periodos = indices["mensal"].opcoes("periodo")
 
-df = carregar_dados_v2()
+@st.fragment(run_every=INTERVALO_VERSAO)
+def acompanhar_versao():
+    """Sem interação do usuário, confere a versão dos dados (o vigia.py publica) e refaz a página quando a troca termina."""
+    versao, _ = snapshot.obter()
+    if versao != versao_atual:
+        st.rerun(scope="app")
 
-if df is None or df.empty:
-    st.warning("⚠️ Dados não encontrados.")
-    st.stop()
+acompanhar_versao()
 
 # ==================================================
 # 4. BARRA LATERAL (FILTROS)
 # ==================================================
-with st.sidebar:
+with st.sidebar, perfil.etapa("barra_lateral"):
     if st.session_state.pagina_atual != 'Home':
         if st.button("🏠 Voltar ao Início", width='stretch'):
             ir_para("Home")
             st.rerun()
         st.markdown("---")
 
+    # Troca de unidade só aparece com mais de uma; o login fixa a unidade do usuário
+    if unidade_travada:
+        st.caption(f"🏥 Unidade: {unidade}")
+    else:
+        unidades_disponiveis = listar_unidades(BASE_DIR / "dados")
+        if len(unidades_disponiveis) > 1:
+            escolhida = st.selectbox("🏥 Unidade", unidades_disponiveis, index=unidades_disponiveis.index(unidade))
+            if escolhida != unidade:
+                st.query_params["unidade"] = escolhida
+                st.rerun()
+
     with st.expander("⚙️ Configurações / Simulador", expanded=False):
         st.caption("Ajuste os valores para simular cenários:")
-        META_PESO = st.number_input("Meta Peso (kg)", value=25.0, step=1.0)
-        PRECO_BASE = st.number_input("Preço Red 5% (R$)", value=95.0, step=1.0)
-        PRECO_ESTIMADO = st.number_input("Preço Base (R$)", value=101.0, step=1.0)
+        padrao = Parametros()
+        META_PESO = st.number_input("Meta Peso (kg)", value=padrao.meta_peso, step=1.0)
+        PRECO_BASE = st.number_input("Preço Red 5% (R$)", value=padrao.preco_base, step=1.0)
+        PRECO_ESTIMADO = st.number_input("Preço Base (R$)", value=padrao.preco_estimado, step=1.0)
     
     st.markdown("---")
     st.header("🔍 Filtros")
+    if snapshot.recarregando:
+        st.caption("🔄 Nova versão dos dados em carregamento; exibindo a anterior.")
+    elif snapshot.ultimo_erro is not None:
+        st.caption(f"⚠️ Falha ao recarregar os dados ({snapshot.ultimo_erro}); exibindo a versão anterior.")
     
-    opcoes_mes_ano = df.sort_values("data")["mes_ano_ref"].unique().tolist()
+    rotulo_mes = {p: rotulo_periodo(p.year, p.month) for p in periodos}
+    opcoes_mes_ano = list(dict.fromkeys(rotulo_mes.values()))
     filtro_mes_ano = st.multiselect("📅 Mês/Ano (Ex: Jan.25)", options=opcoes_mes_ano)
 
-    opcoes_ano = sorted(df["ano"].unique().tolist(), reverse=True)
+    opcoes_ano = sorted({p.year for p in periodos}, reverse=True)
     filtro_ano = st.multiselect("📅 Ano (Simples)", options=opcoes_ano)
     
-    df_temp = df.copy()
-    if filtro_mes_ano: df_temp = df_temp[df_temp["mes_ano_ref"].isin(filtro_mes_ano)]
-    if filtro_ano: df_temp = df_temp[df_temp["ano"].isin(filtro_ano)]
-
-    ordem_meses = [MESES_PT[i] for i in range(1, 13)]
-    meses_disponiveis = [m for m in ordem_meses if m in df_temp["mes_nome"].unique()]
+    # Mês/Ano e Ano viram um conjunto de meses; as opções em cascata saem do mesmo índice
+    periodos_sel = None
+    if filtro_mes_ano or filtro_ano:
+        periodos_sel = [
+            p for p in periodos
+            if (not filtro_mes_ano or rotulo_mes[p] in filtro_mes_ano) and (not filtro_ano or p.year in filtro_ano)
+        ]
+
+    meses_presentes = {p.month for p in indices["mensal"].opcoes("periodo", periodo=periodos_sel)}
+    meses_disponiveis = [MESES_PT[m] for m in sorted(meses_presentes)]
     filtro_mes = st.multiselect("🗓️ Mês (Simples)", options=meses_disponiveis)
 
-    opcoes_local = sorted(df_temp["local"].unique().tolist())
+    opcoes_local = indices["mensal"].opcoes("local", periodo=periodos_sel)
     filtro_local = st.multiselect("📍 Local", options=opcoes_local)
 
-    opcoes_grupo = sorted(df_temp["grupo"].unique().tolist())
+    opcoes_grupo = indices["mensal"].opcoes("grupo", periodo=periodos_sel)
     filtro_grupo = st.multiselect("📦 Grupo", options=opcoes_grupo)
 
-df_filtrado = df_temp.copy()
-if filtro_local: df_filtrado = df_filtrado[df_filtrado["local"].isin(filtro_local)]
-if filtro_grupo: df_filtrado = df_filtrado[df_filtrado["grupo"].isin(filtro_grupo)]
-if filtro_mes: df_filtrado = df_filtrado[df_filtrado["mes_nome"].isin(filtro_mes)]
+    if st.session_state.pagina_atual != 'Consultas':
+        st.markdown("---")
+        if st.button("🧮 Consultas SQL", width='stretch'):
+            ir_para("Consultas")
+            st.rerun()
+
+if filtro_mes:
+    periodos_sel = [p for p in (periodos if periodos_sel is None else periodos_sel) if MESES_PT[p.month] in filtro_mes]
 
-if df_filtrado.empty:
+selecao = dict(periodo=periodos_sel, local=filtro_local or None, grupo=filtro_grupo or None)
+# Chave das figuras em cache: o que foi filtrado e os valores do simulador
+estado_filtros = tuple((dim, None if vals is None else tuple(vals)) for dim, vals in selecao.items())
+parametros_simulador = Parametros(META_PESO, PRECO_BASE, PRECO_ESTIMADO)
+with perfil.etapa("filtros"):
+    df_mensal = indices["mensal"].selecionar(**selecao)
+
+if df_mensal.empty:
     st.info("Nenhum dado encontrado.")
     st.stop()
 
-# Cálculos Gerais
-total_bombonas = int(df_filtrado["bombonas"].sum())
-total_peso_real = df_filtrado["peso"].sum()
-peso_ideal_total = total_bombonas * META_PESO 
-diferenca_peso = total_peso_real - peso_ideal_total
-gasto_estimado = total_bombonas * PRECO_ESTIMADO
+# Home sem filtros (a primeira tela): cartões e gráfico vêm das tabelas materializadas, se houver
+materializado = None
+if st.session_state.pagina_atual == 'Home' and all(v is None for v in selecao.values()):
+    materializado = obter_indicadores(unidade, versao_atual, parametros_simulador)
+
+# Indicadores sob demanda (kpis.GRAFO): cada página pede só os seus, memoizados por filtros/simulador/versão.
+# Os valores são compartilhados entre sessões: as páginas copiam antes de acrescentar colunas.
+prontos = {}
+if materializado:
+    prontos = prontos_kpis(materializado, df_mensal)
+calc = Avaliacao(
+    GRAFO,
+    entradas={"mensal": df_mensal, "parametros": parametros_simulador},
+    chaves={"mensal": (estado_filtros, unidade, versao_atual), "parametros": parametros_simulador},
+    memo=obter_memo_indicadores(),
+    prontos=prontos,
+    etapa=lambda nome: perfil.etapa("agregacoes", indicador=nome),
+)
 
 # ==================================================
 # 5. PÁGINAS DO SISTEMA
@@ -269,177 +398,257 @@ gasto_estimado = total_bombonas * PRECO_ESTIMADO
 
 # --- HOME ---
 if st.session_state.pagina_atual == 'Home':
+    kpi = calc["resumo"]
     st.title("♻️ Painel Analise de Bombonas")
     st.markdown(f"**Cenário Atual:** Meta {int(META_PESO)}kg | Custo Est. R$ {int(PRECO_ESTIMADO)}")
     st.markdown("---")
 
     c1, c2, c3 = st.columns(3)
     with c1:
-        st.metric("TOTAL PESO", formata_numero_br(total_peso_real), delta=None)
+        st.metric("TOTAL PESO", formata_numero_br(kpi["total_peso_real"]), delta=None)
         if st.button("Acessar Peso", key="btn_peso"): ir_para("Peso"); st.rerun()
     with c2:
-        st.metric("UNIDADES", f"{int(total_bombonas)}")
+        st.metric("UNIDADES", f"{int(kpi['total_bombonas'])}")
         if st.button("Acessar Bombonas", key="btn_bomb"): ir_para("Bombonas"); st.rerun()
     with c3:
-        st.metric("CUSTO BASE", formata_numero_br(gasto_estimado, "R$ "))
+        st.metric("CUSTO BASE", formata_numero_br(kpi["gasto_estimado"], "R$ "))
         if st.button("Acessar Financeiro", key="btn_fin"): ir_para("Financeiro"); st.rerun()
 
     st.markdown("---")
     st.subheader(" Visão Geral")
-    resumo = df_filtrado.groupby(pd.Grouper(key="data", freq="ME"))["bombonas"].sum().reset_index()
-    resumo = resumo[resumo["bombonas"] > 0]
-    resumo["mes_str"] = resumo["data"].apply(formata_mes_grafico)
+    resumo_mes = calc["bombonas_mes"]
+    resumo_mes = resumo_mes[resumo_mes["bombonas"] > 0].copy()
+    resumo_mes["mes_str"] = mes_grafico(resumo_mes["data"])
     
-    fig = px.bar(resumo, x="mes_str", y="bombonas", text="bombonas", title="TOTAL DE BOMBONAS POR MÊS")
-    st.plotly_chart(aplicar_estilo_grafico(fig), use_container_width=True)
+    exibir_grafico("home_bombonas_mes", lambda: px.bar(resumo_mes, x="mes_str", y="bombonas", text="bombonas", title="TOTAL DE BOMBONAS POR MÊS"))
 
 # --- PESO ---
 elif st.session_state.pagina_atual == 'Peso':
+    kpi = calc["resumo"]
     st.title("⚖️ Análise de Peso")
     st.markdown("---")
 
     k1, k2, k3 = st.columns(3)
-    k1.metric("PESO REAL", formata_numero_br(total_peso_real))
-    k2.metric(f"META ({int(META_PESO)}KG)", formata_numero_br(peso_ideal_total))
-    k3.metric("DIFERENÇA", formata_numero_br(diferenca_peso), delta_color="inverse")
+    k1.metric("PESO REAL", formata_numero_br(kpi["total_peso_real"]))
+    k2.metric(f"META ({int(META_PESO)}KG)", formata_numero_br(kpi["peso_ideal_total"]))
+    k3.metric("DIFERENÇA", formata_numero_br(kpi["diferenca_peso"]), delta_color="inverse")
 
     st.markdown("---")
-    exibir_comparativo_travado(df_filtrado, "peso", "Comparativo de Peso")
+    exibir_comparativo_travado(somas, selecao, {"peso": 1}, "Comparativo de Peso")
     
+    # Um único real vs meta mensal alimenta os três blocos mensais da página
+    mensal_peso = calc["peso_mes"]
+
     st.markdown("---")
-    df_p_m_n = df_filtrado.groupby(pd.Grouper(key="data", freq="ME"))["peso"].sum().reset_index().sort_values("data")
-    df_p_m_n = df_p_m_n[df_p_m_n["peso"] > 0]
-    df_p_m_n["mes_fmt"] = df_p_m_n["data"].apply(formata_mes_abrev_ano)
+    df_p_m_n = mensal_peso.copy()
+    df_p_m_n["mes_fmt"] = mes_grafico(df_p_m_n["data"])
     media_p_ref = int(df_p_m_n["peso"].mean())
 
-    fig_p_n = go.Figure()
-    fig_p_n.add_trace(go.Scatter(x=df_p_m_n["mes_fmt"], y=df_p_m_n["peso"], mode='lines+markers+text', name='Real', line=dict(color='#1f618d', width=4)))
-    fig_p_n.add_trace(go.Scatter(x=df_p_m_n["mes_fmt"], y=[media_p_ref]*len(df_p_m_n), mode='lines', name=f'Média: {media_p_ref}', line=dict(color='orange', width=3, dash='dash')))
-    fig_p_n.update_layout(title="TOTAL PESO MÊS (Comparativo Real vs Média)")
-    st.plotly_chart(aplicar_estilo_grafico(fig_p_n), use_container_width=True)
+    def _fig_peso_media():
+        fig_p_n = go.Figure()
+        fig_p_n.add_trace(go.Scatter(x=df_p_m_n["mes_fmt"], y=df_p_m_n["peso"], mode='lines+markers+text', name='Real', line=dict(color='#1f618d', width=4)))
+        fig_p_n.add_trace(go.Scatter(x=df_p_m_n["mes_fmt"], y=[media_p_ref]*len(df_p_m_n), mode='lines', name=f'Média: {media_p_ref}', line=dict(color='orange', width=3, dash='dash')))
+        fig_p_n.update_layout(title="TOTAL PESO MÊS (Comparativo Real vs Média)")
+        return fig_p_n
+    exibir_grafico("peso_real_vs_media", _fig_peso_media)
 
     st.markdown("---")
     st.subheader("Comparativo Mensal (Real vs Meta)")
-    mensal = df_filtrado.groupby(pd.Grouper(key="data", freq="ME")).agg(peso_real=("peso", "sum"), qtd=("bombonas", "sum")).reset_index().sort_values("data")
-    mensal = mensal[mensal["peso_real"] > 0]
-    mensal["peso_ideal"] = mensal["qtd"] * META_PESO
-    mensal["mes_str"] = mensal["data"].apply(formata_mes_grafico)
+    mensal = mensal_peso.rename(columns={"peso": "peso_real", "bombonas": "qtd"})
+    mensal["mes_str"] = mes_grafico(mensal["data"])
 
-    # Criação do texto detalhado para a legenda da Meta
-    meta_labels = "<br>".join([f"{row['mes_str']}: {formata_numero_br(row['peso_ideal'])}" for _, row in mensal.iterrows()])
+    def _fig_peso_meta():
+        # Criação do texto detalhado para a legenda da Meta
+        meta_labels = "<br>".join(f"{mes}: {valor}" for mes, valor in zip(mensal["mes_str"], formata_numeros_br(mensal["peso_ideal"])))
 
-    fig_p = go.Figure()
-    fig_p.add_trace(go.Scatter(x=mensal["mes_str"], y=mensal["peso_real"], mode='lines+markers+text', name='Real', line=dict(color='#1f618d', width=4)))
-    fig_p.add_trace(go.Scatter(x=mensal["mes_str"], y=mensal["peso_ideal"], mode='lines', name=f'Meta:<br>{meta_labels}', line=dict(color='red', width=3, dash='dash')))
-    fig_p.update_layout(title="PESO REAL VS PESO META (MENSAL)")
-    st.plotly_chart(aplicar_estilo_grafico(fig_p), use_container_width=True)
+        fig_p = go.Figure()
+        fig_p.add_trace(go.Scatter(x=mensal["mes_str"], y=mensal["peso_real"], mode='lines+markers+text', name='Real', line=dict(color='#1f618d', width=4)))
+        fig_p.add_trace(go.Scatter(x=mensal["mes_str"], y=mensal["peso_ideal"], mode='lines', name=f'Meta:<br>{meta_labels}', line=dict(color='red', width=3, dash='dash')))
+        fig_p.update_layout(title="PESO REAL VS PESO META (MENSAL)")
+        return fig_p
+    exibir_grafico("peso_real_vs_meta", _fig_peso_meta)
 
     st.markdown("---")
     st.subheader("🔎 Detalhamento dos Indicadores")
-    df_p_a = df_filtrado.groupby(pd.Grouper(key="data", freq="ME")).agg(tp=("peso", "sum"), tb=("bombonas", "sum"), d=("data", "nunique")).reset_index().sort_values("data")
-    df_p_a = df_p_a[df_p_a["tp"] > 0]
-    df_p_a["mes_str"] = df_p_a["data"].apply(formata_mes_grafico)
-    df_p_a["media_p"] = df_p_a["tp"] / df_p_a["d"]
-    df_p_a["dif_m"] = df_p_a["tp"] - (df_p_a["tb"] * META_PESO)
-    df_p_a["dif_d"] = df_p_a["dif_m"] / df_p_a["d"]
+    df_p_a = mensal_peso.rename(columns={"peso": "tp", "media_peso_dia": "media_p", "dif_mes": "dif_m", "dif_dia": "dif_d"})
+    df_p_a["mes_str"] = mes_grafico(df_p_a["data"])
 
     c1, c2 = st.columns(2)
-    with c1: st.plotly_chart(aplicar_estilo_grafico(px.bar(df_p_a, x="mes_str", y="tp", title="TOTAL PESO MÊS", color_discrete_sequence=["#FFC300"])), use_container_width=True)
-    with c2: st.plotly_chart(aplicar_estilo_grafico(px.bar(df_p_a, x="mes_str", y="media_p", title="MÉDIA PESO DIA", color_discrete_sequence=["#FFC300"])), use_container_width=True)
+    with c1: exibir_grafico("peso_total_mes", lambda: px.bar(df_p_a, x="mes_str", y="tp", title="TOTAL PESO MÊS", color_discrete_sequence=["#FFC300"]))
+    with c2: exibir_grafico("peso_media_dia", lambda: px.bar(df_p_a, x="mes_str", y="media_p", title="MÉDIA PESO DIA", color_discrete_sequence=["#FFC300"]))
 
     c3, c4 = st.columns(2)
-    with c3: st.plotly_chart(aplicar_estilo_grafico(px.bar(df_p_a, x="mes_str", y="dif_m", title="DIF. REAL VS IDEAL (MÊS)", color_discrete_sequence=["#FFC300"])), use_container_width=True)
-    with c4: st.plotly_chart(aplicar_estilo_grafico(px.bar(df_p_a, x="mes_str", y="dif_d", title="DIF. REAL VS IDEAL (DIA)", color_discrete_sequence=["#FFC300"])), use_container_width=True)
+    with c3: exibir_grafico("peso_dif_mes", lambda: px.bar(df_p_a, x="mes_str", y="dif_m", title="DIF. REAL VS IDEAL (MÊS)", color_discrete_sequence=["#FFC300"]))
+    with c4: exibir_grafico("peso_dif_dia", lambda: px.bar(df_p_a, x="mes_str", y="dif_d", title="DIF. REAL VS IDEAL (DIA)", color_discrete_sequence=["#FFC300"]))
 
     st.markdown("---")
     st.subheader(" Distribuição de Peso")
     col_g, col_l = st.columns(2)
     with col_g:
-        p_g = df_filtrado.groupby("grupo")["peso"].sum().reset_index().sort_values("peso", ascending=False)
-        st.plotly_chart(aplicar_estilo_grafico(px.bar(p_g, x="grupo", y="peso", title="PESO POR GRUPO", color_discrete_sequence=["#FF9F1C"])), use_container_width=True)
+        p_g = calc["totais_grupo"].sort_values("peso", ascending=False)
+        exibir_grafico("peso_por_grupo", lambda: px.bar(p_g, x="grupo", y="peso", title="PESO POR GRUPO", color_discrete_sequence=["#FF9F1C"]))
     with col_l:
-        p_l = df_filtrado.groupby("local")["peso"].sum().reset_index().sort_values("peso", ascending=False).head(10)
-        st.plotly_chart(aplicar_estilo_grafico(px.bar(p_l, x="local", y="peso", title="PESO POR LOCAL", color_discrete_sequence=["#2A9D8F"])), use_container_width=True)
+        p_l = calc["totais_local"].sort_values("peso", ascending=False).head(10)
+        exibir_grafico("peso_por_local", lambda: px.bar(p_l, x="local", y="peso", title="PESO POR LOCAL", color_discrete_sequence=["#2A9D8F"]))
+
+    st.markdown("---")
+    st.subheader("🎚️ Sensibilidade à Meta de Peso")
+    # Toda a grade de metas sai de uma passada só (cenarios.py); o simulador só move a linha da meta atual
+    sens_meta = calc["sensibilidade_meta"]
+
+    def _fig_sens_meta():
+        fig_s = go.Figure()
+        fig_s.add_trace(go.Scatter(x=sens_meta["meta_peso"], y=sens_meta["peso_ideal"], mode='lines+markers', name='Peso Meta', line=dict(color='red', width=3)))
+        fig_s.add_trace(go.Scatter(x=sens_meta["meta_peso"], y=[kpi["total_peso_real"]] * len(sens_meta), mode='lines', name='Peso Real', line=dict(color='#1f618d', width=3, dash='dash')))
+        fig_s.add_vline(x=META_PESO, line_dash="dot", line_color="gray", annotation_text=f"Meta atual: {META_PESO:g} kg")
+        fig_s.update_layout(title="PESO META TOTAL POR META (KG/BOMBONA)")
+        return fig_s
+    exibir_grafico("peso_sensibilidade_meta", _fig_sens_meta)
 
 # --- BOMBONAS ---
 elif st.session_state.pagina_atual == 'Bombonas':
+    kpi = calc["resumo"]
     st.title("🛢️ Análise de Bombonas")
     st.markdown("---")
 
     k1, k2 = st.columns(2)
-    k1.metric("TOTAL BOMBONAS", int(total_bombonas))
-    k2.metric("MÉDIA/DIA", int(total_bombonas / df_filtrado['data'].nunique()) if df_filtrado['data'].nunique() > 0 else 0)
+    k1.metric("TOTAL BOMBONAS", int(kpi["total_bombonas"]))
+    k2.metric("MÉDIA/DIA", kpi["media_bombonas_dia"])
 
     st.markdown("---")
-    exibir_comparativo_travado(df_filtrado, "bombonas", "Comparativo de Bombonas")
+    exibir_comparativo_travado(somas, selecao, {"bombonas": 1}, "Comparativo de Bombonas")
+
+    # Meses sem movimento entram zerados, como fazia o pd.Grouper
+    mensal_bomb = calc["bombonas_mes"]
 
     st.markdown("---")
-    df_n_c = df_filtrado.groupby(pd.Grouper(key="data", freq="ME"))["bombonas"].sum().reset_index().sort_values("data")
-    df_n_c = df_n_c[df_n_c["bombonas"] > 0]
-    df_n_c["mes_fmt"] = df_n_c["data"].apply(formata_mes_abrev_ano)
+    df_n_c = mensal_bomb[mensal_bomb["bombonas"] > 0].copy()
+    df_n_c["mes_fmt"] = mes_grafico(df_n_c["data"])
     media_b_ref = int(df_n_c["bombonas"].mean())
 
-    fig_n = go.Figure()
-    fig_n.add_trace(go.Scatter(x=df_n_c["mes_fmt"], y=df_n_c["bombonas"], mode='lines+markers+text', name='Total'))
-    fig_n.add_trace(go.Scatter(x=df_n_c["mes_fmt"], y=[media_b_ref]*len(df_n_c), mode='lines', name=f'Média: {media_b_ref}', line=dict(dash='dash', color='orange', width=3)))
-    fig_n.update_layout(title="EVOLUÇÃO QTD BOMBONAS")
-    st.plotly_chart(aplicar_estilo_grafico(fig_n), use_container_width=True)
+    def _fig_evolucao():
+        fig_n = go.Figure()
+        fig_n.add_trace(go.Scatter(x=df_n_c["mes_fmt"], y=df_n_c["bombonas"], mode='lines+markers+text', name='Total'))
+        fig_n.add_trace(go.Scatter(x=df_n_c["mes_fmt"], y=[media_b_ref]*len(df_n_c), mode='lines', name=f'Média: {media_b_ref}', line=dict(dash='dash', color='orange', width=3)))
+        fig_n.update_layout(title="EVOLUÇÃO QTD BOMBONAS")
+        return fig_n
+    exibir_grafico("bombonas_evolucao", _fig_evolucao)
 
     st.markdown("---")
-    df_e_b = df_filtrado.groupby(pd.Grouper(key="data", freq="ME"))["bombonas"].sum().reset_index().sort_values("data")
-    df_e_b["mes_str"] = df_e_b["data"].apply(formata_mes_grafico)
-    st.plotly_chart(aplicar_estilo_grafico(px.bar(df_e_b, x="mes_str", y="bombonas", title="TOTAL BOMBONAS MÊS", color_discrete_sequence=["#1f618d"])), use_container_width=True)
+    df_e_b = mensal_bomb.copy()
+    df_e_b["mes_str"] = mes_grafico(df_e_b["data"])
+    exibir_grafico("bombonas_total_mes", lambda: px.bar(df_e_b, x="mes_str", y="bombonas", title="TOTAL BOMBONAS MÊS", color_discrete_sequence=["#1f618d"]))
+
+    # Intervalo visível do recorte em resolução adaptativa: por dia, semana ou mês conforme a extensão
+    with perfil.etapa("agregacoes", indicador="serie_bombonas"):
+        serie_b, freq_b = serie_adaptativa(somas, "bombonas", selecao)
+    if serie_b is not None:
+        exibir_grafico("bombonas_serie", lambda: px.bar(serie_b, x="rotulo", y="bombonas", title=f"BOMBONAS POR {NOMES_FREQUENCIA[freq_b].upper()} NO PERÍODO", color_discrete_sequence=["#1f618d"]))
 
     st.markdown("---")
     c1, c2 = st.columns(2)
-    with c1: st.plotly_chart(aplicar_estilo_grafico(px.bar(df_filtrado.groupby("grupo")["bombonas"].sum().reset_index(), x="grupo", y="bombonas", title="POR GRUPO", color_discrete_sequence=["#FF9F1C"])), use_container_width=True)
-    with c2: st.plotly_chart(aplicar_estilo_grafico(px.bar(df_filtrado.groupby("local")["bombonas"].sum().reset_index().nlargest(10, "bombonas"), x="local", y="bombonas", title="POR LOCAL", color_discrete_sequence=["#2A9D8F"])), use_container_width=True)
+    with c1: exibir_grafico("bombonas_por_grupo", lambda: px.bar(calc["totais_grupo"], x="grupo", y="bombonas", title="POR GRUPO", color_discrete_sequence=["#FF9F1C"]))
+    with c2: exibir_grafico("bombonas_por_local", lambda: px.bar(calc["totais_local"].nlargest(10, "bombonas"), x="local", y="bombonas", title="POR LOCAL", color_discrete_sequence=["#2A9D8F"]))
     
     st.markdown("---")
     st.subheader("📈 Média de Bombonas por Dia (Evolução por Local)")
-    df_m_e = df_filtrado.groupby([pd.Grouper(key="data", freq="ME"), "local"]).agg(tb=("bombonas", "sum"), d=("data", "nunique")).reset_index()
-    df_m_e["media_dia"] = df_m_e["tb"] / df_m_e["d"]
-    df_m_e["mes_str"] = df_m_e["data"].apply(formata_mes_grafico)
-    fig_l_evol = px.line(df_m_e.sort_values("data"), x="mes_str", y="media_dia", color="local", text="media_dia", title="MÉDIA DIÁRIA POR LOCAL")
-    st.plotly_chart(aplicar_estilo_grafico(fig_l_evol), use_container_width=True)
+    def _fig_media_local():
+        df_m_e = calc["media_local"].copy()
+        df_m_e["mes_str"] = mes_grafico(df_m_e["data"])
+        return px.line(df_m_e, x="mes_str", y="media_dia", color="local", text="media_dia", title="MÉDIA DIÁRIA POR LOCAL")
+    exibir_grafico("bombonas_media_local", _fig_media_local)
 
 # --- FINANCEIRO ---
 elif st.session_state.pagina_atual == 'Financeiro':
+    kpi = calc["resumo"]
     st.title("💰 Financeiro")
+    if "bombonas_sem_preco" in df_mensal.columns:
+        st.caption(f"💲 Custos pela tabela de preços ({caminho_precos(_caminho_dados(unidade)).name}); "
+                   "os preços do simulador valem só onde a tabela não tem preço vigente.")
     st.markdown("---")
 
     f1, f2 = st.columns(2)
-    f1.metric("CUSTO RED 5%", formata_numero_br(total_bombonas * PRECO_BASE, "R$ "))
-    f2.metric("CUSTO BASE", formata_numero_br(gasto_estimado, "R$ "))
+    f1.metric("CUSTO RED 5%", formata_numero_br(kpi["custo_red"], "R$ "))
+    f2.metric("CUSTO BASE", formata_numero_br(kpi["gasto_estimado"], "R$ "))
 
     st.markdown("---")
     
-    # === AQUI ESTÁ O AJUSTE ===
-    # Criamos uma cópia do DataFrame base e calculamos o valor financeiro real
-    df_financeiro = df_filtrado.copy()
-    df_financeiro["custo_total_estimado"] = df_financeiro["bombonas"] * PRECO_ESTIMADO
-
-    # Passamos a nova coluna calculada para o gráfico comparativo
-    exibir_comparativo_travado(df_financeiro, "custo_total_estimado", "Comparativo Financeiro", prefixo="R$ ")
-    # ==========================
+    # Custo estimado = bombonas x PRECO_ESTIMADO, comparado direto sobre as somas de bombonas
+    exibir_comparativo_travado(somas, selecao, pesos_custo(somas.medidas, PRECO_ESTIMADO), "Comparativo Financeiro", prefixo="R$ ")
 
     st.markdown("---")
     st.subheader("Custo Mensal Mes a Mes")
-    fin_m = df_filtrado.groupby(pd.Grouper(key="data", freq="ME"))["bombonas"].sum().reset_index()
-    fin_m = fin_m[fin_m["bombonas"] > 0]
-    fin_m["custo"] = fin_m["bombonas"] * PRECO_ESTIMADO
-    fin_m["mes_str"] = fin_m["data"].apply(formata_mes_grafico)
-    fig_f = px.bar(fin_m, x="mes_str", y="custo", title="CUSTO MENSAL BASE", color_discrete_sequence=["#2ca02c"])
-    st.plotly_chart(aplicar_estilo_grafico(fig_f, is_financeiro=True), use_container_width=True)
+    fin_m = calc["custo_mes"].copy()
+    fin_m["mes_str"] = mes_grafico(fin_m["data"])
+    exibir_grafico("financeiro_custo_mes", lambda: px.bar(fin_m, x="mes_str", y="custo", title="CUSTO MENSAL BASE", color_discrete_sequence=["#2ca02c"]), is_financeiro=True)
 
     st.markdown("---")
     st.subheader(" Custo por Local")
     c1, c2 = st.columns(2)
     with c1:
-        fin_g = df_filtrado.groupby("grupo")["bombonas"].sum().reset_index()
-        fin_g["custo_g"] = fin_g["bombonas"] * PRECO_ESTIMADO
-        st.plotly_chart(aplicar_estilo_grafico(px.bar(fin_g.sort_values("custo_g", ascending=False), x="grupo", y="custo_g", title="CUSTO POR GRUPO", color_discrete_sequence=["#E67E22"]), is_financeiro=True), use_container_width=True)
+        fin_g = calc["totais_grupo"].rename(columns={"custo": "custo_g"})
+        exibir_grafico("financeiro_por_grupo", lambda: px.bar(fin_g.sort_values("custo_g", ascending=False), x="grupo", y="custo_g", title="CUSTO POR GRUPO", color_discrete_sequence=["#E67E22"]), is_financeiro=True)
     with c2:
-        fin_l = df_filtrado.groupby("local")["bombonas"].sum().reset_index()
-        fin_l["custo_l"] = fin_l["bombonas"] * PRECO_ESTIMADO
-        st.plotly_chart(aplicar_estilo_grafico(px.bar(fin_l.nlargest(10, "custo_l"), x="local", y="custo_l", title="CUSTO POR LOCAL", color_discrete_sequence=["#27AE60"]), is_financeiro=True), use_container_width=True)
\ No newline at end of file
+        fin_l = calc["totais_local"].rename(columns={"custo": "custo_l"})
+        exibir_grafico("financeiro_por_local", lambda: px.bar(fin_l.nlargest(10, "custo_l"), x="local", y="custo_l", title="CUSTO POR LOCAL", color_discrete_sequence=["#27AE60"]), is_financeiro=True)
+
+    st.markdown("---")
+    st.subheader("🎚️ Sensibilidade ao Preço")
+    sens_preco = calc["sensibilidade_preco"]
+
+    def _fig_sens_preco():
+        fig_s = go.Figure()
+        fig_s.add_trace(go.Scatter(x=sens_preco["preco_estimado"], y=sens_preco["custo"], mode='lines+markers', name='Custo Total', line=dict(color='#2ca02c', width=3)))
+        if "bombonas_sem_preco" in df_mensal.columns:
+            # Com tabela de preços o custo reduzido usa outros valores da tabela: curva própria
+            fig_s.add_trace(go.Scatter(x=sens_preco["preco_estimado"], y=sens_preco["custo_red"], mode='lines', name='Custo Red', line=dict(color='orange', width=2, dash='dash')))
+        fig_s.add_vline(x=PRECO_ESTIMADO, line_dash="dot", line_color="gray", annotation_text=f"Preço Base: R$ {PRECO_ESTIMADO:g}")
+        fig_s.add_vline(x=PRECO_BASE, line_dash="dot", line_color="orange", annotation_text=f"Red 5%: R$ {PRECO_BASE:g}", annotation_position="bottom right")
+        fig_s.update_layout(title="CUSTO TOTAL POR PREÇO DA BOMBONA")
+        return fig_s
+    exibir_grafico("financeiro_sensibilidade_preco", _fig_sens_preco, is_financeiro=True)
+
+# --- CONSULTAS SQL ---
+elif st.session_state.pagina_atual == 'Consultas':
+    st.title("🧮 Consultas SQL")
+    # O filtro de período vira partições: só os meses escolhidos são lidos do Parquet
+    particoes_sql = None if periodos_sel is None else tuple(sorted({(p.year, p.month) for p in periodos_sel}))
+    with perfil.etapa("consulta_carga"):
+        base_sql = obter_base_consultas(unidade, versao_atual, particoes_sql)
+    lidos = "todos os meses" if particoes_sql is None else f"{len(particoes_sql)} mês(es) do filtro de período"
+    st.caption(f"Motor {base_sql.motor}: {lidos} carregado(s) em {base_sql.tempo_carga:.2f}s. "
+               "Local e grupo da barra lateral não se aplicam aqui: use WHERE na consulta.")
+    with st.expander("📋 Tabelas disponíveis", expanded=False):
+        for nome, colunas in base_sql.tabelas.items():
+            st.markdown(f"**{nome}**: {', '.join(colunas)}")
+
+    with st.form("form_sql"):
+        sql = st.text_area("Consulta (só leitura)", value=CONSULTA_EXEMPLO.format(meta=META_PESO), height=220)
+        executar = st.form_submit_button("▶️ Executar")
+    if executar:
+        try:
+            with perfil.etapa("consulta"):
+                st.session_state.resultado_sql = base_sql.consultar(sql)
+        except Exception as e:
+            st.session_state.resultado_sql = None
+            st.error(f"Erro na consulta: {e}")
+
+    resultado_sql = st.session_state.get("resultado_sql")
+    if resultado_sql is not None:
+        limite = f" (limite de {LIMITE_LINHAS:,})" if len(resultado_sql) >= LIMITE_LINHAS else ""
+        st.caption(f"{len(resultado_sql)} linha(s){limite}")
+        st.dataframe(resultado_sql, hide_index=True, width='stretch')
+        st.download_button("⬇️ Baixar CSV", resultado_sql.to_csv(index=False), file_name="consulta.csv", mime="text/csv")
+# ==================================================
+# 6. PERFIL DO RERUN (OPCIONAL)
+# ==================================================
+if perfil.ativo:
+    perfil.gravar_jsonl(ARQUIVO_PERFIL)
+    with st.sidebar:
+        st.markdown("---")
+        with st.expander("⏱️ Perfil deste rerun", expanded=True):
+            st.caption(f"Página **{perfil.pagina}**: {perfil.total_ms():,.0f} ms no total")
+            st.dataframe(pd.DataFrame(perfil.resumo()), hide_index=True, width='stretch')
+            st.download_button("⬇️ Chrome trace (JSON)", json.dumps(chrome_trace(perfil.eventos)),
+                               file_name=f"perfil_{perfil.rerun}.json", mime="application/json")
+            st.caption(f"Histórico em JSON lines: {ARQUIVO_PERFIL}")
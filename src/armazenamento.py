@@ -0,0 +1,189 @@
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PASTA_PARQUET = BASE_DIR / "dados" / "bombonas_v2.parquet"
+
+COLUNAS_LONGAS = ["data", "local", "grupo", "bombonas", "peso"]
+
+# Esquema fixo: data nativa, local/grupo com dicionário e bombonas inteiro.
+# "ano" e "mes" só existem nos nomes das pastas (ano=2025/mes=1).
+ESQUEMA = pa.schema([
+    ("data", pa.date32()),
+    ("local", pa.dictionary(pa.int32(), pa.string())),
+    ("grupo", pa.dictionary(pa.int8(), pa.string())),
+    ("bombonas", pa.int32()),
+    ("peso", pa.float64()),
+])
+PARTICIONAMENTO = ds.partitioning(pa.schema([("ano", pa.int16()), ("mes", pa.int8())]), flavor="hive")
+
+
+def caminho_parquet(caminho_csv):
+    return Path(caminho_csv).with_suffix(".parquet")
+
+
+def caminho_temporario(caminho):
+    """Arquivo/pasta ao lado de `caminho` onde a versão nova é escrita antes de trocar de lugar."""
+    caminho = Path(caminho)
+    return caminho.with_name(f".{caminho.name}.{os.getpid()}.tmp")
+
+
+def trocar_pasta(temporaria, destino):
+    """Põe a pasta `temporaria`, já completa, no lugar de `destino`.
+
+    A pasta antiga só sai depois de a nova estar inteira no disco; quem ler no instante entre os
+    dois renames não acha Parquet e cai no CSV, como numa base que ainda não tem Parquet.
+    """
+    destino = Path(destino)
+    antiga = destino.with_name(f".{destino.name}.{os.getpid()}.antiga")
+    shutil.rmtree(antiga, ignore_errors=True)
+    if destino.exists():
+        os.replace(destino, antiga)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(temporaria, destino)
+    shutil.rmtree(antiga, ignore_errors=True)
+
+
+def gravar_csv(df, caminho):
+    """Grava o CSV num temporário e troca de uma vez: uma falha no meio deixa o arquivo anterior inteiro."""
+    temporario = caminho_temporario(caminho)
+    try:
+        df.to_csv(temporario, index=False)
+        os.replace(temporario, caminho)
+    finally:
+        temporario.unlink(missing_ok=True)
+
+
+def _para_tabela(df):
+    datas = pd.to_datetime(df["data"])
+    tabela = pa.Table.from_pandas(pd.DataFrame({
+        "data": datas.dt.date,
+        "local": df["local"].astype("category"),
+        "grupo": df["grupo"].astype("category"),
+        "bombonas": df["bombonas"].round().astype("int32"),
+        "peso": df["peso"].astype("float64"),
+    }), schema=ESQUEMA, preserve_index=False)
+    return (tabela
+            .append_column("ano", pa.array(datas.dt.year.to_numpy(), pa.int16()))
+            .append_column("mes", pa.array(datas.dt.month.to_numpy(), pa.int8())))
+
+
+def salvar_parquet(df, destino=PASTA_PARQUET, particoes=None):
+    """Grava o formato longo particionado por ano/mês.
+
+    Com `particoes` (conjunto de (ano, mes)) só essas pastas são regravadas, inclusive
+    as que ficaram vazias; sem ele a pasta inteira é recriada. Tudo é escrito numa pasta
+    temporária ao lado e só depois trocado: se a gravação falhar, o dataset anterior fica.
+    """
+    destino = Path(destino)
+    temporaria = caminho_temporario(destino)
+    try:
+        _escrever_dataset(df, temporaria)
+        if particoes is None:
+            trocar_pasta(temporaria, destino)
+            return
+        for ano, mes in particoes:
+            particao = Path(f"ano={ano}") / f"mes={mes}"
+            if (temporaria / particao).is_dir():
+                trocar_pasta(temporaria / particao, destino / particao)
+            else:  # partição que ficou vazia
+                shutil.rmtree(destino / particao, ignore_errors=True)
+    finally:
+        shutil.rmtree(temporaria, ignore_errors=True)
+
+
+def _escrever_dataset(df, pasta):
+    shutil.rmtree(pasta, ignore_errors=True)
+    pasta.mkdir(parents=True)  # existe mesmo sem linhas: a base vazia também é trocada
+    ds.write_dataset(
+        _para_tabela(df), pasta, format="parquet", partitioning=PARTICIONAMENTO,
+        existing_data_behavior="delete_matching", basename_template="parte-{i}.parquet",
+    )
+
+
+def salvar_base(df, caminho_csv):
+    """Grava a base inteira (Parquet particionado + CSV exportado) em temporários e só então troca os dois.
+
+    Uma falha durante a gravação deixa o Parquet e o CSV anteriores intactos.
+    """
+    pasta, csv = caminho_temporario(caminho_parquet(caminho_csv)), caminho_temporario(caminho_csv)
+    try:
+        _escrever_dataset(df, pasta)
+        df.to_csv(csv, index=False)
+        trocar_pasta(pasta, caminho_parquet(caminho_csv))
+        os.replace(csv, caminho_csv)
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+        csv.unlink(missing_ok=True)
+
+
+def acrescentar_parquet(df, destino, bloco):
+    """Acrescenta um bloco do ETL em streaming sem mexer nos arquivos já gravados.
+
+    O número do bloco entra no nome do arquivo, então a leitura segue a ordem de gravação.
+    """
+    if df.empty:
+        return
+    ds.write_dataset(
+        _para_tabela(df), destino, format="parquet", partitioning=PARTICIONAMENTO,
+        existing_data_behavior="overwrite_or_ignore", basename_template=f"parte-{bloco:05d}-{{i}}.parquet",
+    )
+
+
+def particoes_disponiveis(destino=PASTA_PARQUET):
+    """Lista (ano, mes) existentes só pelos nomes das pastas, sem abrir nenhum arquivo."""
+    particoes = []
+    for pasta in Path(destino).glob("ano=*/mes=*"):
+        if any(pasta.glob("*.parquet")):
+            particoes.append((int(pasta.parent.name[4:]), int(pasta.name[4:])))
+    return sorted(particoes)
+
+
+def carregar_longo(caminho_csv, colunas=None, particoes=None):
+    """Carrega o formato longo do Parquet ao lado do CSV; sem ele, lê e normaliza o CSV exportado."""
+    pasta = caminho_parquet(caminho_csv)
+    if particoes_disponiveis(pasta):
+        # Parquet já vem tipado e normalizado pelo ETL: só lê as partições/colunas pedidas
+        df_base = ler_parquet(pasta, colunas=colunas, particoes=particoes)
+        return df_base[~df_base["grupo"].isin(["UM", "NAN", "NONE"])]
+
+    caminho_csv = Path(caminho_csv)
+    if not caminho_csv.exists():
+        return None
+
+    df_base = pd.read_csv(caminho_csv, usecols=lambda c: colunas is None or c.strip().lower() in colunas)
+    df_base.columns = df_base.columns.str.strip().str.lower()
+    df_base["data"] = pd.to_datetime(df_base["data"])
+    if particoes is not None:
+        chave = df_base["data"].dt.year * 100 + df_base["data"].dt.month
+        df_base = df_base[chave.isin([ano * 100 + mes for ano, mes in particoes])]
+
+    if "local" in df_base.columns: df_base["local"] = df_base["local"].astype(str).str.strip().str.upper()
+    if "grupo" in df_base.columns:
+        df_base["grupo"] = df_base["grupo"].astype(str).str.strip().str.upper()
+        df_base = df_base[~df_base["grupo"].isin(["UM", "NAN", "NONE"])]
+    return df_base
+
+
+def ler_parquet(destino=PASTA_PARQUET, colunas=None, anos=None, particoes=None):
+    """Lê só as colunas e partições pedidas. `particoes` é uma lista de (ano, mes)."""
+    dataset = ds.dataset(destino, format="parquet", partitioning=PARTICIONAMENTO)
+    filtro = None
+    if anos:
+        filtro = ds.field("ano").isin(list(anos))
+    if particoes is not None:
+        por_particao = ds.scalar(False)
+        for ano, mes in particoes:
+            por_particao = por_particao | ((ds.field("ano") == ano) & (ds.field("mes") == mes))
+        filtro = por_particao if filtro is None else filtro & por_particao
+
+    tabela = dataset.to_table(columns=colunas or COLUNAS_LONGAS, filter=filtro)
+    df = tabela.to_pandas(date_as_object=False)
+    if "data" in df.columns:
+        df = df.sort_values("data", kind="stable").reset_index(drop=True)
+    return df
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from cubo import medidas, rollup_mensal
+from precos import custo, custo_red
+
+# Motor de cenários: avalia uma grade inteira de parâmetros do simulador numa passada vetorizada
+# sobre os totais mensais (matriz meses x cenários), sem recalcular nada que não dependa deles.
+METAS_PADRAO = np.arange(20.0, 30.5, 0.5)
+PRECOS_PADRAO = np.arange(80.0, 121.0, 1.0)
+CAMPOS = ("meta_peso", "preco_base", "preco_estimado")  # os mesmos de kpis.Parametros
+
+
+def grade(meta_peso=None, preco_base=None, preco_estimado=None, base=(0.0, 0.0, 0.0)):
+    """Produto cartesiano dos valores pedidos; o parâmetro omitido fica no valor de `base` (um Parametros)."""
+    valores = [np.atleast_1d(v if v is not None else padrao).astype("float64")
+               for v, padrao in zip((meta_peso, preco_base, preco_estimado), base)]
+    malha = np.meshgrid(*valores, indexing="ij")
+    return pd.DataFrame({campo: eixo.ravel() for campo, eixo in zip(CAMPOS, malha)})
+
+
+def avaliar(mensal, cenarios):
+    """Totais por cenário (uma linha por linha de `cenarios`): peso meta, diferença de peso e custos."""
+    meses = rollup_mensal(mensal)
+    # Colunas como vetores meses x 1: as contas abaixo viram matrizes meses x cenários por broadcasting
+    colunas = {m: meses[m].to_numpy(dtype="float64")[:, None] for m in medidas(meses)}
+    parametro = {campo: cenarios[campo].to_numpy(dtype="float64")[None, :] for campo in CAMPOS}
+
+    peso_ideal = colunas["bombonas"] * parametro["meta_peso"]
+    matrizes = {
+        "peso_ideal": peso_ideal,
+        "dif_peso": colunas["peso"] - peso_ideal,
+        "custo": custo(colunas, parametro["preco_estimado"]),
+        "custo_red": custo_red(colunas, parametro["preco_base"]),
+    }
+    totais = cenarios.copy()
+    for nome, matriz in matrizes.items():
+        totais[nome] = matriz.sum(axis=0)
+    return totais
+
+
+def sensibilidade_meta(mensal, metas=METAS_PADRAO):
+    """Diferença total de peso (real - meta) para cada meta de peso da grade."""
+    totais = avaliar(mensal, grade(meta_peso=metas))
+    return totais[["meta_peso", "peso_ideal", "dif_peso"]]
+
+
+def sensibilidade_preco(mensal, precos=PRECOS_PADRAO):
+    """Custo total para cada preço por bombona da grade, como preço estimado (`custo`) e como base (`custo_red`).
+
+    Sem tabela de preços as duas curvas coincidem; com ela, cada uma soma os custos da tabela que
+    lhe cabem e o preço da grade só entra nas bombonas sem preço.
+    """
+    cenarios = grade(preco_estimado=precos).assign(preco_base=lambda df: df["preco_estimado"])
+    totais = avaliar(mensal, cenarios)
+    return totais[["preco_estimado", "custo", "custo_red"]]
@@ -0,0 +1,222 @@
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+from armazenamento import PARTICIONAMENTO, caminho_parquet, carregar_longo, particoes_disponiveis
+from indicadores import ARQUIVO_DADOS, carregar_indicadores
+from precos import caminho_precos, versao_com_precos
+from versionamento import versao_dados
+
+try:
+    import duckdb
+except ImportError:  # sem DuckDB as consultas rodam no SQLite da biblioteca padrão
+    duckdb = None
+
+# Consultas SQL ad hoc sobre os dados do painel, sem editar o app.py nem escrever scripts pandas.
+# Tabelas expostas:
+#   registros       formato longo (data, local, grupo, bombonas, peso, ano, mes)
+#   ind_<tabela>    tabelas materializadas pelo indicadores.py (resumo, dia, mes, local, grupo), se forem
+#                   da versão atual dos dados
+# Só as partições (ano, mês) pedidas são lidas: com DuckDB o Parquet é consultado no lugar (o filtro de
+# partição e os da consulta descem até a leitura); no SQLite elas são copiadas para um banco em memória
+# com índices por data, local e grupo. A conexão é compartilhada entre as sessões do painel, então só
+# entra consulta de leitura (SQLite: autorizador; DuckDB: um único SELECT, sem acesso a arquivos) e
+# cada uma tem prazo: passou de TEMPO_LIMITE segundos, é interrompida.
+MOTORES = ("duckdb", "sqlite") if duckdb is not None else ("sqlite",)
+LIMITE_LINHAS = 10_000
+TEMPO_LIMITE = float(os.environ.get("BOMBONAS_CONSULTA_SEGUNDOS", "15"))
+CONSULTA_EXEMPLO = """-- 10 locais com maior desvio de peso por bombona em relação à meta ({meta:g} kg)
+SELECT local,
+       SUM(bombonas) AS bombonas,
+       SUM(peso) AS peso,
+       (SUM(peso) - {meta:g} * SUM(bombonas)) / SUM(bombonas) AS desvio_kg
+FROM registros
+GROUP BY local
+ORDER BY desvio_kg DESC
+LIMIT 10"""
+GRUPOS_INVALIDOS = ("UM", "NAN", "NONE")  # os mesmos que o carregar_longo descarta
+INDICES_SQLITE = {
+    "registros_data": "registros (data)",
+    "registros_local": "registros (local, data)",
+    "registros_grupo": "registros (grupo, data)",
+    "registros_particao": "registros (ano, mes)",
+}
+# Ações que o SQLite permite depois da carga: leitura e funções (sem ATTACH, PRAGMA ou escrita)
+_PERMITIDAS_SQLITE = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+
+
+def particoes_entre(disponiveis, de=None, ate=None):
+    """Partições (ano, mes) entre `de` e `ate` (AAAA-MM, inclusive); None = todas (ou não há Parquet)."""
+    if (de is None and ate is None) or not disponiveis:
+        return None
+    inicio = pd.Period(de, "M") if de else None
+    fim = pd.Period(ate, "M") if ate else None
+    return [(ano, mes) for ano, mes in disponiveis
+            if (inicio is None or pd.Period(year=ano, month=mes, freq="M") >= inicio)
+            and (fim is None or pd.Period(year=ano, month=mes, freq="M") <= fim)]
+
+
+class ConsultaRecusada(ValueError):
+    """Comando que não é uma consulta de leitura (DDL, DML, SET, vários comandos...)."""
+
+
+def _autorizar_leitura(acao, *_):
+    return sqlite3.SQLITE_OK if acao in _PERMITIDAS_SQLITE else sqlite3.SQLITE_DENY
+
+
+def _so_select_duckdb(con, sql):
+    comandos = con.extract_statements(sql)
+    if len(comandos) != 1 or comandos[0].type != duckdb.StatementType.SELECT:
+        raise ConsultaRecusada("Só é permitido um comando SELECT por consulta")
+
+
+class BaseConsultas:
+    """Conexão pronta para consultar `registros` e as tabelas de indicadores de uma versão dos dados.
+
+    `particoes` (lista de (ano, mes)) restringe o que é lido; None lê tudo. A conexão é
+    compartilhada entre sessões do painel, então as consultas passam por uma trava.
+    """
+
+    def __init__(self, caminho_csv=ARQUIVO_DADOS, particoes=None, versao=None, motor=None):
+        self.motor = motor or MOTORES[0]
+        if self.motor not in MOTORES:
+            raise ValueError(f"Motor {self.motor!r} indisponível (instalados: {', '.join(MOTORES)})")
+        self.particoes = None if particoes is None else sorted(particoes)
+        self._trava = threading.Lock()
+        inicio = time.perf_counter()
+        # Só entram as tabelas materializadas da versão atual (tabelas velhas dariam números diferentes)
+        if versao is None:
+            versao = versao_com_precos(versao_dados(caminho_csv), caminho_precos(caminho_csv))
+        indicadores = carregar_indicadores(caminho_csv, versao) or {}
+        tabelas = {f"ind_{nome}": df for nome, df in indicadores.items()}
+        if self.motor == "duckdb":
+            self._con = self._abrir_duckdb(caminho_csv, tabelas)
+        else:
+            self._con = self._abrir_sqlite(caminho_csv, tabelas)
+        self.tempo_carga = time.perf_counter() - inicio
+        self.tabelas = {nome: [c[0] for c in self._con.execute(f"SELECT * FROM {nome} LIMIT 0").description]
+                        for nome in ["registros", *tabelas]}
+
+    def _abrir_duckdb(self, caminho_csv, tabelas):
+        con = duckdb.connect()
+        pasta = caminho_parquet(caminho_csv)
+        if particoes_disponiveis(pasta):
+            # Dataset Arrow registrado: o DuckDB empurra projeção e filtros (inclusive ano/mes) para a leitura
+            con.register("_parquet", ds.dataset(pasta, format="parquet", partitioning=PARTICIONAMENTO))
+            condicoes = [f"grupo NOT IN {GRUPOS_INVALIDOS}"]
+            if self.particoes is not None:
+                condicoes.append("(" + " OR ".join(f"(ano = {int(a)} AND mes = {int(m)})" for a, m in self.particoes)
+                                 + ")" if self.particoes else "FALSE")
+            con.execute(f"CREATE VIEW registros AS SELECT * FROM _parquet WHERE {' AND '.join(condicoes)}")
+        else:
+            con.register("registros", self._registros_csv(caminho_csv))
+        for nome, df in tabelas.items():
+            con.register(nome, df)
+        # Nada de read_csv/COPY/ATTACH em arquivos a partir das consultas, nem de religar isso com SET
+        con.execute("SET enable_external_access = false")
+        con.execute("SET lock_configuration = true")
+        return con
+
+    def _abrir_sqlite(self, caminho_csv, tabelas):
+        con = sqlite3.connect(":memory:", check_same_thread=False)
+        registros = self._registros_csv(caminho_csv)
+        # Datas em texto ISO: comparações e BETWEEN com '2025-07-01' funcionam direto
+        registros["data"] = registros["data"].dt.strftime("%Y-%m-%d")
+        registros.to_sql("registros", con, index=False)
+        for nome, definicao in INDICES_SQLITE.items():
+            con.execute(f"CREATE INDEX {nome} ON {definicao}")
+        for nome, df in tabelas.items():
+            df.to_sql(nome, con, index=False)
+        con.execute("ANALYZE")
+        con.set_authorizer(_autorizar_leitura)
+        return con
+
+    def _registros_csv(self, caminho_csv):
+        df = carregar_longo(caminho_csv, particoes=self.particoes)
+        if df is None:
+            df = pd.DataFrame(columns=["data", "local", "grupo", "bombonas", "peso"])
+        df = df.assign(data=pd.to_datetime(df["data"]), local=df["local"].astype(str), grupo=df["grupo"].astype(str))
+        return df.assign(ano=df["data"].dt.year, mes=df["data"].dt.month)
+
+    def consultar(self, sql, limite=LIMITE_LINHAS, tempo_limite=TEMPO_LIMITE):
+        """Resultado da consulta em DataFrame, com no máximo `limite` linhas.
+
+        Levanta ConsultaRecusada para o que não for leitura e TimeoutError depois de `tempo_limite` segundos.
+        """
+        with self._trava:
+            if self.motor == "duckdb":
+                _so_select_duckdb(self._con, sql)
+            # Enquanto a consulta roda as outras sessões esperam a trava: o relógio garante que ela termina
+            estourou = threading.Event()
+
+            def interromper():
+                estourou.set()
+                self._con.interrupt()
+
+            relogio = threading.Timer(tempo_limite, interromper)
+            relogio.start()
+            cursor = None
+            try:
+                cursor = self._con.execute(sql)
+                colunas = [c[0] for c in cursor.description or []]
+                linhas = cursor.fetchmany(limite)
+            except Exception as e:
+                if estourou.is_set():
+                    raise TimeoutError(f"Consulta interrompida depois de {tempo_limite:g}s") from None
+                # Negado pelo autorizador ou mais de um comando: a mesma recusa do DuckDB
+                if isinstance(e, sqlite3.ProgrammingError) or "not authorized" in str(e):
+                    raise ConsultaRecusada(f"Só são permitidas consultas de leitura, uma por vez ({e})") from None
+                raise
+            finally:
+                relogio.cancel()
+                # No DuckDB o execute devolve a própria conexão, que não pode ser fechada
+                if cursor is not None and self.motor == "sqlite":
+                    cursor.close()
+        return pd.DataFrame.from_records(linhas, columns=colunas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consulta SQL sobre os dados do painel (registros e ind_*).")
+    parser.add_argument("sql", nargs="?", help="Consulta; sem ela, lê da entrada padrão")
+    parser.add_argument("--dados", default=ARQUIVO_DADOS)
+    parser.add_argument("--de", help="Primeiro mês lido (AAAA-MM)")
+    parser.add_argument("--ate", help="Último mês lido (AAAA-MM)")
+    parser.add_argument("--motor", choices=MOTORES, default=MOTORES[0])
+    parser.add_argument("--limite", type=int, default=LIMITE_LINHAS)
+    parser.add_argument("--csv", help="Grava o resultado neste CSV em vez de imprimir")
+    parser.add_argument("--tabelas", action="store_true", help="Lista as tabelas e colunas disponíveis")
+    args = parser.parse_args(argv)
+
+    particoes = particoes_entre(particoes_disponiveis(caminho_parquet(args.dados)), args.de, args.ate)
+    base = BaseConsultas(args.dados, particoes, motor=args.motor)
+    lidas = "todas" if particoes is None else len(particoes)
+    print(f"🗄️ {base.motor}: partições lidas: {lidas} ({base.tempo_carga:.2f}s)", file=sys.stderr)
+    if args.tabelas:
+        for nome, colunas in base.tabelas.items():
+            print(f"{nome}: {', '.join(colunas)}")
+        return 0
+
+    sql = args.sql or sys.stdin.read()
+    inicio = time.perf_counter()
+    try:
+        resultado = base.consultar(sql, args.limite)
+    except Exception as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(f"⏱️ {len(resultado)} linhas em {time.perf_counter() - inicio:.3f}s", file=sys.stderr)
+    if args.csv:
+        resultado.to_csv(args.csv, index=False)
+    else:
+        with pd.option_context("display.max_rows", 200, "display.width", 200):
+            print(resultado.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+from precos import aplicar_precos
+
+MEDIDAS = ["bombonas", "peso"]
+# Só existem no cubo quando há tabela de preços (ver precos.py)
+MEDIDAS_PRECO = ["custo_tabela", "custo_red_tabela", "bombonas_sem_preco"]
+# Tipos dos totais: o cubo guarda tipos compactos, mas toda soma sai em int64/float64
+TIPOS_SOMA = {"bombonas": "int64", "peso": "float64",
+              "custo_tabela": "float64", "custo_red_tabela": "float64", "bombonas_sem_preco": "int64"}
+LIMITE_FLOAT32 = 2**24  # até aqui todo inteiro (e toda soma de inteiros) é exato em float32
+
+
+def _peso_compacto(peso):
+    """float32 só quando não muda nenhum total: pesos inteiros com soma absoluta abaixo de 2**24."""
+    valores = peso.to_numpy(dtype="float64")
+    if np.all(np.mod(valores, 1) == 0) and np.abs(valores).sum() < LIMITE_FLOAT32:
+        return peso.astype("float32")
+    return peso.astype("float64")
+
+
+def compactar(tabela):
+    """Categorias nos rótulos, menor inteiro que cabe em bombonas e float32 no peso quando é exato."""
+    tabela = tabela.copy()
+    for coluna in ("local", "grupo"):
+        if coluna in tabela.columns:
+            tabela[coluna] = tabela[coluna].astype("category")
+    for coluna in ("bombonas", "bombonas_sem_preco"):
+        if coluna in tabela.columns:
+            tabela[coluna] = pd.to_numeric(tabela[coluna], downcast="integer")
+    if "peso" in tabela.columns:
+        tabela["peso"] = _peso_compacto(tabela["peso"])
+    if "dias_mask" in tabela.columns:
+        tabela["dias_mask"] = tabela["dias_mask"].astype("uint32")  # 31 dias cabem em 32 bits
+    return tabela
+
+
+def medidas(tabela):
+    """Medidas somáveis presentes no cubo (as de preço só com tabela de preços)."""
+    return MEDIDAS + [m for m in MEDIDAS_PRECO if m in tabela.columns]
+
+
+def _tipos_soma(tabela):
+    return {m: TIPOS_SOMA[m] for m in medidas(tabela)}
+
+
+def montar_cubo(df, precos=None):
+    """Agrega o formato longo nos cubos diário e mensal (local x grupo) usados por todas as páginas.
+
+    O cubo mensal guarda em `dias_mask` um bit por dia do mês com movimento, o que permite
+    contar dias distintos de qualquer recorte sem voltar aos registros diários. Rótulos de
+    mês não são guardados: saem de `periodo` quando pedidos (ver `rotulos`). Com `precos`
+    (tabela de precos.carregar_tabela) o custo é resolvido por dia e vira medida do cubo.
+    """
+    diario = (df.assign(data=df["data"].dt.normalize())
+              .groupby(["data", "local", "grupo"], observed=True)[MEDIDAS].sum()
+              .reset_index())
+    if precos is not None:
+        diario = aplicar_precos(diario, precos)
+    periodo = diario["data"] + pd.offsets.MonthEnd(0)
+
+    # Cada (dia, local, grupo) é único no cubo diário: dentro da célula mensal a soma dos bits é um OR
+    bits_dia = np.left_shift(np.int64(1), diario["data"].dt.day.to_numpy() - 1)
+    mensal = (diario.assign(periodo=periodo, dias_mask=bits_dia)
+              .groupby(["periodo", "local", "grupo"], observed=True)[medidas(diario) + ["dias_mask"]].sum()
+              .reset_index())
+    return {"diario": compactar(diario), "mensal": compactar(mensal)}
+
+
+def _contar_dias(mascaras, chaves):
+    # OR dos bits de dia por grupo, feito bit a bit com max() para ficar vetorizado
+    bits = (mascaras.to_numpy()[:, None] >> np.arange(31)) & 1
+    return pd.DataFrame(bits, index=mascaras.index).groupby(chaves, observed=True).max().sum(axis=1)
+
+
+def rollup_mensal(mensal, por=None, completar=False):
+    """Totais por mês (coluna `data` = fim do mês, como o pd.Grouper(freq="ME")) e dias distintos.
+
+    Com `completar=True` os meses sem movimento entre o primeiro e o último aparecem zerados.
+    """
+    chaves = ["periodo"] + ([por] if por else [])
+    agrupado = mensal.groupby(chaves, observed=True)
+    resultado = agrupado[medidas(mensal)].sum().astype(_tipos_soma(mensal))
+    resultado["dias"] = _contar_dias(mensal["dias_mask"], [mensal[c] for c in chaves])
+    if completar and not por and not resultado.empty:
+        meses = pd.date_range(resultado.index.min(), resultado.index.max(), freq="ME")
+        resultado = resultado.reindex(meses, fill_value=0)
+        resultado.index.name = "periodo"
+    return resultado.reset_index().rename(columns={"periodo": "data"})
+
+
+def rollup(mensal, dimensao):
+    """Totais de bombonas e peso por `local` ou `grupo`."""
+    return mensal.groupby(dimensao, observed=True)[medidas(mensal)].sum().astype(_tipos_soma(mensal)).reset_index()
+
+
+def dias_distintos(mensal):
+    if mensal.empty:
+        return 0
+    return int(_contar_dias(mensal["dias_mask"], [mensal["periodo"]]).sum())
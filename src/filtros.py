@@ -0,0 +1,74 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+class IndiceFiltros:
+    """Bitmaps (np.packbits) por valor de cada dimensão de filtro de uma tabela.
+
+    A seleção é o AND entre dimensões do OR dos valores escolhidos em cada uma;
+    nenhuma coluna da tabela é varrida depois que o índice está montado. O índice vem
+    no snapshot compartilhado por todas as sessões, então o cache de seleções tem trava.
+    """
+
+    def __init__(self, tabela, dimensoes, tamanho_cache=64):
+        self.tabela = tabela
+        self.n = len(tabela)
+        self._todos = np.packbits(np.ones(self.n, dtype=bool))
+        self._bitmaps = {}
+        for dim in dimensoes:
+            codigos, valores = pd.factorize(tabela[dim], sort=True)
+            ordem = np.argsort(codigos, kind="stable")
+            limites = np.searchsorted(codigos[ordem], np.arange(len(valores) + 1))
+            por_valor = {}
+            for i, valor in enumerate(valores):
+                mascara = np.zeros(self.n, dtype=bool)
+                mascara[ordem[limites[i]:limites[i + 1]]] = True
+                por_valor[valor] = np.packbits(mascara)
+            self._bitmaps[dim] = por_valor
+        self._cache = OrderedDict()
+        self._tamanho_cache = tamanho_cache
+        self._trava = threading.Lock()
+
+    @property
+    def nbytes(self):
+        """Memória dos bitmaps e do cache de seleções (sem contar a tabela indexada)."""
+        bitmaps = sum(bits.nbytes for por_valor in self._bitmaps.values() for bits in por_valor.values())
+        with self._trava:
+            return bitmaps + sum(bits.nbytes for bits in self._cache.values())
+
+    def _bitmap(self, filtros):
+        chave = tuple(sorted((dim, tuple(sorted(vals))) for dim, vals in filtros.items() if vals is not None))
+        with self._trava:
+            if chave in self._cache:
+                self._cache.move_to_end(chave)
+                return self._cache[chave]
+
+        selecao = self._todos
+        for dim, valores in chave:
+            por_valor = self._bitmaps[dim]
+            uniao = np.zeros_like(self._todos)
+            for valor in valores:
+                if valor in por_valor:
+                    uniao |= por_valor[valor]
+            selecao = selecao & uniao
+
+        with self._trava:
+            self._cache[chave] = selecao
+            if len(self._cache) > self._tamanho_cache:
+                self._cache.popitem(last=False)
+        return selecao
+
+    def linhas(self, **filtros):
+        """Posições das linhas selecionadas. Filtro `None` não restringe; lista vazia não seleciona nada."""
+        return np.flatnonzero(np.unpackbits(self._bitmap(filtros), count=self.n))
+
+    def selecionar(self, **filtros):
+        return self.tabela.iloc[self.linhas(**filtros)]
+
+    def opcoes(self, dim, **filtros):
+        """Valores de `dim` presentes na seleção (listas em cascata da barra lateral)."""
+        selecao = self._bitmap(filtros)
+        return [valor for valor, bits in self._bitmaps[dim].items() if np.any(bits & selecao)]
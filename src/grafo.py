@@ -0,0 +1,94 @@
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
+
+# Grafo preguiçoso de indicadores: cada indicador declara de quais entradas ou outros indicadores
+# depende e só é calculado quando alguém o pede. O resultado fica memoizado pela chave das
+# entradas de que ele realmente depende (mudar o simulador não recalcula o que só usa o recorte).
+
+
+class GrafoIndicadores:
+    def __init__(self):
+        self._funcoes = {}
+        self._dependencias = {}
+
+    def registrar(self, nome, funcao, *dependencias):
+        """`funcao` recebe os valores de `dependencias` (entradas ou indicadores), na ordem."""
+        self._funcoes[nome] = funcao
+        self._dependencias[nome] = dependencias
+
+    def __contains__(self, nome):
+        return nome in self._funcoes
+
+    def entradas_de(self, nome):
+        """Entradas (o que não é indicador) das quais `nome` depende, direta ou indiretamente."""
+        entradas, pendentes, vistos = set(), [nome], set()
+        while pendentes:
+            atual = pendentes.pop()
+            if atual in vistos:
+                continue
+            vistos.add(atual)
+            if atual in self._funcoes:
+                pendentes.extend(self._dependencias[atual])
+            else:
+                entradas.add(atual)
+        return sorted(entradas)
+
+
+class MemoIndicadores:
+    """LRU de indicadores calculados, compartilhado entre sessões (os valores não devem ser alterados)."""
+
+    def __init__(self, tamanho=512):
+        self._valores = OrderedDict()
+        self._tamanho = tamanho
+        self._trava = threading.Lock()
+
+    def obter(self, chave, calcular):
+        with self._trava:
+            if chave in self._valores:
+                self._valores.move_to_end(chave)
+                return self._valores[chave]
+        valor = calcular()
+        with self._trava:
+            self._valores[chave] = valor
+            if len(self._valores) > self._tamanho:
+                self._valores.popitem(last=False)
+        return valor
+
+
+class Avaliacao:
+    """Avaliação do grafo para um conjunto de entradas: `avaliacao["nome"]` calcula sob demanda.
+
+    `chaves` identifica cada entrada (hashable) para a memoização em `memo`; `prontos` entrega
+    valores já calculados por fora; `etapa(nome)` devolve um context manager em volta de cada cálculo.
+    """
+
+    def __init__(self, grafo, entradas, chaves, memo=None, prontos=None, etapa=None):
+        self._grafo = grafo
+        self._entradas = entradas
+        self._chaves = chaves
+        self._memo = memo
+        self._valores = dict(prontos or {})
+        self._etapa = etapa or (lambda nome: nullcontext())
+
+    def __getitem__(self, nome):
+        if nome in self._valores:
+            return self._valores[nome]
+        if nome not in self._grafo:
+            return self._entradas[nome]
+
+        def calcular():
+            argumentos = [self[dependencia] for dependencia in self._grafo._dependencias[nome]]
+            with self._etapa(nome):
+                return self._grafo._funcoes[nome](*argumentos)
+
+        if self._memo is None:
+            valor = calcular()
+        else:
+            chave = (nome, tuple(self._chaves[e] for e in self._grafo.entradas_de(nome)))
+            valor = self._memo.obter(chave, calcular)
+        self._valores[nome] = valor
+        return valor
+
+    def calcular(self, nomes):
+        return {nome: self[nome] for nome in nomes}
@@ -1,24 +1,168 @@
+import argparse
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
 import pandas as pd
 
-# 1. Carrega e Padroniza
-df = pd.read_csv("dados/bombonas_tratada.csv")
-df.columns = df.columns.str.strip().str.lower()
-df["data"] = pd.to_datetime(df["data"])
+from cubo import medidas, rollup, rollup_mensal
+from kpis import Parametros, carregar_cubo, resumo, totais_por
+from precos import caminho_precos, custo, custo_red, versao_com_precos
+from versionamento import versao_dados
+
+ARQUIVO_DADOS = "dados/bombonas_v2.csv"
+SAIDA_GRUPO = "dados/indicadores_por_grupo.csv"
+SAIDA_DATA = "dados/indicadores_por_data.csv"
+TABELAS = ["resumo", "dia", "mes", "local", "grupo"]
+
+# Materialização dos indicadores: roda depois do transformacao.py e grava tabelas pequenas em Parquet
+# (dados/indicadores/<tabela>.parquet) com metas e custos já calculados para os preços configurados.
+# O manifesto indicadores.json é gravado por último e diz de qual versão dos dados as tabelas são.
+
+
+def pasta_indicadores(caminho_csv):
+    return Path(caminho_csv).parent / "indicadores"
+
+
+def _com_metas(df, parametros):
+    df["peso_ideal"] = df["bombonas"] * parametros.meta_peso
+    df["dif_peso"] = df["peso"] - df["peso_ideal"]
+    df["custo"] = custo(df, parametros.preco_estimado)
+    df["custo_red"] = custo_red(df, parametros.preco_base)
+    return df.drop(columns=[c for c in df.columns if c.endswith("_tabela") or c == "bombonas_sem_preco"])
+
+
+def calcular(cubo, parametros=Parametros()):
+    """Tabelas de indicadores por dia, mês, local e grupo, mais o resumo geral (uma linha)."""
+    mensal = cubo["mensal"]
+    dia = rollup(cubo["diario"], "data")
+
+    mes = rollup_mensal(mensal, completar=True)
+    com_dias = mes["dias"] > 0
+    mes["media_bombonas_dia"] = (mes["bombonas"] / mes["dias"]).where(com_dias, 0.0)
+
+    tabelas = {
+        "resumo": pd.DataFrame([{**resumo(mensal, parametros), **parametros._asdict()}]),
+        "dia": _com_metas(dia, parametros),
+        "mes": _com_metas(mes, parametros),
+        "local": _com_metas(totais_por(mensal, "local", parametros), parametros),
+        "grupo": _com_metas(totais_por(mensal, "grupo", parametros), parametros),
+    }
+    tabelas["mes"]["dif_dia"] = (tabelas["mes"]["dif_peso"] / mes["dias"]).where(com_dias, 0.0)
+    return tabelas
+
+
+def salvar(tabelas, caminho_csv, versao, parametros):
+    pasta = pasta_indicadores(caminho_csv)
+    pasta.mkdir(parents=True, exist_ok=True)
+    for nome, df in tabelas.items():
+        temporario = pasta / f"{nome}.parquet.tmp"
+        df.to_parquet(temporario, index=False)
+        os.replace(temporario, pasta / f"{nome}.parquet")
+
+    manifesto = pasta / "indicadores.json"
+    temporario = manifesto.with_suffix(".tmp")
+    temporario.write_text(json.dumps({
+        "versao": versao,
+        "parametros": parametros._asdict(),
+        "tabelas": list(tabelas),
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+    }, indent=1), encoding="utf-8")
+    os.replace(temporario, manifesto)  # por último: só aponta para tabelas já completas
+    return pasta
+
+
+def exportar_csv(tabelas, caminho_csv):
+    """Exportações em CSV ao lado dos dados (indicadores_por_grupo/por_data, mesmas colunas de antes)."""
+    pasta = Path(caminho_csv).parent
+    exportacoes = {
+        Path(SAIDA_GRUPO).name: tabelas["grupo"][["grupo", "bombonas", "peso"]],
+        Path(SAIDA_DATA).name: tabelas["dia"].rename(columns={"bombonas": "total_bombonas", "peso": "total_peso"})[
+            ["data", "total_bombonas", "total_peso"]],
+    }
+    for nome, df in exportacoes.items():
+        temporario = pasta / f"{nome}.tmp"
+        df.to_csv(temporario, index=False)
+        os.replace(temporario, pasta / nome)
+
+
+def materializar(caminho_csv=ARQUIVO_DADOS, parametros=Parametros(), versao=None):
+    """Calcula e grava as tabelas da versão atual dos dados (Parquet + CSVs); None se não houver dados.
+
+    `versao` (já com os preços) é a do ETL que ainda vai gravar o versao.json; sem ela, a atual.
+    """
+    if versao is None:
+        versao = versao_com_precos(versao_dados(caminho_csv), caminho_precos(caminho_csv))
+    cubo = carregar_cubo(caminho_csv)
+    if cubo is None:
+        return None
+    tabelas = calcular(cubo, parametros)
+    # Os CSVs também saem daqui: o ETL com --indicadores (e o vigia) os mantém em dia
+    exportar_csv(tabelas, caminho_csv)
+    salvar(tabelas, caminho_csv, versao, parametros)
+    return tabelas
+
+
+def carregar_indicadores(caminho_csv, versao=None, parametros=None):
+    """Tabelas materializadas, se forem da `versao` e dos `parametros` pedidos; senão None."""
+    pasta = pasta_indicadores(caminho_csv)
+    try:
+        manifesto = json.loads((pasta / "indicadores.json").read_text(encoding="utf-8"))
+        if versao is not None and manifesto["versao"] != versao:
+            return None
+        if parametros is not None and Parametros(**manifesto["parametros"]) != parametros:
+            return None
+        return {nome: pd.read_parquet(pasta / f"{nome}.parquet") for nome in manifesto["tabelas"]}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def prontos_kpis(materializado, mensal):
+    """Resumo e bombonas por mês das tabelas materializadas, nas colunas que o kpis daria para `mensal`.
+
+    As tabelas trazem metas, custos e parâmetros a mais: cortados aqui, o painel e a API devolvem o
+    mesmo esquema com ou sem filtro. Sem todas as medidas do cubo, o mensal fica para o kpis calcular.
+    """
+    prontos = {"resumo": materializado["resumo"].drop(columns=list(Parametros._fields)).to_dict("records")[0]}
+    colunas_mes = ["data", *medidas(mensal), "dias"]
+    if set(colunas_mes) <= set(materializado["mes"].columns):
+        prontos["bombonas_mes"] = materializado["mes"][colunas_mes]
+    return prontos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Materializa os indicadores (dia, mês, local, grupo) lidos pelo painel.")
+    parser.add_argument("--dados", default=ARQUIVO_DADOS)
+    parser.add_argument("--meta-peso", type=float, default=Parametros().meta_peso)
+    parser.add_argument("--preco-base", type=float, default=Parametros().preco_base)
+    parser.add_argument("--preco-estimado", type=float, default=Parametros().preco_estimado)
+    args = parser.parse_args(argv)
+
+    # 1. Carrega (Parquet ou CSV), monta o cubo e grava as tabelas
+    parametros = Parametros(args.meta_peso, args.preco_base, args.preco_estimado)
+    tabelas = materializar(args.dados, parametros)
+    if tabelas is None:
+        print(f"❌ Sem dados em {args.dados}")
+        return 1
+
+    # 2. Indicadores Gerais
+    kpi = tabelas["resumo"].to_dict("records")[0]
+    print("\n📊 RESUMO GERAL")
+    print(f"Total Bombonas: {kpi['total_bombonas']}")
+    print(f"Peso Total: {kpi['total_peso_real']:.2f} kg")
+    print(f"Peso Meta ({parametros.meta_peso:g} kg/un): {kpi['peso_ideal_total']:.2f} kg | Diferença: {kpi['diferenca_peso']:.2f} kg")
+    print(f"Custo Base: R$ {kpi['gasto_estimado']:.2f} | Custo Red 5%: R$ {kpi['custo_red']:.2f}")
+    print(f"Média Diária: {kpi['total_bombonas'] / kpi['dias']:.1f} un/dia" if kpi["dias"] > 0 else "Média: 0")
 
-# 2. Indicadores Gerais
-dias_unicos = df["data"].nunique()
-total_bombonas = df["bombonas"].sum()
-total_peso = df["peso"].sum()
+    # 3. Por Grupo
+    grupo_kpi = tabelas["grupo"][["grupo", "bombonas", "peso"]]
+    print("\n📦 POR GRUPO")
+    print(grupo_kpi)
 
-print("\n📊 RESUMO GERAL")
-print(f"Total Bombonas: {total_bombonas}")
-print(f"Peso Total: {total_peso:.2f} kg")
-print(f"Média Diária: {total_bombonas / dias_unicos:.1f} un/dia" if dias_unicos > 0 else "Média: 0")
+    print(f"\n📂 Tabelas em {pasta_indicadores(args.dados)} ({', '.join(TABELAS)}) e CSVs em {Path(args.dados).parent}")
+    return 0
 
-# 3. Por Grupo
-grupo_kpi = df.groupby("grupo")[["bombonas", "peso"]].sum().reset_index()
-print("\n📦 POR GRUPO")
-print(grupo_kpi)
 
-# Salva
-grupo_kpi.to_csv("dados/indicadores_por_grupo.csv", index=False)
\ No newline at end of file
+if __name__ == "__main__":
+    raise SystemExit(main())
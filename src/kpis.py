@@ -0,0 +1,95 @@
+# Indicadores do painel sem Streamlit/Plotly: tudo parte do cubo mensal (filtrado ou não) e de um Parametros
+from typing import NamedTuple
+
+from armazenamento import carregar_longo
+from cenarios import sensibilidade_meta, sensibilidade_preco
+from cubo import dias_distintos, medidas, montar_cubo, rollup, rollup_mensal
+from grafo import GrafoIndicadores
+from precos import caminho_precos, carregar_tabela, custo, custo_red
+from resolucao import agrupar_outros
+
+
+class Parametros(NamedTuple):
+    """Valores do simulador (meta de peso por bombona e preços por bombona)."""
+    meta_peso: float = 25.0
+    preco_base: float = 95.0
+    preco_estimado: float = 101.0
+
+
+def carregar_cubo(caminho_csv, colunas=None, com_precos=True):
+    """Cubo dos dados; com `com_precos` aplica a tabela de preços ao lado do CSV, se existir."""
+    df = carregar_longo(caminho_csv, colunas=colunas)
+    if df is None or df.empty:
+        return None
+    return montar_cubo(df, carregar_tabela(caminho_precos(caminho_csv)) if com_precos else None)
+
+
+def resumo(mensal, parametros=Parametros()):
+    """Totais gerais do recorte: os números dos cartões de todas as páginas."""
+    totais = mensal[medidas(mensal)].sum()
+    total_bombonas = int(totais["bombonas"])
+    total_peso_real = mensal["peso"].to_numpy(dtype="float64").sum()
+    peso_ideal_total = total_bombonas * parametros.meta_peso
+    dias = dias_distintos(mensal)
+    return {
+        "total_bombonas": total_bombonas,
+        "total_peso_real": total_peso_real,
+        "peso_ideal_total": peso_ideal_total,
+        "diferenca_peso": total_peso_real - peso_ideal_total,
+        "gasto_estimado": float(custo(totais, parametros.preco_estimado)),
+        "custo_red": float(custo_red(totais, parametros.preco_base)),
+        "dias": dias,
+        "media_bombonas_dia": int(total_bombonas / dias) if dias > 0 else 0,
+    }
+
+
+def peso_mensal(mensal, parametros=Parametros()):
+    """Real vs meta por mês (só meses com peso), com médias e diferenças por dia."""
+    df = rollup_mensal(mensal)
+    df = df[df["peso"] > 0].copy()
+    df["peso_ideal"] = df["bombonas"] * parametros.meta_peso
+    df["media_peso_dia"] = df["peso"] / df["dias"]
+    df["dif_mes"] = df["peso"] - df["peso_ideal"]
+    df["dif_dia"] = df["dif_mes"] / df["dias"]
+    return df
+
+
+def bombonas_mensal(mensal):
+    """Bombonas por mês, com os meses sem movimento zerados."""
+    return rollup_mensal(mensal, completar=True)
+
+
+def media_diaria_por_local(mensal):
+    df = rollup_mensal(mensal, por="local")
+    df["media_dia"] = df["bombonas"] / df["dias"]
+    return df.sort_values("data")
+
+
+def custo_mensal(mensal, parametros=Parametros()):
+    df = rollup_mensal(mensal)
+    df = df[df["bombonas"] > 0].copy()
+    df["custo"] = custo(df, parametros.preco_estimado)
+    return df
+
+
+def totais_por(mensal, dimensao, parametros=Parametros()):
+    """Bombonas, peso e custo estimado por `local` ou `grupo`."""
+    df = rollup(mensal, dimensao)
+    df["custo"] = custo(df, parametros.preco_estimado)
+    return df
+
+
+# Indicadores do painel como grafo: entradas "mensal" (recorte do cubo) e "parametros" (simulador)
+GRAFO = GrafoIndicadores()
+GRAFO.registrar("resumo", resumo, "mensal", "parametros")
+GRAFO.registrar("bombonas_mes", bombonas_mensal, "mensal")
+GRAFO.registrar("peso_mes", peso_mensal, "mensal", "parametros")
+GRAFO.registrar("custo_mes", custo_mensal, "mensal", "parametros")
+# Uma linha por local no gráfico: acima de MAX_SERIES locais os menores somam em "OUTROS"
+GRAFO.registrar("media_local", lambda mensal: media_diaria_por_local(agrupar_outros(mensal, "local")), "mensal")
+GRAFO.registrar("totais_grupo", lambda mensal, parametros: totais_por(mensal, "grupo", parametros), "mensal", "parametros")
+GRAFO.registrar("totais_local", lambda mensal, parametros: totais_por(mensal, "local", parametros), "mensal", "parametros")
+# Curvas de sensibilidade sobre grades fixas (cenarios.py): não dependem do simulador, então mudar
+# a meta ou o preço só move o marcador do valor atual
+GRAFO.registrar("sensibilidade_meta", sensibilidade_meta, "mensal")
+GRAFO.registrar("sensibilidade_preco", sensibilidade_preco, "mensal")
@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+VARIAVEL_AMBIENTE = "BOMBONAS_PERFIL"
+VALORES_LIGADO = {"1", "true", "sim", "on"}
+
+
+def perfil_ligado(query_params=None):
+    """Liga o perfil por variável de ambiente (BOMBONAS_PERFIL=1) ou por ?perfil=1 na URL."""
+    if os.environ.get(VARIAVEL_AMBIENTE, "").strip().lower() in VALORES_LIGADO:
+        return True
+    return str((query_params or {}).get("perfil", "")).strip().lower() in VALORES_LIGADO
+
+
+class Perfilador:
+    """Cronometra as etapas de um rerun do painel. Desligado, `etapa()` não mede nada."""
+
+    def __init__(self, ativo=True, pagina=None):
+        self.ativo = ativo
+        self.pagina = pagina
+        self.rerun = uuid.uuid4().hex[:8]
+        self.iniciado_em = time.time()
+        self._inicio = time.perf_counter()
+        self.eventos = []
+
+    @contextmanager
+    def etapa(self, nome, **detalhes):
+        if not self.ativo:
+            yield
+            return
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            # Registra mesmo quando a etapa termina com st.stop()/st.rerun() (exceções de controle)
+            self.eventos.append({
+                "rerun": self.rerun,
+                "pagina": self.pagina,
+                "etapa": nome,
+                "inicio_ms": (inicio - self._inicio) * 1000,
+                "duracao_ms": (time.perf_counter() - inicio) * 1000,
+                "rerun_em": self.iniciado_em,
+                **detalhes,
+            })
+
+    def total_ms(self):
+        return (time.perf_counter() - self._inicio) * 1000
+
+    def resumo(self):
+        """Tempo somado e número de chamadas por etapa, da mais lenta para a mais rápida."""
+        por_etapa = defaultdict(lambda: [0, 0.0])
+        for evento in self.eventos:
+            por_etapa[evento["etapa"]][0] += 1
+            por_etapa[evento["etapa"]][1] += evento["duracao_ms"]
+        linhas = [{"etapa": nome, "chamadas": n, "ms": round(ms, 1)} for nome, (n, ms) in por_etapa.items()]
+        return sorted(linhas, key=lambda linha: -linha["ms"])
+
+    def gravar_jsonl(self, caminho):
+        caminho = Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        with caminho.open("a", encoding="utf-8") as arquivo:
+            for evento in self.eventos:
+                arquivo.write(json.dumps(evento, ensure_ascii=False) + "\n")
+
+
+def chrome_trace(eventos):
+    """Converte eventos (de um ou vários reruns) para o formato do chrome://tracing / Perfetto.
+
+    Cada página vira uma linha (tid) própria, então as etapas de cada página aparecem separadas.
+    """
+    paginas = {}
+    trace = []
+    for evento in eventos:
+        pagina = evento.get("pagina") or "?"
+        if pagina not in paginas:
+            paginas[pagina] = len(paginas) + 1
+            trace.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": paginas[pagina], "args": {"name": pagina}})
+        args = {k: v for k, v in evento.items() if k not in ("etapa", "inicio_ms", "duracao_ms", "rerun_em")}
+        trace.append({
+            "name": evento["etapa"], "cat": pagina, "ph": "X", "pid": 1, "tid": paginas[pagina],
+            "ts": evento["rerun_em"] * 1e6 + evento["inicio_ms"] * 1000, "dur": evento["duracao_ms"] * 1000,
+            "args": args,
+        })
+    return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+
+def ler_jsonl(caminho):
+    with Path(caminho).open(encoding="utf-8") as arquivo:
+        return [json.loads(linha) for linha in arquivo if linha.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resume ou converte o perfil gravado pelo painel (JSON lines).")
+    parser.add_argument("arquivo", help="perfil .jsonl gravado com BOMBONAS_PERFIL=1 ou ?perfil=1")
+    parser.add_argument("--chrome", metavar="SAIDA", help="Grava no formato Chrome trace (abrir em ui.perfetto.dev)")
+    args = parser.parse_args(argv)
+
+    eventos = ler_jsonl(args.arquivo)
+    if args.chrome:
+        Path(args.chrome).write_text(json.dumps(chrome_trace(eventos)), encoding="utf-8")
+        print(f"📂 Chrome trace em {args.chrome} ({len(eventos)} eventos)")
+        return 0
+
+    # Mediana por página/etapa ao longo dos reruns gravados
+    tempos = defaultdict(list)
+    for evento in eventos:
+        tempos[(evento.get("pagina"), evento["etapa"])].append(evento["duracao_ms"])
+    print(f"📊 {len({e['rerun'] for e in eventos})} reruns, {len(eventos)} eventos")
+    for (pagina, etapa), valores in sorted(tempos.items(), key=lambda item: (str(item[0][0]), -sum(item[1]))):
+        valores.sort()
+        print(f"   {str(pagina):<11} {etapa:<16} {len(valores):5d}x  mediana {valores[len(valores) // 2]:8.1f} ms  "
+              f"máx {valores[-1]:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,151 @@
+import hashlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Tabela de preços por contrato: preço por grupo e/ou local com início (e fim opcional) de vigência.
+# Cada registro diário recebe o preço pela regra mais específica vigente na data:
+# grupo+local, depois só grupo, depois só local, depois a regra geral. Sem regra vigente, vale o
+# preço do simulador. Formato (dados/precos.csv; vazio ou "*" = qualquer):
+#   grupo,local,inicio,fim,preco,preco_red
+#   A,,2025-01-01,,101,95
+NOME_ARQUIVO = "precos.csv"
+CORINGA = "*"
+NIVEIS = [("grupo", "local"), ("grupo",), ("local",), ()]  # do mais específico para o geral
+
+
+def caminho_precos(caminho_csv):
+    return Path(caminho_csv).parent / NOME_ARQUIVO
+
+
+def carregar_tabela(caminho):
+    """Lê e normaliza a tabela de preços; None se o arquivo não existir ou estiver vazio."""
+    try:
+        tabela = pd.read_csv(caminho, dtype={"grupo": str, "local": str})
+    except (OSError, pd.errors.EmptyDataError):
+        return None
+    if tabela.empty:
+        return None
+    faltando = {"inicio", "preco"} - set(tabela.columns)
+    if faltando:
+        raise ValueError(f"Tabela de preços {caminho} sem as colunas {sorted(faltando)}")
+
+    for coluna in ("grupo", "local"):
+        valores = tabela[coluna] if coluna in tabela.columns else pd.Series(CORINGA, index=tabela.index)
+        tabela[coluna] = valores.fillna(CORINGA).astype(str).str.strip().str.upper().replace("", CORINGA)
+    # Mesma resolução de data dos registros em resolver() (o merge_asof exige chaves do mesmo tipo)
+    tabela["inicio"] = pd.to_datetime(tabela["inicio"]).astype("datetime64[ns]")
+    fim = tabela["fim"] if "fim" in tabela.columns else pd.Series(pd.NaT, index=tabela.index)
+    tabela["fim"] = pd.to_datetime(fim).astype("datetime64[ns]")
+    tabela["preco"] = tabela["preco"].astype("float64")
+    # Sem preço reduzido informado, o contrato não tem redução
+    preco_red = tabela["preco_red"] if "preco_red" in tabela.columns else pd.Series(np.nan, index=tabela.index)
+    tabela["preco_red"] = preco_red.astype("float64").fillna(tabela["preco"])
+    return tabela[["grupo", "local", "inicio", "fim", "preco", "preco_red"]].sort_values("inicio", kind="stable")
+
+
+def versao_com_precos(versao, caminho):
+    """Acrescenta à versão dos dados o conteúdo da tabela de preços (os custos do cubo dependem dela)."""
+    try:
+        conteudo = Path(caminho).read_bytes()
+    except OSError:
+        return versao
+    return f"{versao}-{hashlib.sha1(conteudo).hexdigest()[:8]}"
+
+
+def vigencias(regras, chaves):
+    """Regras de um nível em trechos que não se sobrepõem, por combinação de `chaves`.
+
+    Em cada trecho vale, entre as regras em vigor, a de início mais recente (no empate, a
+    última da tabela); trechos sem regra em vigor somem, e a data cai para o nível seguinte.
+    Assim um contrato temporário já vencido não esconde o contrato aberto que ele substituiu.
+    """
+    # Ordenadas por chave e início, cada combinação de chaves vira uma fatia contígua
+    ordenadas = regras.sort_values([*chaves, "inicio"], kind="stable").reset_index(drop=True)
+    inicios, fins_regra = ordenadas["inicio"].to_numpy(), ordenadas["fim"].to_numpy()
+    codigos = ordenadas.groupby(list(chaves), sort=False).ngroup().to_numpy() if chaves else np.zeros(len(ordenadas))
+    limites = np.concatenate([[0], np.flatnonzero(np.diff(codigos)) + 1, [len(ordenadas)]])
+
+    posicoes, comecos, terminos = [], [], []
+    for a, b in zip(limites[:-1], limites[1:]):
+        inicio, fim = inicios[a:b], fins_regra[a:b]
+        aberta = np.isnat(fim)
+        # Um trecho novo começa em cada início e no dia seguinte a cada fim
+        cortes = np.unique(np.concatenate([inicio, fim[~aberta] + np.timedelta64(1, "D")]))
+        em_vigor = (inicio[None, :] <= cortes[:, None]) & (aberta[None, :] | (fim[None, :] >= cortes[:, None]))
+        algum = em_vigor.any(axis=1)
+        vencedora = (b - a) - 1 - np.argmax(em_vigor[:, ::-1], axis=1)
+        # O trecho vai até a véspera do corte seguinte; o último só pode ser de uma regra aberta
+        fins = np.append(cortes[1:] - np.timedelta64(1, "D"), np.datetime64("NaT"))
+        posicoes.append(a + vencedora[algum])
+        comecos.append(cortes[algum])
+        terminos.append(fins[algum])
+    trechos = ordenadas.iloc[np.concatenate(posicoes)].assign(inicio=np.concatenate(comecos), fim=np.concatenate(terminos))
+    return trechos.sort_values("inicio", kind="stable")
+
+
+def resolver(registros, tabela):
+    """Preço e preço reduzido de cada registro (data, local, grupo); NaN onde nenhuma regra vale.
+
+    Um merge_asof por nível de especificidade, do mais específico ao geral, sobre as vigências
+    do nível (ver `vigencias`): cada um só preenche o que os anteriores deixaram sem preço.
+    """
+    esquerda = pd.DataFrame({
+        "data": pd.to_datetime(registros["data"]).to_numpy().astype("datetime64[ns]"),
+        "local": registros["local"].astype(str).to_numpy(),
+        "grupo": registros["grupo"].astype(str).to_numpy(),
+        "posicao": np.arange(len(registros)),
+    }).sort_values("data", kind="stable")
+    preco = np.full(len(registros), np.nan)
+    preco_red = np.full(len(registros), np.nan)
+
+    for chaves in NIVEIS:
+        livres = [c for c in ("grupo", "local") if c not in chaves]
+        regras = tabela
+        for coluna in ("grupo", "local"):
+            regras = regras[(regras[coluna] == CORINGA) == (coluna in livres)]
+        pendentes = esquerda[np.isnan(preco[esquerda["posicao"].to_numpy()])]
+        if regras.empty or pendentes.empty:
+            continue
+        regras = vigencias(regras, chaves)
+        achados = pd.merge_asof(pendentes, regras.drop(columns=livres), left_on="data", right_on="inicio",
+                                by=list(chaves) or None, direction="backward")
+        vigente = achados["preco"].notna() & (achados["fim"].isna() | (achados["data"] <= achados["fim"]))
+        posicoes = achados.loc[vigente, "posicao"].to_numpy()
+        preco[posicoes] = achados.loc[vigente, "preco"].to_numpy()
+        preco_red[posicoes] = achados.loc[vigente, "preco_red"].to_numpy()
+    return preco, preco_red
+
+
+def aplicar_precos(diario, tabela):
+    """Colunas de custo do cubo diário: custo pela tabela e bombonas que ficam com o preço do simulador."""
+    preco, preco_red = resolver(diario, tabela)
+    bombonas = diario["bombonas"].to_numpy(dtype="float64")
+    com_preco = ~np.isnan(preco)
+    return diario.assign(
+        custo_tabela=np.where(com_preco, bombonas * np.nan_to_num(preco), 0.0),
+        custo_red_tabela=np.where(com_preco, bombonas * np.nan_to_num(preco_red), 0.0),
+        bombonas_sem_preco=np.where(com_preco, 0, diario["bombonas"].to_numpy()),
+    )
+
+
+# Custos lineares no preço do simulador: parte fixa (tabela) + bombonas sem preço x preço.
+# Servem para linhas, totais (Series de somas) e matrizes, com ou sem tabela no cubo.
+def custo(tabela, preco):
+    if "bombonas_sem_preco" in tabela:
+        return tabela["custo_tabela"] + tabela["bombonas_sem_preco"] * preco
+    return tabela["bombonas"] * preco
+
+
+def custo_red(tabela, preco):
+    if "bombonas_sem_preco" in tabela:
+        return tabela["custo_red_tabela"] + tabela["bombonas_sem_preco"] * preco
+    return tabela["bombonas"] * preco
+
+
+def pesos_custo(medidas, preco, reduzido=False):
+    """Combinação linear das medidas acumuladas que dá o custo (para SomasAcumuladas)."""
+    if "bombonas_sem_preco" in medidas:
+        return {"custo_red_tabela" if reduzido else "custo_tabela": 1.0, "bombonas_sem_preco": preco}
+    return {"bombonas": preco}
@@ -0,0 +1,119 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+from acumulados import SomasAcumuladas
+from armazenamento import carregar_longo
+from cubo import medidas, montar_cubo
+from precos import caminho_precos, carregar_tabela
+
+# Snapshot publicado pelo ETL: uma pasta imutável por versão com arquivos Arrow IPC sem compressão,
+# que os processos do painel abrem com memory map (as páginas ficam no cache do SO, uma cópia só).
+# O ponteiro <csv>.snapshot.json diz qual pasta vale; trocá-lo com os.replace é a troca atômica.
+SNAPSHOTS_MANTIDOS = 2  # a atual e a anterior (processos ainda podem estar com ela mapeada)
+
+
+def caminho_ponteiro(caminho_csv):
+    return Path(caminho_csv).with_suffix(".snapshot.json")
+
+
+def pasta_snapshots(caminho_csv):
+    return Path(caminho_csv).parent / "snapshots"
+
+
+def _gravar_arrow(tabela, caminho):
+    # Um único lote por arquivo: cada coluna é um buffer contínuo, o que permite o zero-copy na leitura
+    with pa.OSFile(str(caminho), "wb") as arquivo:
+        with pa.ipc.new_file(arquivo, tabela.schema) as escritor:
+            escritor.write_table(tabela, max_chunksize=max(tabela.num_rows, 1))
+
+
+def _ler_arrow(caminho):
+    with pa.memory_map(str(caminho), "r") as mapa:
+        return pa.ipc.open_file(mapa).read_all()
+
+
+def _tabela_somas(somas):
+    dias, locais, grupos, acumulado = somas.partes()
+    forma = next(iter(acumulado.values())).shape
+    metadados = {
+        "forma": list(forma),
+        "dias": [str(d) for d in dias],
+        "locais": [str(v) for v in locais],
+        "grupos": [str(v) for v in grupos],
+    }
+    colunas = {medida: pa.array(np.ascontiguousarray(matriz).ravel()) for medida, matriz in acumulado.items()}
+    return pa.table(colunas).replace_schema_metadata({"somas": json.dumps(metadados)})
+
+
+def _somas_da_tabela(tabela):
+    metadados = json.loads(tabela.schema.metadata[b"somas"])
+    forma = tuple(metadados["forma"])
+    # to_numpy(zero_copy_only=True) devolve uma visão somente leitura sobre o arquivo mapeado
+    acumulado = {nome: tabela.column(nome).chunk(0).to_numpy(zero_copy_only=True).reshape(forma)
+                 for nome in tabela.column_names}
+    return SomasAcumuladas.de_partes(
+        np.array(metadados["dias"], dtype="datetime64[D]"),
+        np.array(metadados["locais"], dtype=object),
+        np.array(metadados["grupos"], dtype=object),
+        acumulado,
+    )
+
+
+def publicar_snapshot(caminho_csv, versao, df=None):
+    """Monta cubo mensal e somas acumuladas da `versao` e publica como snapshot Arrow.
+
+    A pasta da versão é escrita ao lado e renomeada no fim, então existir = estar completa.
+    """
+    if df is None:
+        df = carregar_longo(caminho_csv)
+    cubo = montar_cubo(df, carregar_tabela(caminho_precos(caminho_csv)))
+    somas = SomasAcumuladas(cubo["diario"], medidas(cubo["diario"]))
+
+    raiz = pasta_snapshots(caminho_csv)
+    destino = raiz / versao
+    if not destino.exists():
+        temporaria = raiz / f".{versao}.{os.getpid()}.tmp"
+        shutil.rmtree(temporaria, ignore_errors=True)
+        temporaria.mkdir(parents=True)
+        _gravar_arrow(pa.Table.from_pandas(cubo["mensal"], preserve_index=False), temporaria / "mensal.arrow")
+        _gravar_arrow(_tabela_somas(somas), temporaria / "somas.arrow")
+        os.replace(temporaria, destino)
+
+    ponteiro = caminho_ponteiro(caminho_csv)
+    temporario = ponteiro.with_suffix(".tmp")
+    temporario.write_text(json.dumps({"versao": versao, "pasta": destino.name}), encoding="utf-8")
+    os.replace(temporario, ponteiro)
+    _limpar_antigos(raiz, destino.name)
+    return destino
+
+
+def _limpar_antigos(raiz, atual):
+    pastas = sorted((p for p in raiz.iterdir() if p.is_dir() and not p.name.startswith(".")),
+                    key=lambda p: p.stat().st_mtime, reverse=True)
+    antigas = [p for p in pastas if p.name != atual][SNAPSHOTS_MANTIDOS - 1:]
+    for pasta in antigas:
+        # No Windows um arquivo mapeado não pode ser apagado; fica para a próxima publicação
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def abrir_snapshot(caminho_csv, versao=None):
+    """Abre o snapshot publicado (memory map) se ele for da `versao` pedida; senão devolve None."""
+    try:
+        ponteiro = json.loads(caminho_ponteiro(caminho_csv).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if versao is not None and ponteiro.get("versao") != versao:
+        return None
+
+    pasta = pasta_snapshots(caminho_csv) / ponteiro["pasta"]
+    try:
+        mensal = _ler_arrow(pasta / "mensal.arrow").to_pandas(split_blocks=True)
+        somas = _somas_da_tabela(_ler_arrow(pasta / "somas.arrow"))
+    except (OSError, pa.ArrowInvalid, KeyError):
+        return None
+    return {"versao": ponteiro["versao"], "mensal": mensal, "somas": somas}
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+from rotulos import mes_grafico
+
+# Resolução dos gráficos: o que vai para o navegador fica limitado em pontos e em séries,
+# qualquer que seja o tamanho do histórico (clientes fracos nos postos de enfermagem).
+MAX_PONTOS = 120     # pontos por série; acima disso dia -> semana -> mês
+MAX_SERIES = 8       # séries por gráfico; as menores viram "OUTROS"
+MAX_ROTULOS = 240    # acima disso os valores deixam de ser escritos ponto a ponto
+ROTULO_OUTROS = "OUTROS"
+NOMES_FREQUENCIA = {"D": "dia", "W": "semana", "ME": "mês"}
+
+
+def frequencia(inicio, fim, max_pontos=MAX_PONTOS):
+    """Dia, semana ou mês: a mais fina que mantém o intervalo em até `max_pontos` pontos."""
+    dias = (pd.Timestamp(fim) - pd.Timestamp(inicio)).days + 1
+    if dias <= max_pontos:
+        return "D"
+    if dias / 7 <= max_pontos:
+        return "W"
+    return "ME"
+
+
+def intervalos(inicio, fim, freq):
+    """Início e fim de cada dia, semana (fechando no domingo) ou mês entre `inicio` e `fim`."""
+    inicio, fim = pd.Timestamp(inicio).normalize(), pd.Timestamp(fim).normalize()
+    fins = pd.date_range(inicio, fim, freq="W-SUN" if freq == "W" else freq)
+    if len(fins) == 0 or fins[-1] < fim:
+        fins = fins.append(pd.DatetimeIndex([fim]))
+    inicios = pd.DatetimeIndex([inicio]).append(fins[:-1] + pd.Timedelta(days=1))
+    return inicios, fins
+
+
+def rotulos_intervalos(inicios, freq):
+    if freq == "ME":
+        return mes_grafico(pd.Series(inicios)).astype(str).tolist()
+    return [f"{'Sem ' if freq == 'W' else ''}{d:%d/%m/%y}" for d in inicios]
+
+
+def serie_adaptativa(somas, medida, selecao, max_pontos=MAX_PONTOS):
+    """Totais de `medida` no intervalo visível do recorte, na resolução escolhida por `frequencia`.
+
+    Devolve (DataFrame com inicio/rotulo/valor, frequência) ou (None, None) se o recorte estiver vazio.
+    """
+    inicio, fim = somas.primeiro_dia(**selecao), somas.ultimo_dia(**selecao)
+    if inicio is None:
+        return None, None
+    freq = frequencia(inicio, fim, max_pontos)
+    inicios, fins = intervalos(inicio, fim, freq)
+    valores = somas.somas_por_intervalo(medida, inicios, fins, **selecao)
+    return pd.DataFrame({
+        "inicio": inicios,
+        "rotulo": rotulos_intervalos(inicios, freq),
+        medida: valores,
+    }), freq
+
+
+def agrupar_outros(mensal, dimensao, n=MAX_SERIES, medida="bombonas"):
+    """Mantém as n-1 maiores categorias de `dimensao` (por `medida`) e junta o resto em "OUTROS"."""
+    totais = mensal.groupby(dimensao, observed=True)[medida].sum()
+    if len(totais) <= n:
+        return mensal
+    manter = totais.nlargest(n - 1).index
+    valores = mensal[dimensao].astype(object).where(mensal[dimensao].isin(manter), ROTULO_OUTROS)
+    return mensal.assign(**{dimensao: valores.astype("category")})
+
+
+def tipar_arrays(fig):
+    """x/y numéricos como arrays numpy: o Plotly serializa em binário (typed arrays) em vez de listas."""
+    for trace in fig.data:
+        for eixo in ("x", "y"):
+            valores = getattr(trace, eixo, None)
+            if isinstance(valores, (list, tuple)) and valores:
+                array = np.asarray(valores)
+                if array.dtype.kind in "iuf":
+                    trace.update({eixo: array})
+    return fig
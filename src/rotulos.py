@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+MESES_PT = {
+    1: 'Janeiro', 2: 'Fevereiro', 3: 'Março', 4: 'Abril',
+    5: 'Maio', 6: 'Junho', 7: 'Julho', 8: 'Agosto',
+    9: 'Setembro', 10: 'Outubro', 11: 'Novembro', 12: 'Dezembro'
+}
+
+MESES_ABREV = {
+    1: 'Jan', 2: 'Fev', 3: 'Mar', 4: 'Abr',
+    5: 'Mai', 6: 'Jun', 7: 'Jul', 8: 'Ago',
+    9: 'Set', 10: 'Out', 11: 'Nov', 12: 'Dez'
+}
+
+ORDEM_MESES = [MESES_PT[i] for i in range(1, 13)]
+
+
+# --- Versões escalares (uma data por chamada) ---
+def formata_mes_grafico(x):
+    try:
+        if pd.isna(x): return "Data Inválida"
+        mes_abrev = MESES_ABREV[x.month]
+        ano_curto = str(x.year)[-2:]
+        return f"{mes_abrev}.{ano_curto}"
+    except:
+        return f"{x.month}/{x.year}"
+
+def formata_mes_abrev_ano(x):
+    try:
+        if pd.isna(x): return ""
+        ano_curto = str(x.year)[-2:]
+        return f"{MESES_ABREV[x.month]}.{ano_curto}"
+    except:
+        return ""
+
+
+# --- Versão vetorizada: código de período -> tabela de rótulos ---
+def rotulo_periodo(ano, mes):
+    return f"{MESES_ABREV[mes]}.{str(ano)[-2:]}"
+
+
+def codigos_periodo(datas):
+    """Código inteiro do mês (ano * 12 + mês - 1); datas inválidas viram -1."""
+    datas = pd.to_datetime(pd.Series(datas))
+    codigos = (datas.dt.year * 12 + datas.dt.month - 1).fillna(-1)
+    return codigos.to_numpy(dtype="int64")
+
+
+def rotulos_mes(datas):
+    """Deriva mes_ano_ref, mes_grafico e mes_nome como categorias ordenadas.
+
+    O texto é montado uma vez por mês distinto; cada linha recebe só o código
+    do seu mês, então o custo por linha é uma busca binária em numpy.
+    """
+    indice = datas.index if isinstance(datas, pd.Series) else None
+    codigos = codigos_periodo(datas)
+    validos = codigos >= 0
+    periodos = np.unique(codigos[validos])
+
+    # Tabela de consulta: um rótulo por período distinto, em ordem cronológica
+    rotulos = pd.Index([rotulo_periodo(c // 12, c % 12 + 1) for c in periodos])
+    categorias = rotulos.unique()
+    por_periodo = categorias.get_indexer(rotulos)
+    posicao = np.where(validos, por_periodo[np.searchsorted(periodos, codigos)] if len(periodos) else -1, -1)
+    mes_ano = pd.Categorical.from_codes(posicao, categories=categorias, ordered=True)
+
+    mes_nome = pd.Categorical.from_codes(np.where(validos, codigos % 12, -1), categories=ORDEM_MESES, ordered=True)
+    return pd.DataFrame({
+        "mes_ano_ref": mes_ano,
+        "mes_grafico": mes_ano,
+        "mes_nome": mes_nome,
+    }, index=indice)
+
+
+def mes_grafico(datas):
+    """Rótulo de eixo "Jan.25" para uma série de datas (equivalente vetorizado de formata_mes_grafico)."""
+    return rotulos_mes(datas)["mes_grafico"]
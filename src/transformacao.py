@@ -1,14 +1,33 @@
-import pandas as pd
+import argparse
+import glob
+import io
+import json
 import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
 
-print("🔄 Iniciando processamento...")
-caminho_excel = "dados/BD_Bombonas.xlsx"
+from armazenamento import (acrescentar_parquet, caminho_parquet, caminho_temporario, gravar_csv, ler_parquet,
+                           salvar_base, salvar_parquet, trocar_pasta)
+from indicadores import materializar, pasta_indicadores
+from precos import caminho_precos, versao_com_precos
+from publicacao import publicar_snapshot
+from versionamento import gravar_versao, versao_dados
 
-df = pd.read_excel(caminho_excel)
-df.columns = df.columns.str.strip().str.upper()
+try:
+    import resource  # só existe em Unix; no Windows o pico de memória fica sem relatório
+except ImportError:
+    resource = None
 
-# DEBUG: Isso vai mostrar no seu terminal quais colunas o Python está lendo
-print(f"📋 Colunas encontradas no Excel: {df.columns.tolist()}")
+CAMINHO_EXCEL = "dados/BD_Bombonas.xlsx"
+NOVO_ARQUIVO = "dados/bombonas_v2.csv"
+# Referência congelada do teste de regressão: a planilha de exemplo e a saída da versão antiga (iterrows)
+PASTA_FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+REFERENCIA_EXCEL = PASTA_FIXTURES / "BD_Bombonas.xlsx"
+REFERENCIA_CSV = PASTA_FIXTURES / "bombonas_v2_iterrows.csv"
 
 # MAPEAMENTO RESTRITO (A1 FOI BANIDO DAQUI)
 grupos = {
@@ -19,38 +38,472 @@ grupos = {
     "E":        ("BOMBONAS GRUPO E",        "PESO GRUPO E")
 }
 
-registros = []
-
-for index, row in df.iterrows():
-    data_row = pd.to_datetime(row["DATA"], errors='coerce')
-    if pd.isna(data_row): continue
-    
-    local_row = str(row["LOCAL"]).strip().upper()
-    
-    for nome_grupo, (col_qtd, col_peso) in grupos.items():
-        # Usamos .get() com valor padrão 0 para evitar erros
-        qtd = row.get(col_qtd, 0)
-        peso = row.get(col_peso, 0)
-        
-        if pd.isna(qtd): qtd = 0
-        if pd.isna(peso): peso = 0
-        
-        if qtd > 0 or peso > 0:
-            registros.append({
-                "data": data_row,
-                "local": local_row,
-                "grupo": nome_grupo,
-                "bombonas": qtd,
-                "peso": peso
-            })
-
-df_final = pd.DataFrame(registros)
-
-# GARANTIA EXTRA: Remove qualquer linha que tenha 'A1' na coluna grupo
-df_final = df_final[df_final['grupo'] != 'A1']
+COLUNAS_LONGAS = ["data", "local", "grupo", "bombonas", "peso"]
+TAMANHO_BLOCO = 50_000
+
+
+def ler_planilha(caminho_excel=CAMINHO_EXCEL):
+    df = pd.read_excel(caminho_excel)
+    df.columns = df.columns.str.strip().str.upper()
+    return df
+
+
+def _coluna_numerica(df, coluna):
+    # Coluna ausente vale 0, igual ao antigo row.get(coluna, 0)
+    if coluna not in df.columns:
+        return np.zeros(len(df), dtype="int64")
+    return df[coluna].fillna(0).to_numpy()
+
+
+def _locais(serie):
+    # LOCAL em branco vira "NAN", como o str(row["LOCAL"]) do iterrows antigo; o astype(str) do pandas 3
+    # mantém o NaN (e no streaming a célula vazia chega como None)
+    return serie.fillna("nan").astype(str).str.strip().str.upper()
+
+
+def transformar(df):
+    """Converte a planilha larga (uma linha por DATA/LOCAL) no formato longo data,local,grupo,bombonas,peso."""
+    datas = pd.to_datetime(df["DATA"], errors='coerce')
+    validas = datas.notna().to_numpy()
+    df = df.loc[validas]
+    datas = datas[validas]
+
+    locais = _locais(df["LOCAL"]).to_numpy()
+    nomes_grupos = np.array(list(grupos.keys()), dtype=object)
+
+    # Matrizes linhas x grupos; o ravel em ordem C mantém a ordem antiga (linha, depois grupo)
+    qtd = np.column_stack([_coluna_numerica(df, col_qtd) for col_qtd, _ in grupos.values()])
+    peso = np.column_stack([_coluna_numerica(df, col_peso) for _, col_peso in grupos.values()])
+    manter = ((qtd > 0) | (peso > 0)).ravel()
+
+    n_grupos = len(grupos)
+    df_final = pd.DataFrame({
+        "data": np.repeat(datas.to_numpy(), n_grupos)[manter],
+        "local": np.repeat(locais, n_grupos)[manter],
+        "grupo": np.tile(nomes_grupos, len(df))[manter],
+        "bombonas": qtd.ravel()[manter],
+        "peso": peso.ravel()[manter],
+    }, columns=COLUNAS_LONGAS)
+
+    # GARANTIA EXTRA: Remove qualquer linha que tenha 'A1' na coluna grupo
+    return df_final[df_final['grupo'] != 'A1'].reset_index(drop=True)
+
+
+def comparar_com_referencia(df_final, caminho_referencia=REFERENCIA_CSV):
+    """Teste de regressão: compara a saída com um CSV longo de referência. Retorna a lista de divergências."""
+    referencia = pd.read_csv(caminho_referencia)
+    atual = pd.read_csv(io.StringIO(df_final.to_csv(index=False)))
+
+    divergencias = []
+    if list(atual.columns) != list(referencia.columns):
+        divergencias.append(f"colunas: {list(atual.columns)} != {list(referencia.columns)}")
+    elif len(atual) != len(referencia):
+        divergencias.append(f"linhas: {len(atual)} != {len(referencia)}")
+    else:
+        for col in referencia.columns:
+            if not atual[col].equals(referencia[col]):
+                primeira = int((atual[col] != referencia[col]).to_numpy().argmax())
+                divergencias.append(f"coluna '{col}' difere a partir da linha {primeira + 2}")
+    return divergencias
+
+
+# ==================================================
+# MODO INCREMENTAL
+# ==================================================
+def caminho_estado(saida):
+    return Path(saida).with_suffix(".estado.json")
+
+
+def somas_hash_por_data(df):
+    """Soma (módulo 2**64) dos hashes das linhas por DATA; somas de blocos diferentes se acumulam."""
+    datas = pd.to_datetime(df["DATA"], errors='coerce').dt.normalize()
+    validas = datas.notna()
+    numericas = [c for par in grupos.values() for c in par if c in df.columns]
+    conteudo = df.loc[validas, ["LOCAL"] + numericas].copy()
+    conteudo["LOCAL"] = _locais(conteudo["LOCAL"])
+    # float64 fixo: o hash não pode depender do tipo que o leitor inferiu (int num bloco, float no outro)
+    conteudo[numericas] = conteudo[numericas].apply(pd.to_numeric, errors="coerce").fillna(0).astype("float64")
+    hash_linhas = pd.util.hash_pandas_object(conteudo, index=False)
+    return hash_linhas.groupby(datas[validas]).sum()
+
+
+def formatar_hashes(por_data):
+    return {d.strftime("%Y-%m-%d"): format(int(h), "016x") for d, h in sorted(por_data.items())}
+
+
+def hashes_por_data(df):
+    """Hash do conteúdo da planilha por DATA (soma dos hashes das linhas, independe da ordem)."""
+    return formatar_hashes(somas_hash_por_data(df))
+
+
+def salvar_estado(saida, hashes):
+    estado = {"hashes": hashes}
+    temporario = caminho_temporario(caminho_estado(saida))
+    temporario.write_text(json.dumps(estado, indent=1, ensure_ascii=False), encoding="utf-8")
+    os.replace(temporario, caminho_estado(saida))
+
+
+def ler_estado(saida):
+    caminho = caminho_estado(saida)
+    if not caminho.exists() or not Path(saida).exists():
+        return None
+    return json.loads(caminho.read_text(encoding="utf-8"))
+
+
+def datas_afetadas(estado, hashes):
+    """Separa as datas a reprocessar em novas (depois da última já processada) e históricas alteradas/removidas.
+
+    A marca d'água é a última DATA do estado. Uma marca por LOCAL não pouparia nada: o CSV é
+    ordenado por data, então um dia atrasado de um LOCAL entra no meio dele de qualquer jeito.
+    """
+    anteriores = estado["hashes"]
+    mudaram = {d for d, h in hashes.items() if anteriores.get(d) != h}
+    removidas = set(anteriores) - set(hashes)
+    ultima = max(anteriores, default="")
+    novas = {d for d in mudaram if d > ultima}
+    return novas, (mudaram - novas) | removidas
+
+
+def atualizar_parquet(df_delta, afetadas, destino):
+    """Regrava só as partições ano/mês que contêm datas afetadas."""
+    meses = {(int(d[:4]), int(d[5:7])) for d in afetadas}
+    if not Path(destino).exists():
+        return False
+    df_atual = ler_parquet(destino, particoes=sorted(meses))
+    manter = ~df_atual["data"].dt.strftime("%Y-%m-%d").isin(afetadas)
+    df_meses = pd.concat([df_atual[manter], df_delta], ignore_index=True).sort_values("data", kind="stable")
+    salvar_parquet(df_meses, destino, particoes=meses)
+    return True
+
+
+def executar_incremental(df, saida, publicar=None):
+    """Transforma só as datas novas ou alteradas e faz append/upsert no CSV longo. Retorna (novas, alteradas)."""
+    hashes = hashes_por_data(df)
+    estado = ler_estado(saida)
+    if estado is None:
+        df_final = transformar(df)
+        salvar_base(df_final, saida)
+        salvar_estado(saida, hashes)
+        gravar_versao(saida, hashes, publicar)
+        return None
+
+    novas, alteradas = datas_afetadas(estado, hashes)
+    afetadas = novas | alteradas
+    if not afetadas:
+        return novas, alteradas
+
+    datas_planilha = pd.to_datetime(df["DATA"], errors='coerce').dt.strftime("%Y-%m-%d")
+    df_delta = transformar(df[datas_planilha.isin(afetadas)])
+
+    tamanho_anterior = Path(saida).stat().st_size
+    try:
+        if not alteradas:
+            # Caso comum: só dias novos no fim da série -> append puro, sem reescrever o histórico
+            df_delta.to_csv(saida, mode="a", header=False, index=False)
+        else:
+            df_atual = pd.read_csv(saida, parse_dates=["data"])
+            manter = ~df_atual["data"].dt.strftime("%Y-%m-%d").isin(afetadas)
+            df_final = pd.concat([df_atual[manter], df_delta], ignore_index=True)
+            df_final = df_final.sort_values("data", kind="stable").reset_index(drop=True)
+            gravar_csv(df_final, saida)
+
+        if not atualizar_parquet(df_delta, afetadas, caminho_parquet(saida)):
+            salvar_parquet(pd.read_csv(saida), caminho_parquet(saida))
+        salvar_estado(saida, hashes)
+    except BaseException:
+        if not alteradas:
+            # O append é no próprio CSV: sem o estado novo as linhas voltariam em dobro na próxima execução
+            with open(saida, "r+b") as arquivo:
+                arquivo.truncate(tamanho_anterior)
+        raise
+    gravar_versao(saida, hashes, publicar)
+    return novas, alteradas
+
+
+# ==================================================
+# MODO STREAMING (planilhas grandes, várias abas)
+# ==================================================
+def pico_memoria_mb():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux informa em KB
+
+
+def _cabecalho(linha):
+    return [str(c).strip().upper() if c is not None else f"UNNAMED: {i}" for i, c in enumerate(linha)]
+
+
+def ler_blocos(caminho_excel=CAMINHO_EXCEL, tamanho_bloco=TAMANHO_BLOCO, abas=None):
+    """Lê as abas linha a linha (openpyxl read_only) e entrega DataFrames de até `tamanho_bloco` linhas.
+
+    Cada aba tem o próprio cabeçalho na primeira linha; aba sem coluna LOCAL (uma aba
+    por unidade) usa o nome da aba como LOCAL.
+    """
+    from openpyxl import load_workbook
+
+    livro = load_workbook(caminho_excel, read_only=True, data_only=True)
+    try:
+        for nome in abas or livro.sheetnames:
+            linhas = livro[nome].iter_rows(values_only=True)
+            cabecalho = _cabecalho(next(linhas, ()))
+            if "DATA" not in cabecalho:
+                print(f"⚠️ Aba '{nome}' sem coluna DATA, ignorada")
+                continue
+
+            bloco = []
+            for linha in linhas:
+                bloco.append(linha)
+                if len(bloco) == tamanho_bloco:
+                    yield nome, _montar_bloco(bloco, cabecalho, nome)
+                    bloco = []
+            if bloco:
+                yield nome, _montar_bloco(bloco, cabecalho, nome)
+    finally:
+        livro.close()
+
+
+def _montar_bloco(linhas, cabecalho, nome_aba):
+    df = pd.DataFrame(linhas)
+    extras = [f"UNNAMED: {i}" for i in range(len(cabecalho), df.shape[1])]
+    df.columns = (cabecalho + extras)[:df.shape[1]]
+    if "LOCAL" not in df.columns:
+        df["LOCAL"] = nome_aba
+    return df
+
+
+def executar_streaming(caminho_excel, saida, tamanho_bloco=TAMANHO_BLOCO, abas=None, publicar=None):
+    """Transforma e grava bloco a bloco (CSV em append, Parquet um arquivo por bloco).
+
+    Só o bloco atual fica em memória; os hashes do modo incremental são acumulados
+    por bloco, então a próxima execução --incremental continua de onde esta parou.
+    """
+    # Os blocos vão para CSV e pasta Parquet temporários, trocados só no fim: se a leitura ou a
+    # gravação falhar no meio, os dados anteriores continuam inteiros
+    destino = caminho_parquet(saida)
+    pasta_blocos, csv_blocos = caminho_temporario(destino), caminho_temporario(saida)
+    shutil.rmtree(pasta_blocos, ignore_errors=True)
+    somas_hash = {}
+    resumo = {"blocos": 0, "linhas_lidas": 0, "linhas_gravadas": 0, "abas": []}
+
+    try:
+        for numero, (aba, df) in enumerate(ler_blocos(caminho_excel, tamanho_bloco, abas)):
+            if aba not in resumo["abas"]:
+                resumo["abas"].append(aba)
+            df_bloco = transformar(df)
+            # Tipos fixos por bloco: o CSV não pode alternar entre 28 e 28.0 conforme o bloco
+            df_bloco["bombonas"] = df_bloco["bombonas"].astype("float64").round().astype("int64")
+            df_bloco["peso"] = df_bloco["peso"].astype("float64")
+
+            df_bloco.to_csv(csv_blocos, mode="w" if numero == 0 else "a", header=numero == 0, index=False)
+            acrescentar_parquet(df_bloco, pasta_blocos, numero)
+
+            for d, h in somas_hash_por_data(df).items():
+                somas_hash[d] = (somas_hash.get(d, 0) + int(h)) % 2**64
+
+            resumo["blocos"] += 1
+            resumo["linhas_lidas"] += len(df)
+            resumo["linhas_gravadas"] += len(df_bloco)
+            print(f"   bloco {numero + 1} ({aba}): {len(df)} linhas -> {len(df_bloco)} registros")
+
+        if resumo["blocos"] == 0:
+            pd.DataFrame(columns=COLUNAS_LONGAS).to_csv(csv_blocos, index=False)
+        pasta_blocos.mkdir(parents=True, exist_ok=True)
+        trocar_pasta(pasta_blocos, destino)
+        os.replace(csv_blocos, saida)
+    finally:
+        shutil.rmtree(pasta_blocos, ignore_errors=True)
+        csv_blocos.unlink(missing_ok=True)
+    hashes = formatar_hashes(somas_hash)
+    salvar_estado(saida, hashes)
+    gravar_versao(saida, hashes, publicar)
+    resumo["pico_memoria_mb"] = pico_memoria_mb()
+    return resumo
+
+
+# ==================================================
+# MODO LOTE (uma planilha por unidade, em paralelo)
+# ==================================================
+def listar_planilhas(entrada):
+    """Planilhas de uma pasta (*.xlsx) ou de um padrão glob, em ordem de nome."""
+    if Path(entrada).is_dir():
+        caminhos = Path(entrada).glob("*.xlsx")
+    else:
+        caminhos = map(Path, glob.glob(entrada))
+    # "~$..." são arquivos de trava do Excel aberto
+    return sorted(p for p in caminhos if p.is_file() and not p.name.startswith("~$"))
+
+
+def _processar_planilha(caminho):
+    # Roda num processo separado: devolve só o que o processo principal precisa juntar
+    df = ler_planilha(caminho)
+    return transformar(df), somas_hash_por_data(df)
+
+
+def consolidar(resultados):
+    """Junta as saídas na ordem das planilhas sem contar duas vezes o mesmo (data, local, grupo).
+
+    Dentro de uma planilha várias linhas do mesmo dia/local/grupo são coletas distintas e
+    ficam todas. Quando o mesmo dia/local/grupo aparece em mais de uma planilha, valem só
+    as linhas da última em ordem de nome. Retorna (df, repetidos, conflitos): linhas
+    descartadas e chaves cujos totais divergiam entre planilhas.
+    """
+    partes = [df.assign(_ordem=i) for i, df in enumerate(resultados)]
+    df = pd.concat(partes, ignore_index=True)
+    chave = ["data", "local", "grupo"]
+
+    ultima = df.groupby(chave)["_ordem"].transform("max")
+    final = df[df["_ordem"] == ultima]
+    repetidos = len(df) - len(final)
+
+    por_planilha = df.groupby(chave + ["_ordem"])[["bombonas", "peso"]].sum().reset_index()
+    distintos = por_planilha.groupby(chave)[["bombonas", "peso"]].nunique()
+    conflitos = int((distintos > 1).any(axis=1).sum())
+
+    final = final.sort_values(["data", "local", "_ordem"], kind="stable").drop(columns="_ordem")
+    return final.reset_index(drop=True), repetidos, conflitos
+
+
+def executar_lote(entrada, saida, processos=None, publicar=None):
+    planilhas = listar_planilhas(entrada)
+    if not planilhas:
+        return None
+
+    # executor.map devolve na ordem de entrada, então o resultado não depende de qual processo termina antes
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        resultados = list(executor.map(_processar_planilha, planilhas))
+
+    for caminho, (df_final, _) in zip(planilhas, resultados):
+        print(f"   {caminho.name}: {len(df_final)} registros")
+
+    df_final, repetidos, conflitos = consolidar([df for df, _ in resultados])
+    somas_hash = pd.concat([somas for _, somas in resultados]).groupby(level=0).sum()
+    hashes = formatar_hashes(somas_hash)
+
+    salvar_base(df_final, saida)
+    salvar_estado(saida, hashes)
+    gravar_versao(saida, hashes, publicar)
+    return {"planilhas": len(planilhas), "registros": len(df_final), "repetidos": repetidos, "conflitos": conflitos}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transforma o BD_Bombonas.xlsx no formato longo usado pelo painel.")
+    parser.add_argument("--excel", default=CAMINHO_EXCEL)
+    parser.add_argument("--saida", default=NOVO_ARQUIVO)
+    parser.add_argument("--verificar", action="store_true",
+                        help="Não grava nada; compara o resultado com a referência (padrão: planilha de "
+                             "exemplo x saída congelada da versão antiga, em tests/fixtures)")
+    parser.add_argument("--referencia", help="CSV longo de referência do --verificar (usa a planilha de --excel)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Processa só as datas novas ou alteradas desde a última execução")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Lê a planilha em blocos (todas as abas) e grava a saída bloco a bloco")
+    parser.add_argument("--tamanho-bloco", type=int, default=TAMANHO_BLOCO,
+                        help="Linhas da planilha por bloco no modo --streaming")
+    parser.add_argument("--abas", nargs="+", help="Abas lidas no modo --streaming (padrão: todas)")
+    parser.add_argument("--lote", metavar="ENTRADA",
+                        help="Pasta ou padrão glob de planilhas; processa todas em paralelo e consolida")
+    parser.add_argument("--processos", type=int, help="Processos do modo --lote (padrão: núcleos da máquina)")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="Publica também o snapshot Arrow compartilhado (memory map) lido pelo painel")
+    parser.add_argument("--indicadores", action="store_true",
+                        help="Materializa em seguida as tabelas de indicadores (indicadores.py, preços padrão)")
+    args = parser.parse_args(argv)
+    if args.streaming and (args.incremental or args.verificar):
+        parser.error("--streaming não combina com --incremental/--verificar")
+    if args.lote and (args.streaming or args.incremental or args.verificar):
+        parser.error("--lote não combina com --streaming/--incremental/--verificar")
+    if (args.snapshot or args.indicadores) and args.verificar:
+        parser.error("--snapshot/--indicadores não combinam com --verificar")
+    if args.verificar and args.referencia is None:
+        # A saída de dados/ é regravada a cada execução: comparar com ela não pega regressão nenhuma
+        args.excel, args.referencia = REFERENCIA_EXCEL, REFERENCIA_CSV
+
+    publicadas = []
+    publicar = None
+    if args.snapshot or args.indicadores:
+        def publicar(versao):
+            publicar_versao(args.saida, versao, args.snapshot, args.indicadores)
+            publicadas.append(versao)
+
+    codigo = _executar(args, publicar)
+    if codigo == 0 and publicar is not None and not publicadas:
+        # Incremental sem datas novas: a versão não muda, o pedido é publicado sobre a atual
+        publicar(versao_dados(args.saida))
+    return codigo
+
+
+def publicar_versao(saida, versao, snapshot=True, indicadores=True):
+    """Indicadores e snapshot compartilhado da `versao` nova (sem preços), antes do versao.json.
+
+    Chamado pelo gravar_versao: quando o painel enxerga a versão, o snapshot dela já existe e nenhum
+    processo precisa remontar o cubo pelo Parquet.
+    """
+    versao = versao_com_precos(versao, caminho_precos(saida))
+    if indicadores:
+        materializar(saida, versao=versao)
+        print(f"📊 Indicadores materializados em: {pasta_indicadores(saida)}")
+    if snapshot:
+        print(f"🗂️ Snapshot publicado em: {publicar_snapshot(saida, versao)}")
+
+
+def _executar(args, publicar=None):
+    print("🔄 Iniciando processamento...")
+    if args.lote:
+        resumo = executar_lote(args.lote, args.saida, args.processos, publicar)
+        if resumo is None:
+            print(f"❌ Nenhuma planilha .xlsx em {args.lote}")
+            return 1
+        print(f"✅ {resumo['planilhas']} planilhas consolidadas: {resumo['registros']} registros "
+              f"({resumo['repetidos']} repetidos descartados, {resumo['conflitos']} divergências resolvidas pela última planilha)")
+        print(f"📂 Arquivo atualizado em: {args.saida} (+ {caminho_parquet(args.saida)})")
+        return 0
+
+    if args.streaming:
+        resumo = executar_streaming(args.excel, args.saida, args.tamanho_bloco, args.abas, publicar)
+        pico = resumo["pico_memoria_mb"]
+        print(f"✅ {resumo['blocos']} blocos de {len(resumo['abas'])} aba(s): "
+              f"{resumo['linhas_lidas']} linhas lidas, {resumo['linhas_gravadas']} registros gravados")
+        print(f"📈 Pico de memória: {pico:.0f} MB" if pico is not None else "📈 Pico de memória: n/d nesta plataforma")
+        print(f"📂 Arquivo atualizado em: {args.saida} (+ {caminho_parquet(args.saida)})")
+        return 0
+
+    df = ler_planilha(args.excel)
+
+    # DEBUG: Isso vai mostrar no seu terminal quais colunas o Python está lendo
+    print(f"📋 Colunas encontradas no Excel: {df.columns.tolist()}")
+
+    if args.incremental:
+        resultado = executar_incremental(df, args.saida, publicar)
+        if resultado is None:
+            print(f"🆕 Sem estado anterior: base completa gerada em {args.saida}")
+        else:
+            novas, alteradas = resultado
+            print(f"➕ Datas novas: {len(novas)} | ✏️ Datas históricas alteradas: {len(alteradas)}")
+            for d in sorted(alteradas): print(f"   - reprocessada: {d}")
+        print(f"📂 Arquivo atualizado em: {args.saida}")
+        return 0
+
+    df_final = transformar(df)
+
+    if args.verificar:
+        divergencias = comparar_com_referencia(df_final, args.referencia)
+        if divergencias:
+            print("❌ Saída diferente da referência:")
+            for d in divergencias: print(f"   - {d}")
+            return 1
+        print(f"✅ Saída idêntica a {args.referencia} ({len(df_final)} linhas)")
+        return 0
+
+    # Parquet particionado é a base do painel; o CSV continua como exportação
+    salvar_base(df_final, args.saida)
+    hashes = hashes_por_data(df)
+    salvar_estado(args.saida, hashes)
+    gravar_versao(args.saida, hashes, publicar)
+
+    print(f"✅ Sucesso! Grupos na base final: {df_final['grupo'].unique()}")
+    print(f"📂 Arquivo atualizado em: {args.saida} (+ {caminho_parquet(args.saida)})")
+    return 0
 
-NOVO_ARQUIVO = "dados/bombonas_v2.csv"
-df_final.to_csv(NOVO_ARQUIVO, index=False)
 
-print(f"✅ Sucesso! Grupos na base final: {df_final['grupo'].unique()}")
-print(f"📂 Arquivo atualizado em: {NOVO_ARQUIVO}")
\ No newline at end of file
+if __name__ == "__main__":
+    raise SystemExit(main())
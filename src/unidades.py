@@ -0,0 +1,150 @@
+import json
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from acumulados import SomasAcumuladas
+from armazenamento import carregar_longo
+from cubo import medidas, montar_cubo
+from filtros import IndiceFiltros
+from precos import caminho_precos, carregar_tabela, versao_com_precos
+from publicacao import abrir_snapshot
+from versionamento import Snapshot, versao_dados
+
+# Várias unidades hospitalares num processo só. Cada unidade tem a sua pasta de dados
+# (dados/unidades/<unidade>/bombonas_v2.csv, com Parquet, versão, snapshot, indicadores e preços
+# ao lado, exatamente como a pasta dados/ da unidade padrão). Os dados carregados ficam num LRU
+# global limitado por orçamento de memória: unidades sem acesso recente são descarregadas.
+UNIDADE_PADRAO = "padrao"
+NOME_ARQUIVO = "bombonas_v2.csv"
+ARQUIVO_USUARIOS = "unidades.json"  # {"email do login": "unidade"}, opcional
+NOME_VALIDO = re.compile(r"[a-z0-9][a-z0-9_-]*\Z")  # \Z e não $: o $ aceita um "\n" no fim do nome
+COLUNAS_PAINEL = ["data", "local", "grupo", "bombonas", "peso"]
+DIMENSOES_FILTRO = ["periodo", "local", "grupo"]
+
+
+def pasta_unidades(pasta_dados):
+    return Path(pasta_dados) / "unidades"
+
+
+def caminho_unidade(pasta_dados, unidade):
+    """CSV de referência da unidade (os demais arquivos ficam ao lado dele)."""
+    if unidade == UNIDADE_PADRAO:
+        return Path(pasta_dados) / NOME_ARQUIVO
+    if not NOME_VALIDO.match(unidade or ""):
+        raise ValueError(f"Unidade inválida: {unidade!r}")
+    return pasta_unidades(pasta_dados) / unidade / NOME_ARQUIVO
+
+
+def _tem_dados(caminho_csv):
+    return caminho_csv.exists() or caminho_csv.with_suffix(".parquet").exists()
+
+
+def listar_unidades(pasta_dados):
+    unidades = [UNIDADE_PADRAO] if _tem_dados(Path(pasta_dados) / NOME_ARQUIVO) else []
+    raiz = pasta_unidades(pasta_dados)
+    if raiz.is_dir():
+        unidades += sorted(p.name for p in raiz.iterdir()
+                           if p.is_dir() and NOME_VALIDO.match(p.name) and _tem_dados(p / NOME_ARQUIVO))
+    return unidades
+
+
+def unidade_do_usuario(pasta_dados, email):
+    """Unidade fixa do usuário logado, pelo dados/unidades.json (None se não houver)."""
+    if not email:
+        return None
+    try:
+        usuarios = json.loads((Path(pasta_dados) / ARQUIVO_USUARIOS).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return usuarios.get(str(email).lower())
+
+
+def escolher_unidade(pasta_dados, pedida=None, email=None):
+    """Unidade da sessão: a do login (se mapeada) manda; senão a do ?unidade=; senão a padrão/primeira.
+
+    Devolve (unidade, travada): `travada` indica que veio do login e não pode ser trocada na tela.
+    """
+    do_usuario = unidade_do_usuario(pasta_dados, email)
+    if do_usuario:
+        return do_usuario, True
+    disponiveis = listar_unidades(pasta_dados)
+    pedida = str(pedida or "").strip().lower()
+    if pedida in disponiveis:
+        return pedida, False
+    return (disponiveis[0] if disponiveis else UNIDADE_PADRAO), False
+
+
+def tamanho_dados(dados):
+    """Bytes de um snapshot do painel (cubo mensal + índices + somas acumuladas)."""
+    if dados is None:
+        return 0
+    total = sum(int(df.memory_usage(deep=True).sum()) for df in dados["cubo"].values())
+    total += sum(getattr(indice, "nbytes", 0) for indice in dados["indices"].values())
+    return total + dados["somas"].nbytes
+
+
+def montar_dados(caminho_csv, versao=None, colunas=COLUNAS_PAINEL):
+    """Tudo o que depende dos dados de uma versão (cubo mensal, índice de filtros e somas), montado junto."""
+    # Snapshot publicado pelo ETL (--snapshot): cubo e somas mapeados do disco, compartilhados entre processos
+    publicado = abrir_snapshot(caminho_csv, versao)
+    if publicado is not None and not publicado["mensal"].empty:
+        mensal, somas = publicado["mensal"], publicado["somas"]
+    else:
+        df_base = carregar_longo(caminho_csv, colunas=colunas)
+        if df_base is None or df_base.empty:
+            return None
+        cubo = montar_cubo(df_base, carregar_tabela(caminho_precos(caminho_csv)))
+        # Depois das somas o cubo diário não é mais consultado: só o mensal fica no snapshot
+        mensal, somas = cubo["mensal"], SomasAcumuladas(cubo["diario"], medidas(cubo["diario"]))
+    # O diário só é consultado por intervalo de datas (somas); o índice de filtros fica no mensal
+    dados = {"cubo": {"mensal": mensal}, "indices": {"mensal": IndiceFiltros(mensal, DIMENSOES_FILTRO)}, "somas": somas}
+    # Tamanho medido uma vez por versão: é o que conta no orçamento do CacheUnidades
+    return {**dados, "nbytes": tamanho_dados(dados)}
+
+
+def novo_snapshot(caminho_csv, colunas=COLUNAS_PAINEL):
+    """Snapshot dos dados de uma unidade; a tabela de preços entra na versão (os custos são medidas do cubo)."""
+    return Snapshot(lambda: versao_com_precos(versao_dados(caminho_csv), caminho_precos(caminho_csv)),
+                    lambda versao: montar_dados(caminho_csv, versao, colunas))
+
+
+class CacheUnidades:
+    """LRU global dos dados por unidade, limitado por `orcamento` em bytes.
+
+    Cada unidade guarda um objeto (o Snapshot dela) criado por `criar()` no primeiro acesso.
+    Depois de cada uso o tamanho informado é registrado e as unidades usadas há mais tempo
+    são descarregadas até o total caber no orçamento; a unidade recém-usada nunca sai.
+    """
+
+    def __init__(self, orcamento):
+        self.orcamento = orcamento
+        self._itens = OrderedDict()  # unidade -> [objeto, bytes]
+        self._trava = threading.Lock()
+        self.descarregadas = 0
+
+    def obter(self, unidade, criar):
+        with self._trava:
+            if unidade not in self._itens:
+                self._itens[unidade] = [criar(), 0]
+            self._itens.move_to_end(unidade)
+            return self._itens[unidade][0]
+
+    def registrar(self, unidade, tamanho):
+        with self._trava:
+            if unidade in self._itens:
+                self._itens[unidade][1] = tamanho
+            while self.total() > self.orcamento and len(self._itens) > 1:
+                mais_antiga = next(iter(self._itens))
+                if mais_antiga == unidade:
+                    break
+                del self._itens[mais_antiga]
+                self.descarregadas += 1
+
+    def total(self):
+        return sum(tamanho for _, tamanho in self._itens.values())
+
+    def resumo(self):
+        with self._trava:
+            return [{"unidade": u, "mb": round(t / 2**20, 1)} for u, (_, t) in reversed(self._itens.items())]
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+def caminho_versao(caminho_csv):
+    return Path(caminho_csv).with_suffix(".versao.json")
+
+
+def gravar_versao(caminho_csv, hashes, antes=None):
+    """Grava a impressão digital do conteúdo (hash das datas da planilha). Chamar por último no ETL.
+
+    `antes(versao)` roda com a versão nova antes da troca do arquivo: o que for publicado sob ela
+    (snapshot, indicadores) já existe quando o painel enxergar a versão.
+    """
+    digest = hashlib.sha1(json.dumps(hashes, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    if antes is not None:
+        antes(digest)
+    destino = caminho_versao(caminho_csv)
+    temporario = destino.with_suffix(".tmp")
+    temporario.write_text(json.dumps({
+        "versao": digest,
+        "datas": len(hashes),
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+    }, indent=1), encoding="utf-8")
+    os.replace(temporario, destino)  # troca atômica: o painel nunca lê um arquivo pela metade
+    return digest
+
+
+def versao_dados(caminho_csv):
+    """Versão atual dos dados: a gravada pelo ETL ou, sem ela, mtime/tamanho dos arquivos."""
+    arquivo = caminho_versao(caminho_csv)
+    try:
+        return json.loads(arquivo.read_text(encoding="utf-8"))["versao"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    caminho_csv = Path(caminho_csv)
+    assinatura = []
+    for arquivo in [caminho_csv, *sorted(caminho_csv.with_suffix(".parquet").rglob("*.parquet"))]:
+        if arquivo.exists():
+            info = arquivo.stat()
+            assinatura.append(f"{arquivo.name}:{info.st_mtime_ns}:{info.st_size}")
+    return hashlib.sha1("|".join(assinatura).encode("utf-8")).hexdigest()[:16] if assinatura else None
+
+
+class Snapshot:
+    """Mantém os dados carregados de uma versão e troca por uma nova em segundo plano.
+
+    `obter()` sempre responde com o snapshot pronto; quando a versão muda, a recarga
+    roda numa thread e as sessões continuam no snapshot anterior até ela terminar.
+    Se a recarga falhar, o snapshot anterior é mantido e o erro fica em `ultimo_erro`.
+    """
+
+    def __init__(self, obter_versao, carregar):
+        self._obter_versao = obter_versao
+        self._carregar = carregar
+        self._trava = threading.Lock()
+        self._versao = None
+        self._dados = None
+        self._recarga = None
+        self._versao_com_erro = None
+        self.ultimo_erro = None
+        self.carregado_em = None
+
+    def obter(self):
+        versao = self._obter_versao()
+        with self._trava:
+            if self._dados is None:
+                self._trocar(versao, self._carregar(versao))
+            elif versao not in (self._versao, self._versao_com_erro) and self._recarga is None:
+                self._recarga = threading.Thread(target=self._recarregar, args=(versao,), daemon=True)
+                self._recarga.start()
+            return self._versao, self._dados
+
+    def _trocar(self, versao, dados):
+        self._versao, self._dados = versao, dados
+        self.carregado_em = time.time()
+        self.ultimo_erro = None
+
+    def _recarregar(self, versao):
+        try:
+            dados = self._carregar(versao)
+            with self._trava:
+                self._trocar(versao, dados)
+        except Exception as e:
+            # Não tenta de novo a mesma versão; um novo ETL gera outra versão e outra tentativa
+            self._versao_com_erro = versao
+            self.ultimo_erro = e
+        finally:
+            self._recarga = None
+
+    @property
+    def recarregando(self):
+        return self._recarga is not None
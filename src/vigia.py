@@ -0,0 +1,160 @@
+import argparse
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # sem watchdog o vigia consulta a pasta a cada --intervalo segundos
+    FileSystemEventHandler, Observer = object, None
+
+from transformacao import CAMINHO_EXCEL, NOVO_ARQUIVO
+
+# Vigia da planilha: quando o BD_Bombonas.xlsx muda, roda o ETL (com snapshot e indicadores)
+# num processo separado. O ETL grava o <csv>.versao.json por último; o painel confere esse
+# arquivo a cada rerun e troca de snapshot sozinho. Se o ETL falhar, nada é trocado.
+ESPERA_PADRAO = 5.0      # segundos sem mudança na planilha antes de processar (o Excel salva em etapas)
+INTERVALO_PADRAO = 2.0   # segundos entre consultas no modo sem watchdog
+
+
+def log(mensagem):
+    print(f"[{datetime.now():%H:%M:%S}] {mensagem}", flush=True)
+
+
+def assinatura(caminho):
+    """(mtime, tamanho) da planilha, ou None se ela não existir (o Excel às vezes apaga e recria)."""
+    try:
+        info = Path(caminho).stat()
+    except OSError:
+        return None
+    return info.st_mtime_ns, info.st_size
+
+
+def comando_etl(excel, saida):
+    script = Path(__file__).resolve().parent / "transformacao.py"
+    return [sys.executable, str(script), "--excel", str(excel), "--saida", str(saida), "--snapshot", "--indicadores"]
+
+
+class Vigia:
+    """Junta avisos de mudança e roda um ETL por vez, só depois que a planilha parar de mudar."""
+
+    def __init__(self, excel=CAMINHO_EXCEL, saida=NOVO_ARQUIVO, espera=ESPERA_PADRAO, executar=None):
+        self.excel = Path(excel)
+        self.saida = Path(saida)
+        self.espera = espera
+        self._executar = executar or (lambda: subprocess.run(comando_etl(self.excel, self.saida)).returncode)
+        self._aviso = threading.Event()
+        self._parar = threading.Event()
+        self._processada = assinatura(self.excel)
+        self.execucoes = []
+
+    def avisar(self):
+        self._aviso.set()
+
+    def parar(self):
+        self._parar.set()
+        self._aviso.set()
+
+    def _aguardar_estabilizar(self):
+        # Cada aviso novo durante a espera recomeça a contagem: várias gravações viram um ETL só
+        while not self._parar.is_set():
+            self._aviso.clear()
+            antes = assinatura(self.excel)
+            if not self._aviso.wait(self.espera) and assinatura(self.excel) == antes:
+                return antes
+
+    def rodar(self):
+        """Laço do trabalhador (rodar numa thread); termina com `parar()`."""
+        while not self._parar.is_set():
+            self._aviso.wait()
+            atual = self._aguardar_estabilizar()
+            if self._parar.is_set():
+                break
+            if atual is None or atual == self._processada:
+                continue
+            log(f"🔄 {self.excel.name} alterada; rodando o ETL...")
+            inicio = time.perf_counter()
+            try:
+                codigo = self._executar()
+            except Exception as e:
+                codigo = e
+            duracao = time.perf_counter() - inicio
+            self.execucoes.append((atual, codigo))
+            # Mesmo com falha esta gravação da planilha não é reprocessada; a próxima gravação tenta de novo
+            self._processada = atual
+            if codigo == 0:
+                log(f"✅ Dados publicados em {duracao:.1f}s; o painel troca de snapshot no próximo rerun")
+            else:
+                log(f"❌ ETL falhou ({codigo}); o painel continua com os dados anteriores")
+
+
+class _Eventos(FileSystemEventHandler):
+    def __init__(self, vigia):
+        self.vigia = vigia
+
+    def on_any_event(self, event):
+        caminhos = [getattr(event, "src_path", ""), getattr(event, "dest_path", "")]
+        if any(Path(str(c)).name == self.vigia.excel.name for c in caminhos if c):
+            self.vigia.avisar()
+
+
+def vigiar_por_consulta(vigia, intervalo):
+    ultima = assinatura(vigia.excel)
+    while not vigia._parar.wait(intervalo):
+        atual = assinatura(vigia.excel)
+        if atual != ultima:
+            ultima = atual
+            vigia.avisar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vigia a planilha e republica os dados do painel quando ela muda.")
+    parser.add_argument("--excel", default=CAMINHO_EXCEL)
+    parser.add_argument("--saida", default=NOVO_ARQUIVO)
+    parser.add_argument("--espera", type=float, default=ESPERA_PADRAO,
+                        help="Segundos sem mudança antes de rodar o ETL (agrupa salvamentos seguidos)")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_PADRAO,
+                        help="Segundos entre consultas quando o watchdog não está instalado")
+    parser.add_argument("--consulta", action="store_true", help="Força a consulta periódica mesmo com watchdog")
+    parser.add_argument("--agora", action="store_true", help="Roda o ETL uma vez ao iniciar")
+    args = parser.parse_args(argv)
+
+    vigia = Vigia(args.excel, args.saida, args.espera)
+    if args.agora:
+        vigia._processada = None
+        vigia.avisar()
+    trabalhador = threading.Thread(target=vigia.rodar, daemon=True)
+    trabalhador.start()
+
+    observador = None
+    if Observer is not None and not args.consulta:
+        observador = Observer()
+        observador.schedule(_Eventos(vigia), str(vigia.excel.resolve().parent), recursive=False)
+        observador.start()
+        log(f"👀 Vigiando {vigia.excel} (eventos do sistema de arquivos)")
+    else:
+        log(f"👀 Vigiando {vigia.excel} (consulta a cada {args.intervalo:g}s)")
+
+    try:
+        if observador is None:
+            vigiar_por_consulta(vigia, args.intervalo)
+        else:
+            while observador.is_alive():
+                observador.join(1)
+    except KeyboardInterrupt:
+        log("⏹️ Encerrando")
+    finally:
+        vigia.parar()
+        if observador is not None:
+            observador.stop()
+            observador.join()
+        trabalhador.join(timeout=5)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
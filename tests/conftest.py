@@ -0,0 +1,26 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Os módulos do painel ficam soltos em src/ e se importam pelo nome (como no app.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+
+@pytest.fixture
+def dados_longos(tmp_path):
+    """CSV + Parquet do formato longo, pequenos, numa pasta temporária (como o ETL grava)."""
+    from armazenamento import caminho_parquet, salvar_parquet
+
+    df = pd.DataFrame({
+        "data": pd.to_datetime(["2025-01-02", "2025-01-03", "2025-02-10", "2025-03-05", "2025-03-06"]),
+        "local": ["ANEXO", "HOSPITAL", "ANEXO", "HOSPITAL", "ANEXO"],
+        "grupo": ["A", "A", "E", "A", "A"],
+        "bombonas": [10, 20, 5, 8, 2],
+        "peso": [250.0, 510.0, 120.0, 200.0, 55.0],
+    })
+    caminho = tmp_path / "bombonas_v2.csv"
+    df.to_csv(caminho, index=False)
+    salvar_parquet(df, caminho_parquet(caminho))
+    return caminho
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from acumulados import SomasAcumuladas
+from cubo import montar_cubo
+
+
+@pytest.fixture(scope="module")
+def diario():
+    rng = np.random.default_rng(11)
+    n = 1500
+    df = pd.DataFrame({
+        "data": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 200, n), unit="D"),
+        "local": rng.choice(["ANEXO", "HOSPITAL", "UTI"], n),
+        "grupo": rng.choice(["A", "B", "E"], n),
+        "bombonas": rng.integers(1, 30, n),
+        "peso": rng.uniform(5, 500, n).round(2),
+    })
+    return montar_cubo(df)["diario"]
+
+
+def _esperado(diario, medida, inicio, fim, local=None, grupo=None, periodo=None):
+    """A mesma soma feita direto no cubo diário, com máscara."""
+    mascara = diario["data"].between(inicio, fim)
+    if local is not None:
+        mascara &= diario["local"].isin(local)
+    if grupo is not None:
+        mascara &= diario["grupo"].isin(grupo)
+    if periodo is not None:
+        mascara &= (diario["data"] + pd.offsets.MonthEnd(0)).isin(periodo)
+    return float(diario.loc[mascara, medida].astype("float64").sum())
+
+
+INTERVALOS = [("2025-01-01", "2025-07-19"), ("2025-02-10", "2025-02-10"), ("2025-03-15", "2025-05-02"),
+              ("2024-12-01", "2025-01-05"), ("2025-08-01", "2025-09-01")]
+RECORTES = [{}, {"local": ["UTI"]}, {"grupo": ["A", "E"], "local": ["ANEXO", "HOSPITAL"]},
+            {"periodo": [pd.Timestamp("2025-03-31"), pd.Timestamp("2025-05-31")]}, {"local": []}]
+
+
+@pytest.mark.parametrize("medida", ["bombonas", "peso"])
+@pytest.mark.parametrize("inicio,fim", INTERVALOS)
+@pytest.mark.parametrize("recorte", RECORTES)
+def test_soma_igual_a_soma_direta(diario, medida, inicio, fim, recorte):
+    somas = SomasAcumuladas(diario)
+    assert somas.soma(medida, inicio, fim, **recorte) == pytest.approx(_esperado(diario, medida, inicio, fim, **recorte))
+
+
+@pytest.mark.parametrize("recorte", RECORTES[:4])
+def test_primeiro_e_ultimo_dia(diario, recorte):
+    somas = SomasAcumuladas(diario)
+    mascara = diario["data"].notna()
+    if "local" in recorte:
+        mascara &= diario["local"].isin(recorte["local"])
+    if "grupo" in recorte:
+        mascara &= diario["grupo"].isin(recorte["grupo"])
+    if "periodo" in recorte:
+        mascara &= (diario["data"] + pd.offsets.MonthEnd(0)).isin(recorte["periodo"])
+    assert somas.primeiro_dia(**recorte) == diario.loc[mascara, "data"].min()
+    assert somas.ultimo_dia(**recorte) == diario.loc[mascara, "data"].max()
+    assert somas.ultimo_dia(local=["NAO_EXISTE"]) is None
+
+
+def test_somas_por_intervalo_e_de_partes(diario):
+    somas = SomasAcumuladas(diario)
+    inicios = pd.date_range("2025-01-01", "2025-06-01", freq="MS")
+    fins = inicios + pd.offsets.MonthEnd(0)
+    esperado = [_esperado(diario, "peso", i, f, grupo=["B"]) for i, f in zip(inicios, fins)]
+    assert somas.somas_por_intervalo("peso", inicios, fins, grupo=["B"]) == pytest.approx(esperado)
+    remontada = SomasAcumuladas.de_partes(*somas.partes())
+    assert remontada.soma("bombonas", "2025-02-01", "2025-04-30") == somas.soma("bombonas", "2025-02-01", "2025-04-30")
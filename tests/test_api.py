@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from api import Api
+from indicadores import materializar
+
+
+@pytest.fixture
+def api(dados_longos):
+    materializar(dados_longos)  # com as tabelas materializadas, as consultas sem filtro usam o atalho
+    return Api(dados_longos.parent)
+
+
+def _get(api, caminho, etag=None, **consulta):
+    status, etag, corpo = api.responder(caminho, {k: [v] for k, v in consulta.items()}, etag)
+    return status, etag, json.loads(corpo) if corpo else None
+
+
+def test_resposta_com_etag_e_304(api):
+    status, etag, corpo = _get(api, "/api/resumo")
+    assert status == 200 and etag
+    assert corpo["unidade"] == "padrao" and corpo["dados"]["total_bombonas"] == 45
+    assert _get(api, "/api/resumo", etag=etag)[:2] == (304, etag)
+    # Outra consulta, outra ETag
+    assert _get(api, "/api/resumo", etag=etag, grupo="A")[0] == 200
+
+
+def test_filtro_invalido_e_400(api):
+    assert _get(api, "/api/resumo", meta_peso="abc")[0] == 400
+    assert _get(api, "/api/resumo", ano="2025a")[0] == 400
+    assert _get(api, "/api/comparativo", medida="litros")[0] == 400
+
+
+def test_unidade_ou_rota_desconhecida_e_404(api):
+    assert _get(api, "/api/resumo", unidade="outra")[0] == 404
+    assert _get(api, "/api/nada")[0] == 404
+
+
+@pytest.mark.parametrize("rota", ["resumo", "mensal", "peso", "custo", "grupos", "locais"])
+def test_mesmo_esquema_com_e_sem_filtro(api, rota):
+    _, _, sem_filtro = _get(api, f"/api/{rota}")
+    _, _, com_filtro = _get(api, f"/api/{rota}", local="ANEXO")
+    if isinstance(sem_filtro["dados"], dict):
+        assert sem_filtro["dados"].keys() == com_filtro["dados"].keys()
+    else:
+        assert sem_filtro["dados"][0].keys() == com_filtro["dados"][0].keys()
+
+
+def test_mensal_sem_filtro_bate_com_o_calculado(api, dados_longos):
+    _, _, materializado = _get(api, "/api/mensal")
+    (dados_longos.parent / "indicadores" / "indicadores.json").unlink()
+    _, _, calculado = _get(Api(dados_longos.parent), "/api/mensal")
+    assert materializado["dados"] == calculado["dados"]
@@ -0,0 +1,58 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cenarios import avaliar, grade, sensibilidade_meta, sensibilidade_preco
+from cubo import montar_cubo
+from kpis import Parametros, resumo
+from precos import carregar_tabela
+
+TABELA = "grupo,local,inicio,fim,preco,preco_red\nA,,2025-01-01,2025-01-31,90,85\nE,HOSPITAL,2025-01-01,,130,120\n"
+
+
+@pytest.fixture(params=[None, TABELA], ids=["sem_tabela", "com_tabela"])
+def mensal(request):
+    rng = np.random.default_rng(3)
+    n = 300
+    df = pd.DataFrame({
+        "data": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 120, n), unit="D"),
+        "local": rng.choice(["ANEXO", "HOSPITAL"], n),
+        "grupo": rng.choice(["A", "B", "E"], n),
+        "bombonas": rng.integers(1, 30, n),
+        "peso": rng.uniform(10, 800, n).round(1),
+    })
+    tabela = carregar_tabela(io.StringIO(request.param)) if request.param else None
+    return montar_cubo(df, tabela)["mensal"]
+
+
+def test_grade_e_produto_cartesiano_com_base():
+    cenarios = grade(meta_peso=[20, 25], preco_estimado=[90, 100, 110], base=Parametros())
+    assert len(cenarios) == 6
+    assert set(cenarios["preco_base"]) == {Parametros().preco_base}
+    assert sorted(map(tuple, cenarios[["meta_peso", "preco_estimado"]].to_numpy())) == [
+        (m, p) for m in (20, 25) for p in (90, 100, 110)]
+
+
+def test_avaliar_igual_ao_resumo_de_cada_cenario(mensal):
+    cenarios = grade(meta_peso=[22, 25.5], preco_base=[80, 95], preco_estimado=[101, 120])
+    totais = avaliar(mensal, cenarios)
+    for linha in totais.itertuples(index=False):
+        esperado = resumo(mensal, Parametros(linha.meta_peso, linha.preco_base, linha.preco_estimado))
+        assert linha.peso_ideal == pytest.approx(esperado["peso_ideal_total"])
+        assert linha.dif_peso == pytest.approx(esperado["diferenca_peso"])
+        assert linha.custo == pytest.approx(esperado["gasto_estimado"])
+        assert linha.custo_red == pytest.approx(esperado["custo_red"])
+
+
+def test_sensibilidades(mensal):
+    meta = sensibilidade_meta(mensal, metas=[20.0, 30.0])
+    assert meta["dif_peso"].tolist() == pytest.approx(
+        [resumo(mensal, Parametros(meta_peso=m))["diferenca_peso"] for m in (20.0, 30.0)])
+    preco = sensibilidade_preco(mensal, precos=[90.0, 110.0])
+    # Com tabela o reduzido sai dos preco_red dela: a curva não é a mesma do custo
+    assert (preco["custo"] != preco["custo_red"]).all() == ("bombonas_sem_preco" in mensal)
+    for p, linha in zip((90.0, 110.0), preco.itertuples(index=False)):
+        esperado = resumo(mensal, Parametros(preco_base=p, preco_estimado=p))
+        assert (linha.custo, linha.custo_red) == pytest.approx((esperado["gasto_estimado"], esperado["custo_red"]))
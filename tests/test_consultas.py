@@ -0,0 +1,47 @@
+import pytest
+
+from consultas import MOTORES, BaseConsultas, ConsultaRecusada
+
+
+@pytest.fixture(params=MOTORES)
+def base(request, dados_longos):
+    return BaseConsultas(dados_longos, motor=request.param)
+
+
+def test_consulta_de_leitura(base):
+    resultado = base.consultar("SELECT local, SUM(bombonas) AS bombonas FROM registros GROUP BY local ORDER BY local")
+    assert resultado.to_dict("records") == [{"local": "ANEXO", "bombonas": 17}, {"local": "HOSPITAL", "bombonas": 28}]
+
+
+@pytest.mark.parametrize("sql", [
+    "DROP VIEW registros",
+    "DROP TABLE registros",
+    "CREATE TABLE x AS SELECT 1",
+    "DELETE FROM registros",
+    "SELECT 1; DROP TABLE registros",
+])
+def test_recusa_o_que_nao_e_leitura(base, sql):
+    with pytest.raises(ConsultaRecusada):
+        base.consultar(sql)
+    # A conexão é compartilhada: depois da recusa tudo continua igual para as outras sessões
+    assert base.consultar("SELECT COUNT(*) AS n FROM registros")["n"].iloc[0] == 5
+
+
+def test_duckdb_recusa_ddl(dados_longos):
+    pytest.importorskip("duckdb")
+    base = BaseConsultas(dados_longos, motor="duckdb")
+    for sql in ("CREATE TABLE x AS SELECT 1", "DROP VIEW registros", "SET enable_external_access = true"):
+        with pytest.raises(ConsultaRecusada):
+            base.consultar(sql)
+
+
+def test_particoes(dados_longos):
+    base = BaseConsultas(dados_longos, particoes=[(2025, 3)], motor="sqlite")
+    assert base.consultar("SELECT COUNT(*) AS n FROM registros")["n"].iloc[0] == 2
+
+
+def test_consulta_sem_fim_e_interrompida(base):
+    infinita = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT COUNT(*) FROM c"
+    with pytest.raises(TimeoutError):
+        base.consultar(infinita, tempo_limite=0.3)
+    assert base.consultar("SELECT COUNT(*) AS n FROM registros")["n"].iloc[0] == 5
@@ -0,0 +1,75 @@
+import itertools
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from filtros import IndiceFiltros
+
+
+@pytest.fixture(scope="module")
+def tabela():
+    rng = np.random.default_rng(7)
+    n = 2000
+    datas = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 700, n), unit="D")
+    return pd.DataFrame({
+        "periodo": datas + pd.offsets.MonthEnd(0),  # fim do mês, como no cubo mensal
+        "local": rng.choice(["ANEXO", "HOSPITAL", "UTI", "CME"], n),
+        "grupo": rng.choice(["A", "B", "E"], n),
+        "bombonas": rng.integers(0, 30, n),
+    })
+
+
+def _periodos(tabela, anos=None, meses=None):
+    """Ano/Mês da barra lateral viram a lista de períodos, como no app e na API."""
+    periodos = sorted(tabela["periodo"].unique())
+    return [p for p in periodos if (anos is None or p.year in anos) and (meses is None or p.month in meses)]
+
+
+LOCAIS = [None, ["ANEXO"], ["UTI", "CME"], ["NAO_EXISTE"]]
+ANOS = [None, {2024}, {2025}]
+MESES = [None, {1}, {6, 7, 12}]
+
+
+@pytest.mark.parametrize("local,anos,meses", list(itertools.product(LOCAIS, ANOS, MESES)))
+def test_selecao_igual_a_mascara_pandas(tabela, local, anos, meses):
+    indice = IndiceFiltros(tabela, ["periodo", "local", "grupo"])
+    periodo = None if anos is None and meses is None else _periodos(tabela, anos, meses)
+    mascara = pd.Series(True, index=tabela.index)
+    if local is not None:
+        mascara &= tabela["local"].isin(local)
+    if periodo is not None:
+        mascara &= tabela["periodo"].isin(periodo)
+    pd.testing.assert_frame_equal(indice.selecionar(periodo=periodo, local=local, grupo=None), tabela[mascara])
+    # Listas em cascata: só os grupos presentes no recorte
+    assert indice.opcoes("grupo", periodo=periodo, local=local) == sorted(tabela.loc[mascara, "grupo"].unique())
+
+
+def test_selecao_vazia(tabela):
+    indice = IndiceFiltros(tabela, ["periodo", "local", "grupo"])
+    assert indice.selecionar(local=[]).empty
+    assert indice.opcoes("grupo", local=[], periodo=None) == []
+    assert len(indice.selecionar()) == len(tabela)
+
+
+def test_cache_compartilhado_entre_threads(tabela):
+    indice = IndiceFiltros(tabela, ["periodo", "local", "grupo"], tamanho_cache=2)
+    locais = [["ANEXO"], ["UTI"], ["CME"], ["HOSPITAL"], ["ANEXO", "UTI"]]
+    esperado = {tuple(l): int(tabela["local"].isin(l).sum()) for l in locais}
+    erros = []
+
+    def consultar():
+        try:
+            for i in range(300):
+                local = locais[i % len(locais)]
+                assert len(indice.linhas(local=local)) == esperado[tuple(local)]
+        except Exception as e:  # KeyError do LRU sem trava
+            erros.append(e)
+
+    threads = [threading.Thread(target=consultar) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert erros == []
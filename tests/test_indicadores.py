@@ -0,0 +1,26 @@
+from pathlib import Path
+
+import pandas as pd
+
+from indicadores import SAIDA_DATA, SAIDA_GRUPO, materializar
+from transformacao import REFERENCIA_EXCEL, main as etl_main
+
+
+def test_materializar_atualiza_os_csvs(dados_longos):
+    materializar(dados_longos)
+    grupo = pd.read_csv(dados_longos.parent / Path(SAIDA_GRUPO).name)
+    dia = pd.read_csv(dados_longos.parent / Path(SAIDA_DATA).name)
+    assert list(grupo.columns) == ["grupo", "bombonas", "peso"]
+    assert grupo.set_index("grupo")["bombonas"].to_dict() == {"A": 40, "E": 5}
+    assert list(dia.columns) == ["data", "total_bombonas", "total_peso"]
+    assert dia["total_bombonas"].sum() == 45 and dia["total_peso"].sum() == 1135.0
+
+
+def test_etl_com_indicadores_grava_os_csvs(tmp_path):
+    saida = tmp_path / "bombonas_v2.csv"
+    etl_main(["--excel", str(REFERENCIA_EXCEL), "--saida", str(saida), "--indicadores"])
+    dados = pd.read_csv(saida)
+    grupo = pd.read_csv(tmp_path / Path(SAIDA_GRUPO).name)
+    dia = pd.read_csv(tmp_path / Path(SAIDA_DATA).name)
+    assert grupo["bombonas"].sum() == dia["total_bombonas"].sum() > 0
+    assert dia["total_peso"].sum() == dados.loc[dados["grupo"].isin(grupo["grupo"]), "peso"].sum()
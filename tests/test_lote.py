@@ -0,0 +1,53 @@
+import shutil
+
+import pandas as pd
+
+from transformacao import REFERENCIA_EXCEL, consolidar, executar_lote, ler_planilha, transformar
+
+
+def _pasta_com_planilhas(tmp_path):
+    pasta = tmp_path / "planilhas"
+    pasta.mkdir()
+    # a e b são a mesma planilha (enviada duas vezes); c corrige o peso de um dia que também está nelas
+    shutil.copy(REFERENCIA_EXCEL, pasta / "a_unidade.xlsx")
+    shutil.copy(REFERENCIA_EXCEL, pasta / "b_unidade_copia.xlsx")
+    planilha = pd.read_excel(REFERENCIA_EXCEL)
+    corrigida = planilha[planilha["DATA"] == "2025-03-10"].copy()
+    corrigida["PESO A"] = pd.to_numeric(corrigida["PESO A"], errors="coerce") + 3
+    corrigida.to_excel(pasta / "c_correcao.xlsx", index=False)
+    (pasta / "~$a_unidade.xlsx").write_bytes(b"trava do Excel")
+    return pasta
+
+
+def test_lote_deterministico_com_planilhas_repetidas(tmp_path):
+    pasta = _pasta_com_planilhas(tmp_path)
+    saidas = []
+    for processos in (1, 3, 3):
+        saida = tmp_path / f"lote_{len(saidas)}.csv"
+        resumo = executar_lote(pasta, saida, processos)
+        saidas.append(saida.read_bytes())
+    assert saidas[0] == saidas[1] == saidas[2]
+
+    completa = transformar(ler_planilha(REFERENCIA_EXCEL))
+    do_dia = completa["data"] == "2025-03-10"
+    # As duas cópias contam uma vez só; o dia corrigido vale pela última planilha
+    assert resumo["planilhas"] == 3
+    assert resumo["repetidos"] == len(completa) + do_dia.sum()
+    assert resumo["conflitos"] == (do_dia & (completa["grupo"] == "A")).sum()
+
+    final = pd.read_csv(tmp_path / "lote_0.csv", parse_dates=["data"])
+    assert len(final) == resumo["registros"] == len(completa)
+    assert final["bombonas"].sum() == completa["bombonas"].sum()
+    corrigidos = final.loc[final["data"] == "2025-03-10"].set_index(["local", "grupo"])["peso"]
+    originais = completa.loc[do_dia].set_index(["local", "grupo"])["peso"]
+    assert (corrigidos - originais).to_dict() == {("ANEXO", "A"): 3.0, ("ANEXO", "E"): 0.0,
+                                                  ("HOSPITAL DA CIDADE", "A"): 3.0}
+
+
+def test_consolidar_mantem_coletas_da_planilha_e_vale_a_ultima():
+    a = pd.DataFrame({"data": pd.to_datetime(["2025-01-01", "2025-01-01"]), "local": ["X", "X"],
+                      "grupo": ["A", "A"], "bombonas": [1, 2], "peso": [10.0, 20.0]})
+    b = a.iloc[::-1].assign(peso=[25.0, 10.0])
+    final, repetidos, conflitos = consolidar([a, b])
+    # Dentro de uma planilha as duas coletas do dia ficam; entre planilhas vale a última
+    assert final["peso"].tolist() == [25.0, 10.0] and repetidos == 2 and conflitos == 1
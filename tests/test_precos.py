@@ -0,0 +1,56 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from precos import carregar_tabela, resolver
+
+
+def _tabela(texto):
+    return carregar_tabela(io.StringIO("grupo,local,inicio,fim,preco\n" + texto))
+
+
+def _registros(datas, grupo="A", local="ANEXO"):
+    return pd.DataFrame({"data": pd.to_datetime(datas), "grupo": grupo, "local": local})
+
+
+def test_regra_vencida_nao_esconde_regra_aberta_do_mesmo_nivel():
+    tabela = _tabela("A,,2025-01-01,,100\nA,,2025-07-01,2025-09-30,80\n*,,2024-01-01,,50\n")
+    preco, _ = resolver(_registros(["2025-03-01", "2025-08-01", "2025-09-30", "2025-10-01", "2025-11-01"]), tabela)
+    np.testing.assert_array_equal(preco, [100, 80, 80, 100, 100])
+
+
+def test_sem_regra_em_vigor_cai_para_o_nivel_seguinte():
+    tabela = _tabela("A,ANEXO,2025-01-01,2025-01-31,120\nA,,2025-02-01,2025-02-28,90\n")
+    preco, _ = resolver(_registros(["2025-01-15", "2025-02-15", "2025-03-15", "2024-12-31"]), tabela)
+    np.testing.assert_array_equal(preco, [120, 90, np.nan, np.nan])
+
+
+def test_confere_com_busca_regra_a_regra():
+    rng = np.random.default_rng(0)
+    linhas = []
+    for i in range(200):
+        inicio = pd.Timestamp("2024-01-01") + pd.Timedelta(days=int(rng.integers(0, 500)))
+        fim = "" if rng.random() < 0.5 else (inicio + pd.Timedelta(days=int(rng.integers(0, 90)))).date()
+        linhas.append(f"{rng.choice(['A', 'B', '*'])},{rng.choice(['L1', 'L2', '*'])},{inicio.date()},{fim},{i + 1}")
+    tabela = _tabela("\n".join(linhas))
+    datas = pd.date_range("2023-12-01", "2025-08-01", freq="3D")
+    registros = pd.DataFrame({
+        "data": np.repeat(datas, 3),
+        "grupo": np.tile(["A", "B", "C"], len(datas)),
+        "local": np.tile(["L1", "L2", "L3"], len(datas)),
+    })
+
+    def regra_a_regra(data, grupo, local):
+        for chaves in [("grupo", "local"), ("grupo",), ("local",), ()]:
+            candidatas = tabela
+            for coluna, valor in (("grupo", grupo), ("local", local)):
+                candidatas = candidatas[candidatas[coluna] == (valor if coluna in chaves else "*")]
+            candidatas = candidatas[(candidatas["inicio"] <= data) & (candidatas["fim"].isna() | (candidatas["fim"] >= data))]
+            if len(candidatas):
+                return candidatas["preco"].iloc[-1]  # tabela ordenada por início: a mais recente
+        return np.nan
+
+    esperado = [regra_a_regra(*linha) for linha in registros[["data", "grupo", "local"]].itertuples(index=False)]
+    preco, _ = resolver(registros, tabela)
+    np.testing.assert_array_equal(preco, esperado)
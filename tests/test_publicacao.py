@@ -0,0 +1,46 @@
+import json
+
+import pandas as pd
+
+import transformacao
+from indicadores import pasta_indicadores
+from publicacao import abrir_snapshot, caminho_ponteiro
+from transformacao import REFERENCIA_EXCEL
+from versionamento import versao_dados
+
+
+def test_snapshot_e_indicadores_saem_antes_da_versao(tmp_path, monkeypatch):
+    saida = tmp_path / "bombonas_v2.csv"
+    transformacao.main(["--excel", str(REFERENCIA_EXCEL), "--saida", str(saida)])
+    anterior = versao_dados(saida)
+
+    # Planilha com um dia a mais de peso: versão nova
+    planilha = pd.read_excel(REFERENCIA_EXCEL)
+    planilha.loc[0, "PESO A"] = pd.to_numeric(planilha.loc[0, "PESO A"], errors="coerce") + 7
+    excel = tmp_path / "nova.xlsx"
+    planilha.to_excel(excel, index=False)
+
+    vistas = []
+    publicar_versao = transformacao.publicar_versao
+
+    def espiar(destino, versao, *args):
+        publicar_versao(destino, versao, *args)
+        # O painel ainda está na versão anterior, mas o que a nova precisa já foi publicado
+        vistas.append((versao_dados(destino), abrir_snapshot(destino, versao) is not None))
+
+    monkeypatch.setattr(transformacao, "publicar_versao", espiar)
+    assert transformacao.main(["--excel", str(excel), "--saida", str(saida), "--snapshot", "--indicadores"]) == 0
+
+    nova = versao_dados(saida)
+    assert vistas == [(anterior, True)] and nova != anterior
+    assert json.loads(caminho_ponteiro(saida).read_text(encoding="utf-8"))["versao"] == nova
+    assert json.loads((pasta_indicadores(saida) / "indicadores.json").read_text(encoding="utf-8"))["versao"] == nova
+
+
+def test_incremental_sem_mudanca_ainda_publica(tmp_path):
+    saida = tmp_path / "bombonas_v2.csv"
+    argv = ["--excel", str(REFERENCIA_EXCEL), "--saida", str(saida), "--incremental"]
+    transformacao.main(argv)
+    assert abrir_snapshot(saida) is None
+    transformacao.main(argv + ["--snapshot"])
+    assert abrir_snapshot(saida, versao_dados(saida)) is not None
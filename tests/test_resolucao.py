@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from acumulados import SomasAcumuladas
+from cubo import montar_cubo
+from resolucao import MAX_PONTOS, MAX_SERIES, ROTULO_OUTROS, agrupar_outros, frequencia, serie_adaptativa
+
+
+def _diario(dias, locais=("ANEXO", "UTI")):
+    datas = pd.date_range("2024-01-01", periods=dias, freq="D")
+    df = pd.DataFrame({
+        "data": datas.repeat(len(locais)),
+        "local": list(locais) * dias,
+        "grupo": "A",
+        "bombonas": 1,
+        "peso": 2.0,
+    })
+    return montar_cubo(df)["diario"]
+
+
+@pytest.mark.parametrize("dias,freq", [(1, "D"), (MAX_PONTOS, "D"), (MAX_PONTOS + 1, "W"),
+                                       (7 * MAX_PONTOS, "W"), (7 * MAX_PONTOS + 1, "ME")])
+def test_frequencia_nos_limites(dias, freq):
+    inicio = pd.Timestamp("2024-01-01")
+    assert frequencia(inicio, inicio + pd.Timedelta(days=dias - 1)) == freq
+
+
+@pytest.mark.parametrize("dias", [MAX_PONTOS, MAX_PONTOS + 1, 7 * MAX_PONTOS + 1])
+def test_serie_adaptativa_cabe_em_max_pontos_e_preserva_o_total(dias):
+    somas = SomasAcumuladas(_diario(dias))
+    serie, freq = serie_adaptativa(somas, "bombonas", {})
+    assert freq == frequencia("2024-01-01", pd.Timestamp("2024-01-01") + pd.Timedelta(days=dias - 1))
+    # +1: a semana ou o mês parcial do começo do intervalo
+    assert len(serie) <= MAX_PONTOS + 1
+    assert serie["bombonas"].sum() == 2 * dias
+
+    so_uti, _ = serie_adaptativa(somas, "bombonas", {"local": ["UTI"]})
+    assert so_uti["bombonas"].sum() == dias
+    assert serie_adaptativa(somas, "bombonas", {"local": ["NAO_EXISTE"]}) == (None, None)
+
+
+def _mensal(n_locais):
+    locais = [f"L{i:02d}" for i in range(n_locais)]
+    return pd.DataFrame({
+        "local": pd.Categorical(locais),
+        "bombonas": range(1, n_locais + 1),
+    })
+
+
+def test_agrupar_outros_nao_mexe_ate_max_series():
+    mensal = _mensal(MAX_SERIES)
+    assert agrupar_outros(mensal, "local") is mensal
+
+
+def test_agrupar_outros_junta_as_menores_acima_de_max_series():
+    mensal = _mensal(MAX_SERIES + 3)
+    agrupado = agrupar_outros(mensal, "local")
+    totais = agrupado.groupby("local", observed=True)["bombonas"].sum()
+    assert len(totais) == MAX_SERIES
+    # As n-1 maiores ficam com o nome; as 4 menores (1..4) viram uma série só
+    assert totais[ROTULO_OUTROS] == 1 + 2 + 3 + 4
+    assert totais.drop(ROTULO_OUTROS).min() == 5
+    assert totais.sum() == mensal["bombonas"].sum()
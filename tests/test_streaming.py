@@ -0,0 +1,57 @@
+import io
+
+import pandas as pd
+import pytest
+
+from armazenamento import caminho_parquet, ler_parquet, salvar_base
+from transformacao import (REFERENCIA_CSV, REFERENCIA_EXCEL, executar_streaming, hashes_por_data, ler_estado,
+                           ler_planilha, transformar)
+
+
+def _valores(df):
+    return df.astype({"local": str, "grupo": str})
+
+
+def _ler_aba(caminho, aba):
+    df = pd.read_excel(caminho, sheet_name=aba)
+    df.columns = df.columns.str.strip().str.upper()
+    return df
+
+
+@pytest.mark.parametrize("tamanho_bloco", [37, 500, 50_000])
+def test_streaming_igual_a_referencia(tmp_path, tamanho_bloco):
+    saida = tmp_path / "bombonas_v2.csv"
+    resumo = executar_streaming(REFERENCIA_EXCEL, saida, tamanho_bloco)
+    assert saida.read_bytes() == REFERENCIA_CSV.read_bytes()
+
+    completa = tmp_path / "completa.csv"
+    planilha = ler_planilha(REFERENCIA_EXCEL)
+    salvar_base(transformar(planilha), completa)
+    # Cada bloco grava o próprio dicionário de local/grupo: compara os valores, não a ordem das categorias
+    pd.testing.assert_frame_equal(_valores(ler_parquet(caminho_parquet(saida))),
+                                  _valores(ler_parquet(caminho_parquet(completa))))
+    # O estado deixado pelo streaming é o mesmo da rodada completa: o --incremental continua dele
+    assert ler_estado(saida)["hashes"] == hashes_por_data(planilha)
+    assert resumo["linhas_lidas"] == len(planilha)
+
+
+def test_streaming_varias_abas(tmp_path):
+    planilha = pd.read_excel(REFERENCIA_EXCEL)
+    # Segunda aba sem coluna LOCAL (uma aba por unidade): o LOCAL é o nome da aba
+    uti = planilha[planilha["LOCAL"] == "ANEXO"].drop(columns="LOCAL").head(120)
+    excel = tmp_path / "varias_abas.xlsx"
+    with pd.ExcelWriter(excel) as escritor:
+        planilha.to_excel(escritor, sheet_name="Geral", index=False)
+        uti.to_excel(escritor, sheet_name="UTI", index=False)
+        pd.DataFrame({"OBS": ["sem DATA"]}).to_excel(escritor, sheet_name="Notas", index=False)
+
+    saida = tmp_path / "bombonas_v2.csv"
+    resumo = executar_streaming(excel, saida, tamanho_bloco=100)
+    assert resumo["abas"] == ["Geral", "UTI"]
+
+    abas = [ler_planilha(excel), _ler_aba(excel, "UTI").assign(LOCAL="UTI")]
+    esperado = pd.concat([transformar(df) for df in abas], ignore_index=True)
+    pd.testing.assert_frame_equal(pd.read_csv(saida), pd.read_csv(io.StringIO(esperado.to_csv(index=False))),
+                                  check_dtype=False)
+    assert ler_estado(saida)["hashes"] == hashes_por_data(pd.concat(abas, ignore_index=True))
+
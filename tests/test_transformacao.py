@@ -0,0 +1,68 @@
+import io
+
+import pandas as pd
+import pytest
+
+from armazenamento import caminho_parquet, ler_parquet, salvar_base
+from transformacao import (REFERENCIA_CSV, REFERENCIA_EXCEL, comparar_com_referencia, executar_incremental,
+                           hashes_por_data, ler_estado, ler_planilha, transformar)
+
+
+def test_transformar_igual_a_saida_do_iterrows_antigo():
+    # A referência foi gerada pelo transformacao.py antigo (laço com iterrows) sobre a mesma planilha
+    atual = transformar(ler_planilha(REFERENCIA_EXCEL))
+    # A planilha tem uma linha com LOCAL em branco: o str() do iterrows gravava "NAN"
+    assert (atual["local"] == "NAN").sum() == 1
+    gravado = pd.read_csv(io.StringIO(atual.to_csv(index=False)))
+    pd.testing.assert_frame_equal(gravado, pd.read_csv(REFERENCIA_CSV))
+    assert comparar_com_referencia(atual) == []
+
+
+def test_referencia_acusa_divergencia():
+    atual = transformar(ler_planilha(REFERENCIA_EXCEL))
+    atual.loc[10, "peso"] += 1
+    assert comparar_com_referencia(atual) == ["coluna 'peso' difere a partir da linha 12"]
+
+
+@pytest.fixture(scope="module")
+def planilha():
+    return ler_planilha(REFERENCIA_EXCEL)
+
+
+def _incremental_igual_a_completa(tmp_path, anterior, atual):
+    """Roda o incremental sobre a saída de `anterior` e compara com a rodada completa de `atual`."""
+    saida, completa = tmp_path / "incremental.csv", tmp_path / "completa.csv"
+    assert executar_incremental(anterior, saida) is None  # primeira vez: base completa
+    resultado = executar_incremental(atual, saida)
+    salvar_base(transformar(atual), completa)
+    assert saida.read_bytes() == completa.read_bytes()
+    pd.testing.assert_frame_equal(ler_parquet(caminho_parquet(saida)), ler_parquet(caminho_parquet(completa)))
+    assert ler_estado(saida)["hashes"] == hashes_por_data(atual)
+    return resultado
+
+
+def test_incremental_dias_novos_so_append(tmp_path, planilha):
+    corte = planilha["DATA"] <= "2026-03-31"
+    novas, alteradas = _incremental_igual_a_completa(tmp_path, planilha[corte], planilha)
+    assert alteradas == set() and min(novas) == "2026-04-01" and len(novas) == planilha.loc[~corte, "DATA"].nunique()
+
+
+def test_incremental_linha_historica_editada(tmp_path, planilha):
+    editada = planilha.copy()
+    editada.loc[editada["DATA"] == "2025-03-10", "PESO A"] += 5
+    novas, alteradas = _incremental_igual_a_completa(tmp_path, planilha, editada)
+    assert (novas, alteradas) == (set(), {"2025-03-10"})
+
+
+def test_incremental_data_removida(tmp_path, planilha):
+    sem_dia = planilha[planilha["DATA"] != "2025-06-15"]
+    novas, alteradas = _incremental_igual_a_completa(tmp_path, planilha, sem_dia)
+    assert (novas, alteradas) == (set(), {"2025-06-15"})
+
+
+def test_incremental_local_atrasado(tmp_path, planilha):
+    # Um LOCAL que só lançou o dia depois que o outro já tinha lançado dias seguintes
+    dia = planilha["DATA"] == "2026-01-10"
+    atrasada = planilha[~(dia & (planilha["LOCAL"] == "ANEXO"))]
+    novas, alteradas = _incremental_igual_a_completa(tmp_path, atrasada, planilha)
+    assert (novas, alteradas) == (set(), {"2026-01-10"})
@@ -0,0 +1,68 @@
+import pytest
+
+from unidades import NOME_ARQUIVO, CacheUnidades, caminho_unidade, escolher_unidade, listar_unidades
+
+
+def test_caminho_unidade(tmp_path):
+    assert caminho_unidade(tmp_path, "padrao") == tmp_path / NOME_ARQUIVO
+    assert caminho_unidade(tmp_path, "hospital-2_anexo") == tmp_path / "unidades" / "hospital-2_anexo" / NOME_ARQUIVO
+
+
+@pytest.mark.parametrize("nome", ["", None, "../padrao", "a/b", "..", "-anexo", "Anexo", "anexo ", "anexo\n"])
+def test_caminho_unidade_recusa_nome_invalido(tmp_path, nome):
+    with pytest.raises(ValueError):
+        caminho_unidade(tmp_path, nome)
+
+
+def test_listar_e_escolher_ignoram_pastas_invalidas(tmp_path):
+    (tmp_path / NOME_ARQUIVO).write_text("data\n")
+    for nome in ("uti", "Anexo", "sem_dados"):
+        (tmp_path / "unidades" / nome).mkdir(parents=True)
+    (tmp_path / "unidades" / "uti" / NOME_ARQUIVO).write_text("data\n")
+    (tmp_path / "unidades" / "Anexo" / NOME_ARQUIVO).write_text("data\n")
+
+    assert listar_unidades(tmp_path) == ["padrao", "uti"]
+    assert escolher_unidade(tmp_path, " UTI ") == ("uti", False)
+    assert escolher_unidade(tmp_path, "../../etc") == ("padrao", False)
+
+
+class _Criador:
+    def __init__(self):
+        self.criados = []
+
+    def __call__(self, unidade):
+        def criar():
+            self.criados.append(unidade)
+            return object()
+        return criar
+
+
+def _usar(cache, criador, unidade, tamanho):
+    objeto = cache.obter(unidade, criador(unidade))
+    cache.registrar(unidade, tamanho)
+    return objeto
+
+
+def test_cache_descarrega_a_usada_ha_mais_tempo():
+    cache, criador = CacheUnidades(orcamento=100), _Criador()
+    a = _usar(cache, criador, "a", 40)
+    _usar(cache, criador, "b", 40)
+    assert _usar(cache, criador, "a", 40) is a  # reusa e passa a ser a mais recente
+    _usar(cache, criador, "c", 40)
+
+    assert [item["unidade"] for item in cache.resumo()] == ["c", "a"]
+    assert cache.total() == 80 and cache.descarregadas == 1
+    # A descarregada é criada de novo no próximo acesso
+    _usar(cache, criador, "b", 40)
+    assert criador.criados == ["a", "b", "c", "b"]
+    assert cache.total() <= cache.orcamento
+
+
+def test_cache_nunca_descarrega_a_recem_usada():
+    cache, criador = CacheUnidades(orcamento=100), _Criador()
+    _usar(cache, criador, "a", 30)
+    _usar(cache, criador, "b", 30)
+    _usar(cache, criador, "grande", 500)
+
+    assert [item["unidade"] for item in cache.resumo()] == ["grande"]
+    assert cache.descarregadas == 2 and cache.total() == 500
@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import armazenamento
+import transformacao
+from armazenamento import caminho_parquet
+from transformacao import REFERENCIA_EXCEL
+from versionamento import caminho_versao
+from vigia import Vigia, comando_etl
+
+
+def _rodar(vigia):
+    trabalhador = threading.Thread(target=vigia.rodar, daemon=True)
+    trabalhador.start()
+    return trabalhador
+
+
+def _esperar(condicao, limite=10):
+    fim = time.monotonic() + limite
+    while not condicao() and time.monotonic() < fim:
+        time.sleep(0.02)
+    return condicao()
+
+
+def test_varias_gravacoes_seguidas_viram_um_etl(tmp_path):
+    excel = tmp_path / "BD_Bombonas.xlsx"
+    excel.write_bytes(b"v0")
+    chamadas = []
+    vigia = Vigia(excel, tmp_path / "bombonas_v2.csv", espera=0.3, executar=lambda: chamadas.append(1) or 0)
+    trabalhador = _rodar(vigia)
+    # O Excel salva em etapas: cada gravação avisa, mas só a última (estável) é processada
+    for i in range(1, 6):
+        excel.write_bytes(b"v" * (i + 1))
+        vigia.avisar()
+        time.sleep(0.05)
+    assert _esperar(lambda: vigia.execucoes)
+    time.sleep(0.5)
+    # Aviso sem mudança na planilha não roda de novo
+    vigia.avisar()
+    time.sleep(0.5)
+    vigia.parar()
+    trabalhador.join(5)
+    assert len(chamadas) == 1 and vigia.execucoes[0][1] == 0
+
+
+def _arquivos(saida):
+    parquet = sorted(caminho_parquet(saida).rglob("*.parquet"))
+    return (saida.read_bytes(), caminho_versao(saida).read_bytes(),
+            [(p.relative_to(saida.parent), p.read_bytes()) for p in parquet])
+
+
+def _falhar_no_csv(monkeypatch):
+    to_csv = pd.DataFrame.to_csv
+
+    def pela_metade(self, caminho=None, *args, **kwargs):
+        if caminho is None:
+            return to_csv(self, caminho, *args, **kwargs)
+        to_csv(self.head(len(self) // 2), caminho, *args, **kwargs)
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(pd.DataFrame, "to_csv", pela_metade)
+
+
+def _falhar_no_parquet(monkeypatch):
+    write_dataset = armazenamento.ds.write_dataset
+
+    def e_falhar(*args, **kwargs):
+        write_dataset(*args, **kwargs)
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(armazenamento.ds, "write_dataset", e_falhar)
+
+
+@pytest.mark.parametrize("falha", [_falhar_no_csv, _falhar_no_parquet])
+def test_etl_que_falha_mantem_versao_e_dados(tmp_path, monkeypatch, falha):
+    saida = tmp_path / "bombonas_v2.csv"
+    excel = tmp_path / "BD_Bombonas.xlsx"
+    excel.write_bytes(REFERENCIA_EXCEL.read_bytes())
+    assert transformacao.main(["--excel", str(excel), "--saida", str(saida)]) == 0
+    antes = _arquivos(saida)
+
+    # Planilha alterada; o ETL (o mesmo comando do vigia, no processo do teste) quebra no meio da gravação
+    planilha = pd.read_excel(REFERENCIA_EXCEL)
+    planilha.loc[0, "PESO A"] = pd.to_numeric(planilha.loc[0, "PESO A"], errors="coerce") + 7
+    planilha.to_excel(excel, index=False)
+    falha(monkeypatch)
+    vigia = Vigia(excel, saida, espera=0.05, executar=lambda: transformacao.main(comando_etl(excel, saida)[2:]))
+    vigia._processada = None
+    vigia.avisar()
+    trabalhador = _rodar(vigia)
+    assert _esperar(lambda: vigia.execucoes)
+    vigia.parar()
+    trabalhador.join(5)
+    monkeypatch.undo()
+
+    assert isinstance(vigia.execucoes[0][1], OSError)
+    assert _arquivos(saida) == antes
+    assert sorted(p.name for p in tmp_path.iterdir() if p.name.startswith(".")) == []